@@ -1,10 +1,18 @@
 import streamlit as st
+from utils.instrument import serve_metrics_from_env
 
 st.set_page_config(
     page_title="Portfolio Allocator",
     page_icon="📊",
     layout="wide"
 )
+serve_metrics_from_env()
+
+# Hidden diagnostics view (not in the navigation), reached with ?diagnostics=1
+if 'diagnostics' in st.query_params:
+    from utils.diagnostics import render_diagnostics
+    render_diagnostics()
+    st.stop()
 
 st.title("📊 Portfolio Allocator")
 st.markdown("### Understanding Different Portfolio Allocation Strategies")
@@ -23,6 +31,7 @@ Welcome to Portfolio Allocator! This tool helps you understand and compare diffe
 - Active portfolio management approach
 - Short to medium-term deviations from strategic allocation
 - Takes advantage of market opportunities
+- Explore signal-driven rebalancing on the Tactical Signals page
 
 #### 3. Modern Portfolio Theory (MPT)
 - Developed by Harry Markowitz
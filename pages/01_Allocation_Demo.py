@@ -1,60 +1,98 @@
 import streamlit as st
-import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
-import pdfkit
-import tempfile
 from datetime import datetime
-import os
+from utils.startup import lazy_import, start_page_timer
+
+reports = lazy_import('utils.reports')
+market_store = lazy_import('utils.market_store')
+simulation = lazy_import('utils.simulation')
+path_metrics = lazy_import('utils.path_metrics')
+charts = lazy_import('utils.charts')
+sensitivity = lazy_import('utils.sensitivity')
+go = lazy_import('plotly.graph_objects')
 
 # Set page config
 st.set_page_config(page_title="Allocation Demo", page_icon="📈", layout="wide")
+timer = start_page_timer(__file__)
 
-# Generate sample data
-np.random.seed(42)
-dates = pd.date_range(start='2018-01-01', end='2023-12-31', freq='M')
-
-# Generate sample returns for different portfolios
-conservative_returns = np.random.normal(0.004, 0.02, len(dates))  # Lower return, lower volatility
-aggressive_returns = np.random.normal(0.007, 0.04, len(dates))    # Higher return, higher volatility
+# Return assumptions per portfolio (monthly mean, monthly volatility, colour)
+PORTFOLIOS = {
+    'Conservative Portfolio': (0.004, 0.02, '31, 119, 180'),  # Lower return, lower volatility
+    'Aggressive Portfolio': (0.007, 0.04, '255, 127, 14'),    # Higher return, higher volatility
+}
 
-# Calculate cumulative returns
-conservative_cumulative = (1 + conservative_returns).cumprod()
-aggressive_cumulative = (1 + aggressive_returns).cumprod()
+# Time steps per month and date grid for each simulation frequency
+FREQUENCIES = {
+    'Monthly': (1, pd.offsets.MonthEnd()),
+    'Daily': (21, pd.offsets.BDay()),
+}
+# Daily paths are 21x longer, so fewer scenarios keep the first chart interactive
+DAILY_MAX_SCENARIOS = 10_000
 
-# Create DataFrame
-df = pd.DataFrame({
-    'Date': dates,
-    'Conservative Portfolio': conservative_cumulative,
-    'Aggressive Portfolio': aggressive_cumulative
-})
+# Simulation controls
+st.sidebar.markdown("### Simulation Settings")
+num_scenarios = st.sidebar.select_slider(
+    "Simulated Scenarios",
+    options=[1_000, 10_000, 50_000, 100_000],
+    value=100_000
+)
+horizon = st.sidebar.select_slider("Horizon (years)", options=[6, 10, 20, 30], value=6)
+frequency = st.sidebar.radio("Time Step", list(FREQUENCIES), horizontal=True)
+if frequency == 'Daily' and num_scenarios > DAILY_MAX_SCENARIOS:
+    st.sidebar.warning(f"Daily steps simulate {DAILY_MAX_SCENARIOS:,} scenarios to stay responsive.")
+    num_scenarios = DAILY_MAX_SCENARIOS
 
-# Create the plot
 st.title("📈 Portfolio Growth Comparison")
 st.markdown("### Comparing Different Allocation Strategies")
+timer.first_render()
 
-fig = go.Figure()
+# Simulate percentile bands and per-path drawdown metrics for each portfolio (published once per parameter set
+# and leased from the shared store, so concurrent sessions map one copy of each result)
+steps, offset = FREQUENCIES[frequency]
+dates = pd.date_range(start='2018-01-01', periods=horizon * 12 * steps, freq=offset)
+with st.spinner("Simulating scenarios..."):
+    st.session_state.simulation_leases = {
+        name: market_store.shared(simulation.simulate_percentile_bands)(
+            mean / steps, vol / np.sqrt(steps), num_scenarios, len(dates), seed=42, path_metrics=True)
+        for name, (mean, vol, _) in PORTFOLIOS.items()
+    }
+    bands = {name: lease.value for name, lease in st.session_state.simulation_leases.items()}
 
-fig.add_trace(
-    go.Scatter(
-        x=df['Date'],
-        y=df['Conservative Portfolio'],
-        name='Conservative Portfolio',
-        line=dict(color='#1f77b4', width=2),
-    )
+# Zooming narrows the window that the chart layer downsamples, bringing back full detail
+zoom = st.sidebar.slider(
+    "Zoom",
+    min_value=dates[0].date(),
+    max_value=dates[-1].date(),
+    value=(dates[0].date(), dates[-1].date()),
+    format="YYYY-MM-DD"
 )
 
-fig.add_trace(
-    go.Scatter(
-        x=df['Date'],
-        y=df['Aggressive Portfolio'],
-        name='Aggressive Portfolio',
-        line=dict(color='#ff7f0e', width=2),
+# Create the plot, downsampled to the chart's point budget
+chart = charts.ChartData(x_range=zoom)
+
+for name, (_, _, rgb) in PORTFOLIOS.items():
+    p5, p25, p50, p75, p95 = bands[name]['bands']
+    # Outer (5-95) and inner (25-75) fans, each drawn as a lower edge plus a filled upper edge
+    for low, high, label, alpha in [(p5, p95, '5-95%', 0.15), (p25, p75, '25-75%', 0.3)]:
+        chart.add_line(
+            dates, low, line=dict(width=0), legendgroup=name,
+            showlegend=False, hoverinfo='skip',
+        )
+        chart.add_line(
+            dates, high, fill='tonexty', fillcolor=f'rgba({rgb}, {alpha})',
+            line=dict(width=0), legendgroup=name, name=f'{name} {label}',
+            hoverinfo='skip',
+        )
+    chart.add_line(
+        dates,
+        p50,
+        name=f'{name} (median)',
+        legendgroup=name,
+        line=dict(color=f'rgb({rgb})', width=2),
     )
-)
 
-# Update layout
-fig.update_layout(
+fig = chart.figure(
     title='Compounded Growth of $1 Investment',
     xaxis_title='Date',
     yaxis_title='Portfolio Value',
@@ -69,17 +107,53 @@ fig.update_layout(
     height=600,
 )
 
-# Add range slider
-fig.update_xaxes(rangeslider_visible=True)
+# Add range slider; it cannot draw WebGL traces, so large charts rely on the zoom slider instead
+fig.update_xaxes(rangeslider_visible=not chart.webgl)
 
 # Display the plot
 st.plotly_chart(fig, use_container_width=True)
+st.caption(chart.stats(fig).summary())
+
+# Path-dependent risk: drawdowns need every simulated path, not just the percentile bands
+st.markdown("### Path Risk")
+risk = pd.DataFrame({
+    name: path_metrics.summarize_path_metrics(result) for name, result in bands.items()
+}).T
+st.dataframe(
+    pd.DataFrame({
+        'Median Max Drawdown': risk['median_max_drawdown'],
+        'Worst 5% Max Drawdown': risk['tail_max_drawdown'],
+        'Median Longest Drawdown (months)': risk['median_longest_drawdown'] / steps,
+        'Time Under Water': risk['mean_time_under_water'],
+        'VaR 95% (terminal)': risk['var'],
+        'CVaR 95% (terminal)': risk['cvar'],
+    }).style.format({
+        'Median Longest Drawdown (months)': '{:.1f}',
+        **{column: '{:.1%}' for column in ['Median Max Drawdown', 'Worst 5% Max Drawdown',
+                                          'Time Under Water', 'VaR 95% (terminal)', 'CVaR 95% (terminal)']},
+    }),
+    use_container_width=True,
+)
+
+underwater = charts.ChartData(x_range=zoom)
+for name, (_, _, rgb) in PORTFOLIOS.items():
+    underwater.add_line(dates, bands[name]['underwater_mean'], name=name, line=dict(color=f'rgb({rgb})', width=2))
+st.plotly_chart(underwater.figure(
+    title='Average Drawdown from Running Peak',
+    xaxis_title='Date',
+    yaxis_title='Drawdown',
+    yaxis_tickformat='.0%',
+    template='plotly_white',
+    hovermode='x unified',
+    height=350,
+), use_container_width=True)
 
 # Add explanation
 st.markdown("""
 ### Understanding the Growth Comparison
 
-This chart demonstrates the growth of two different portfolio allocation strategies:
+This chart demonstrates the growth of two different portfolio allocation strategies. Each fan shows the
+5th-95th and 25th-75th percentile range across the simulated scenarios, with the median as a solid line:
 
 1. **Conservative Portfolio**
    - Lower volatility
@@ -91,10 +165,14 @@ This chart demonstrates the growth of two different portfolio allocation strateg
    - Potential for higher returns
    - Typically higher allocation to stocks and growth assets
 
-The chart shows how an initial $1 investment would have grown over time under each strategy. Notice how:
+The chart shows how an initial $1 investment could grow over time under each strategy. Notice how:
 - The aggressive portfolio shows more dramatic ups and downs
 - The conservative portfolio shows more stable, but generally lower growth
 - Different strategies may outperform during different market conditions
+
+The path risk table looks at each simulated path as a whole: the deepest fall from its running peak
+(max drawdown), the longest stretch below a previous peak, the share of time spent under water, and the
+value at risk and expected shortfall (CVaR, the average of the worst 5% of outcomes) of the final return.
 """)
 
 # Add interactive elements
@@ -113,70 +191,99 @@ st.sidebar.markdown(f"""
 *Note: This is a simplified demonstration using simulated data. Actual investment results may vary significantly.*
 """)
 
-# Add PDF generation function after the markdown explanation
-def generate_pdf():
-    # Create a temporary HTML file
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.html') as f:
-        # Generate HTML content
-        html_content = f"""
-        <html>
-            <head>
-                <title>Portfolio Allocation Report</title>
-                <style>
-                    body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                    h1 {{ color: #2e4053; }}
-                    .date {{ color: #7f8c8d; margin-bottom: 30px; }}
-                </style>
-            </head>
-            <body>
-                <h1>Portfolio Allocation Report</h1>
-                <div class="date">Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</div>
-                <h2>Portfolio Settings</h2>
-                <ul>
-                    <li>Risk Level: {risk_level}/10</li>
-                    <li>Investment Period: {investment_period}</li>
-                </ul>
-                <h2>Understanding the Growth Comparison</h2>
-                <h3>Conservative Portfolio</h3>
-                <ul>
-                    <li>Lower volatility</li>
-                    <li>More stable growth</li>
-                    <li>Typically higher allocation to bonds and stable assets</li>
-                </ul>
-                <h3>Aggressive Portfolio</h3>
-                <ul>
-                    <li>Higher volatility</li>
-                    <li>Potential for higher returns</li>
-                    <li>Typically higher allocation to stocks and growth assets</li>
-                </ul>
-            </body>
-        </html>
-        """
-        f.write(html_content.encode('utf-8'))
-        html_path = f.name
-
-    # Generate PDF from HTML
-    pdf_path = html_path.replace('.html', '.pdf')
-    try:
-        pdfkit.from_file(html_path, pdf_path)
-        with open(pdf_path, 'rb') as pdf_file:
-            pdf_data = pdf_file.read()
-        # Clean up temporary files
-        os.unlink(html_path)
-        os.unlink(pdf_path)
-        return pdf_data
-    except Exception as e:
-        st.error(f"Error generating PDF: {str(e)}")
-        return None
+# Sensitivity heatmap: outcomes over a grid of the settings above, drawn coarse first and refined in place
+st.markdown("### Sensitivity")
+SWEEPS = {
+    'Equity Weight x Rebalance Threshold': ('equity_weight', 'threshold'),
+    'Risk Level x Horizon': ('equity_weight', 'horizon'),
+}
+METRIC_LABELS = dict(zip(sensitivity.METRICS, ['Median CAGR', 'Volatility', 'Median Max Drawdown',
+                                               'Probability of Loss', 'Rebalances per Year']))
+sweep_col, metric_col, size_col = st.columns(3)
+x_name, y_name = SWEEPS[sweep_col.selectbox("Sweep", list(SWEEPS))]
+metric = metric_col.selectbox("Outcome", sensitivity.METRICS, format_func=METRIC_LABELS.get)
+grid_points = size_col.select_slider("Grid Points per Axis", options=[11, 21, 31, 41], value=21)
 
-# Add download button at the bottom of the page
-st.markdown("---")
-if st.button("Generate and Download PDF Report"):
-    pdf_data = generate_pdf()
-    if pdf_data:
+# Risk tolerance maps to the equity weight; the threshold sweep runs at the chosen horizon
+x_values, y_values = sensitivity.sweep_axis(x_name, grid_points), sensitivity.sweep_axis(y_name, grid_points)
+key = (x_name, y_name, grid_points, horizon)
+results = st.session_state.setdefault('sensitivity', {})
+placeholder = st.empty()
+
+
+def sensitivity_figure(result):
+    x_label, y_label = sensitivity.PARAMETERS[x_name][0], sensitivity.PARAMETERS[y_name][0]
+    fig = go.Figure(go.Heatmap(
+        x=result.x_values, y=result.y_values, z=result.filled(metric),
+        colorscale='RdYlGn_r' if metric in ('volatility', 'shortfall_probability') else 'RdYlGn',
+        colorbar=dict(tickformat='.1f' if metric == 'rebalances_per_year' else '.0%'),
+        hovertemplate=f"{x_label}: %{{x:.2f}}<br>{y_label}: %{{y:.2f}}<br>"
+                      f"{METRIC_LABELS[metric]}: %{{z:.3f}}<extra></extra>",
+    ))
+    current = horizon if y_name == 'horizon' else sensitivity.PARAMETERS[y_name][2]
+    fig.add_trace(go.Scatter(x=[risk_level / 10], y=[current],
+                             mode='markers', marker=dict(symbol='x', size=12, color='black'),
+                             name='Current settings', hoverinfo='skip'))
+    fig.update_layout(
+        title=f"{METRIC_LABELS[metric]} by {x_label} and {y_label}",
+        xaxis_title=x_label,
+        yaxis_title=y_label,
+        template='plotly_white',
+        height=500,
+    )
+    return fig
+
+
+if key in results:
+    placeholder.plotly_chart(sensitivity_figure(results[key]), use_container_width=True)
+else:
+    for result in sensitivity.iter_sweep(x_name, x_values, y_name, y_values, fixed={'horizon': horizon}):
+        placeholder.plotly_chart(sensitivity_figure(result), use_container_width=True)
+    results[key] = result
+st.caption(f"{results[key].computed.size:,} grid points over the same 1,000 simulated monthly equity/bond "
+           f"scenarios, computed in {results[key].seconds:.2f}s")
+
+# Report rendering runs on the shared background service; the page polls its status only while it is pending
+@st.fragment(run_every=1.0)
+def poll_report_status(job_id):
+    status = reports.get_report_service().status(job_id)
+    if status in ('queued', 'running'):
+        st.info(f"Rendering PDF report ({status})...")
+    else:
+        # A full rerun shows the result once and stops the polling
+        st.rerun()
+
+
+def show_report_status():
+    job_id = st.session_state.get('report_job')
+    if job_id is None:
+        return
+    service = reports.get_report_service()
+    status = service.status(job_id)
+    if status in ('queued', 'running'):
+        poll_report_status(job_id)
+    elif status == 'done':
         st.download_button(
             label="Download PDF Report",
-            data=pdf_data,
-            file_name=f"portfolio_allocation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+            data=service.result(job_id),
+            file_name=st.session_state.report_file_name,
             mime="application/pdf"
         )
+    else:
+        job = service.job(job_id)
+        st.error(f"Error generating PDF: {job.error if job is not None else 'report expired'}")
+
+# Add download button at the bottom of the page
+st.markdown("---")
+if st.button("Generate and Download PDF Report"):
+    try:
+        st.session_state.report_job = reports.get_report_service().submit({
+            'risk_level': risk_level,
+            'investment_period': investment_period,
+        })
+        st.session_state.report_file_name = \
+            f"portfolio_allocation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    except RuntimeError as e:
+        st.error(str(e))
+show_report_status()
+timer.finish()
@@ -1,112 +1,43 @@
+import os
+import tempfile
 import streamlit as st
-import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
+from utils.instrument import span
+from utils.startup import lazy_import, start_page_timer
+
+generate_data = lazy_import('utils.generate_data')
+hierarchy = lazy_import('utils.hierarchy')
+live_holdings = lazy_import('utils.live_holdings')
+market_store = lazy_import('utils.market_store')
+treemap = lazy_import('utils.treemap')
+go = lazy_import('plotly.graph_objects')
 
 # Set page config
 st.set_page_config(page_title="Portfolio Heatmap", page_icon="🗺️", layout="wide")
+timer = start_page_timer(__file__)
 
-# Initialize session state for the dataframe
-if 'portfolio_df' not in st.session_state:
-    st.session_state.portfolio_df = None
-
-st.title("🗺️ Portfolio Allocation Heatmap")
-st.markdown("### Sector and Fund Analysis")
-
-# Step 1: Generate Data Button
-if st.button("1️⃣ Generate Sample Data"):
-    # Sample data structure
-    data = {
-        'Sector': [
-            # Technology
-            'Technology', 'Technology', 'Technology', 'Technology',
-            # Financial
-            'Financial', 'Financial', 'Financial',
-            # Healthcare
-            'Healthcare', 'Healthcare', 'Healthcare',
-            # Consumer
-            'Consumer', 'Consumer', 'Consumer',
-            # Energy
-            'Energy', 'Energy',
-            # Real Estate
-            'Real Estate', 'Real Estate'
-        ],
-        'Fund': [
-            # Technology funds
-            'Tech Growth ETF', 'Digital Innovation Fund', 'Semiconductor Index', 'Cloud Computing ETF',
-            # Financial funds
-            'Global Finance ETF', 'Fintech Leaders', 'Banking Index Fund',
-            # Healthcare funds
-            'Healthcare Innovation', 'Biotech Index', 'Medical Devices ETF',
-            # Consumer funds
-            'Consumer Staples ETF', 'E-commerce Leaders', 'Retail Index',
-            # Energy funds
-            'Clean Energy ETF', 'Global Energy Fund',
-            # Real Estate funds
-            'REIT Index', 'Property Securities'
-        ],
-        'Market_Value': [
-            # Technology values
-            2500000, 1800000, 1500000, 1200000,
-            # Financial values
-            1600000, 1400000, 1100000,
-            # Healthcare values
-            1900000, 1300000, 1000000,
-            # Consumer values
-            1400000, 1200000, 900000,
-            # Energy values
-            1100000, 900000,
-            # Real Estate values
-            800000, 700000
-        ],
-        'Daily_Return': [
-            # Technology returns
-            2.3, -1.5, 1.8, 3.2,
-            # Financial returns
-            0.8, 1.5, -0.7,
-            # Healthcare returns
-            -0.5, 2.1, 1.3,
-            # Consumer returns
-            0.3, 1.7, -0.9,
-            # Energy returns
-            2.8, -1.2,
-            # Real Estate returns
-            0.5, -0.8
-        ]
-    }
-    
-    st.session_state.portfolio_df = pd.DataFrame(data)
-    
-    # Calculate total value for percentages
-    total_value = st.session_state.portfolio_df['Market_Value'].sum()
-    st.session_state.portfolio_df['Percentage'] = st.session_state.portfolio_df['Market_Value'] / total_value * 100
-    
-    # Display the dataframe with formatted values
-    st.markdown("### Generated Portfolio Data")
-    formatted_df = st.session_state.portfolio_df.copy()
-    formatted_df['Market_Value'] = formatted_df['Market_Value'].apply(lambda x: f"${x:,.0f}")
-    formatted_df['Daily_Return'] = formatted_df['Daily_Return'].apply(lambda x: f"{x:.1f}%")
-    formatted_df['Percentage'] = formatted_df['Percentage'].apply(lambda x: f"{x:.1f}%")
-    st.dataframe(formatted_df, use_container_width=True)
 
-# Step 2: Visualize Data Button
-if st.session_state.portfolio_df is not None:
-    if st.button("2️⃣ Visualize as Heatmap"):
-        # Create figure
+def treemap_figure(tree: pd.DataFrame, **layout):
+    """Treemap figure of build_treemap / LiveTreemap node rows."""
+    with span('figure.treemap'):
         fig = go.Figure(go.Treemap(
-            labels=st.session_state.portfolio_df['Fund'],
-            parents=st.session_state.portfolio_df['Sector'],
-            values=st.session_state.portfolio_df['Market_Value'],
-            textinfo="label+percent parent+value",
+            ids=tree['id'],
+            labels=tree['label'],
+            parents=tree['parent'],
+            values=tree['value'],
+            branchvalues='total',
             texttemplate="<b>%{label}</b><br>%{percentParent:.1f}% of %{parent}<br>$%{value:,.0f}",
             hovertemplate="<b>%{label}</b><br>" +
-                         "Sector: %{parent}<br>" +
+                         "Parent: %{parent}<br>" +
                          "Value: $%{value:,.0f}<br>" +
-                         "Daily Return: %{customdata:.1f}%<br>" +
+                         "Daily Return: %{customdata[0]:.2f}%<br>" +
+                         "Positions: %{customdata[1]:,}<br>" +
                          "<extra></extra>",
-            customdata=st.session_state.portfolio_df['Daily_Return'],
+            customdata=np.column_stack([tree['color'], tree['count']]),
+            maxdepth=2,
             marker=dict(
-                colors=st.session_state.portfolio_df['Daily_Return'],
+                colors=tree['color'],
                 colorscale='RdYlGn',  # Red for negative, Yellow for neutral, Green for positive
                 cmid=0  # Set the middle of the color scale to 0
             )
@@ -115,36 +46,32 @@ if st.session_state.portfolio_df is not None:
         # Update layout
         fig.update_layout(
             title={
-                'text': "Portfolio Allocation by Sector and Fund<br><sup>Color indicates daily performance</sup>",
+                'text': "Portfolio Allocation by Sector and Fund<br><sup>Color indicates value-weighted daily performance</sup>",
                 'y':0.95,
                 'x':0.5,
                 'xanchor': 'center',
                 'yanchor': 'top'
             },
             height=700,
+            **layout,
         )
+    return fig
 
-        # Display the plot
-        st.plotly_chart(fig, use_container_width=True)
-
-        # Add explanation
-        st.markdown("""
-        ### Understanding the Heatmap
-
-        This treemap visualization shows your portfolio allocation across different sectors and individual funds:
 
-        - **Size of boxes**: Represents the market value of each holding
-        - **Color coding**: 
-            - 🟢 Green: Positive daily return
-            - 🟨 Yellow: Neutral performance
-            - 🔴 Red: Negative daily return
-        - **Hierarchy**: 
-            - First level: Sector allocation
-            - Second level: Individual funds within each sector
-        """)
+# Initialize session state for the dataframe
+if 'portfolio_df' not in st.session_state:
+    st.session_state.portfolio_df = None
 
 # Sidebar controls
 st.sidebar.markdown("### Visualization Controls")
+num_positions = st.sidebar.select_slider(
+    "Number of Positions",
+    options=[1_000, 10_000, 50_000, 100_000, 250_000, 1_000_000],
+    value=50_000
+)
+
+max_nodes = st.sidebar.slider("Maximum Treemap Boxes", 100, 5000, 1500, step=100)
+
 view_type = st.sidebar.selectbox(
     "View By",
     ["Market Value", "Daily Return", "Both"]
@@ -159,8 +86,8 @@ min_value = st.sidebar.number_input(
     "Minimum Position Size ($)",
     min_value=0,
     max_value=1000000,
-    value=500000,
-    step=100000
+    value=0,
+    step=10000
 )
 
 st.sidebar.markdown(f"""
@@ -170,4 +97,200 @@ st.sidebar.markdown(f"""
 - Colored by {view_type.lower()}
 
 *Note: This is sample data for demonstration purposes.*
-""") 
\ No newline at end of file
+""")
+
+st.title("🗺️ Portfolio Allocation Heatmap")
+st.markdown("### Sector and Fund Analysis")
+timer.first_render()
+
+# Step 1: Generate Data Button
+if st.button("1️⃣ Generate Sample Data"):
+    # Generated book of positions, published once to the shared store; every session holding the same
+    # book leases one read-only, memory-mapped copy instead of keeping its own
+    generate = market_store.shared(generate_data.generate_holdings_data)
+    st.session_state.portfolio_lease = generate(num_positions, seed=42)
+    st.session_state.portfolio_df = st.session_state.portfolio_lease.value
+
+if st.session_state.portfolio_df is not None:
+    df = st.session_state.portfolio_df
+    total_value = df['Market_Value'].sum()
+
+    # Display the data with column formatting instead of pre-formatted string columns
+    st.markdown("### Generated Portfolio Data")
+    st.caption(f"{len(df):,} positions in {df['Fund'].nunique():,} funds, ${total_value:,.0f} in total")
+    st.dataframe(
+        df.assign(Percentage=df['Market_Value'] / total_value * 100),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Market_Value': st.column_config.NumberColumn(format="$%,.0f"),
+            'Daily_Return': st.column_config.NumberColumn(format="%.1f%%"),
+            'Percentage': st.column_config.NumberColumn(format="%.3f%%"),
+        }
+    )
+
+# Step 2: Visualize Data Button
+if st.session_state.portfolio_df is not None:
+    if st.button("2️⃣ Visualize as Heatmap"):
+        # Aggregate positions into a bounded sector -> sub-industry -> fund hierarchy
+        tree = treemap.build_treemap(st.session_state.portfolio_df, max_nodes=max_nodes, min_value=min_value)
+
+        fig = treemap_figure(tree)
+
+        # Display the plot
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption(f"{len(tree):,} boxes; smaller funds are grouped into 'Other' within each sub-industry")
+
+        # Add explanation
+        st.markdown("""
+        ### Understanding the Heatmap
+
+        This treemap visualization shows your portfolio allocation across different sectors and individual funds:
+
+        - **Size of boxes**: Represents the market value of each holding
+        - **Color coding**: 
+            - 🟢 Green: Positive daily return
+            - 🟨 Yellow: Neutral performance
+            - 🔴 Red: Negative daily return
+        - **Hierarchy**: 
+            - First level: Sector allocation
+            - Second level: Sub-industries within each sector (click to drill down)
+            - Third level: Individual funds, with the smallest grouped into "Other"
+        """)
+
+# Step 3: Live updates. Price and position messages dropped into a directory are applied as deltas
+# to an indexed holdings table; only the live section reruns on each tick.
+if st.session_state.portfolio_df is not None and st.toggle("3️⃣ Stream Live Updates"):
+    df = st.session_state.portfolio_df
+    live = st.session_state.get('live')
+    if live is None or live['source_df'] is not df or live['max_nodes'] != max_nodes:
+        holdings = live_holdings.LiveHoldings(df)
+        # A private drop directory is consumed (files deleted once read); a shared one is only read.
+        # The private one belongs to the session state and is removed once the session is released.
+        shared_dir = os.environ.get(live_holdings.DROP_ENV)
+        private_dir = None if shared_dir else tempfile.TemporaryDirectory(prefix='holdings-drop-')
+        drop_dir = shared_dir or private_dir.name
+        source = live_holdings.FileDropSource(drop_dir, consume=private_dir is not None)
+        live = st.session_state.live = {
+            'source_df': df,
+            'max_nodes': max_nodes,
+            'holdings': holdings,
+            'tree': live_holdings.LiveTreemap(holdings, max_nodes=max_nodes),
+            'pipeline': live_holdings.IngestionPipeline(holdings, [source]),
+            'drop_dir': drop_dir,
+            'private_dir': private_dir,
+            'funds': df['Fund'].cat.categories.tolist(),
+            'positions': df['Position'].tolist(),
+            'ticks': 0,
+        }
+    # Simulated ticks would be written into a shared directory for every other reader, so they are opt-in there
+    simulate = st.checkbox("Simulate a price feed", value=live['private_dir'] is not None,
+                           help=f"Otherwise feed {live['drop_dir']} with `python -m utils.live_holdings --drop DIR`")
+    st.caption(f"Reading updates from {live['drop_dir']}")
+
+    @st.fragment(run_every=2.0)
+    def show_live_heatmap():
+        if simulate:
+            live['ticks'] += 1
+            updates = live_holdings.simulate_updates(live['funds'], live['positions'], 500, seed=live['ticks'])
+            live_holdings.write_drop(live['drop_dir'], updates)
+        stats = live['pipeline'].pump()
+        changed = live['tree'].update()
+        holdings = live['holdings']
+
+        fig = treemap_figure(live['tree'].frame(), uirevision='live')
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption(f"{stats.applied:,} updates applied in {stats.seconds * 1e3:.0f} ms; "
+                   f"{len(changed):,} of {len(live['tree']):,} boxes changed; "
+                   f"book value ${holdings.total:,.0f}")
+        for error in stats.errors[:5]:
+            st.warning(error)
+
+        left, right = st.columns(2)
+        left.markdown("#### Sector Totals")
+        left.dataframe(
+            holdings.level_frame(1).sort_values('Market_Value', ascending=False),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'Market_Value': st.column_config.NumberColumn(format="$%,.0f"),
+                'Daily_Return': st.column_config.NumberColumn(format="%.2f%%"),
+                'Percentage': st.column_config.NumberColumn(format="%.2f%%"),
+            }
+        )
+        right.markdown("#### Changed Boxes")
+        right.dataframe(
+            changed.loc[changed['depth'] == changed['depth'].max(), ['id', 'value', 'color']]
+            .rename(columns={'value': 'Market_Value', 'color': 'Daily_Return'}).head(200),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'Market_Value': st.column_config.NumberColumn(format="$%,.0f"),
+                'Daily_Return': st.column_config.NumberColumn(format="%.2f%%"),
+            }
+        )
+
+    show_live_heatmap()
+
+# Step 4: Drill-down. An Euler-tour index over the book answers subtree totals and top contributors
+# in O(log n) per query, so each selection below stays interactive on million-line books.
+if st.session_state.portfolio_df is not None and st.toggle("4️⃣ Drill Down and Exposure Checks"):
+    df = st.session_state.portfolio_df
+    drill = st.session_state.get('drill')
+    if drill is None or drill['source_df'] is not df:
+        with span('hierarchy.build'):
+            drill = st.session_state.drill = {'source_df': df, 'index': hierarchy.HoldingsIndex(df)}
+    index = drill['index']
+
+    path = ()
+    columns = st.columns(len(index.levels))
+    for column, level in zip(columns, index.levels):
+        options = index.children(path)[level].tolist()
+        choice = column.selectbox(level.replace('_', ' '), ['(All)'] + options, key=f'drill_{level}')
+        if choice == '(All)':
+            break
+        path += (choice,)
+
+    node = index.subtree(path)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Market Value", f"${node['Market_Value']:,.0f}")
+    col2.metric("Daily Return", f"{node['Daily_Return']:.2f}%")
+    col3.metric("Positions", f"{node['Positions']:,}")
+    col4.metric("Share of Book", f"{node['Percentage']:.2f}%")
+
+    percent = st.column_config.NumberColumn(format="%.2f%%")
+    left, right = st.columns(2)
+    left.markdown(f"#### Breakdown of {' / '.join(path) or 'the Book'}")
+    left.dataframe(
+        index.children(path).sort_values('Market_Value', ascending=False).head(500),
+        use_container_width=True,
+        hide_index=True,
+        column_config={'Market_Value': st.column_config.NumberColumn(format="$%,.0f"),
+                       'Daily_Return': percent, 'Percentage': percent}
+    )
+    ranking = right.radio("Top 10 Positions by", ['value', 'contribution', 'detraction'], horizontal=True,
+                          format_func=str.title)
+    right.dataframe(
+        index.top_k(path, 10, by=ranking),
+        use_container_width=True,
+        hide_index=True,
+        column_config={'Market_Value': st.column_config.NumberColumn(format="$%,.0f"),
+                       'Daily_Return': percent,
+                       'Contribution': st.column_config.NumberColumn(format="%.4f pp")}
+    )
+
+    st.markdown("#### Exposure Limits")
+    limit_col, depth_col = st.columns(2)
+    limit = limit_col.slider("Maximum Share of Book (%)", 0.1, 25.0, 5.0, step=0.1)
+    depth = depth_col.selectbox("Level", range(1, len(index.levels) + 1),
+                                format_func=lambda d: index.levels[d - 1].replace('_', ' '))
+    breaches = index.exposure_breaches(depth, limit)
+    if len(breaches):
+        st.warning(f"{len(breaches):,} {index.levels[depth - 1].replace('_', ' ').lower()} node(s) above {limit:.1f}%")
+        st.dataframe(breaches, use_container_width=True, hide_index=True,
+                     column_config={'Market_Value': st.column_config.NumberColumn(format="$%,.0f"),
+                                    'Daily_Return': percent, 'Percentage': percent})
+    else:
+        st.success(f"No node above {limit:.1f}% of the book")
+
+timer.finish()
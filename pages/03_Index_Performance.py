@@ -1,48 +1,42 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from utils.cache import cached
+from utils.instrument import instrumented
+from utils.rolling import WINDOWS, rolling_risk_metrics
+from utils.startup import lazy_import, start_page_timer
 
-def generate_performance_data(start_date, periods=36, seed=42):
-    """Generate mock performance data for fund and index"""
-    np.random.seed(seed)
-    
-    # Generate monthly dates
-    dates = pd.date_range(start=start_date, periods=periods, freq='M')
-    
-    # Generate random returns with some correlation
-    index_returns = np.random.normal(0.005, 0.02, periods)  # mean 0.5%, std 2%
-    fund_returns = index_returns + np.random.normal(0.002, 0.01, periods)  # slightly higher returns
-    
-    # Create DataFrame
-    df = pd.DataFrame({
-        'Date': dates,
-        'Fund': fund_returns,
-        'Index': index_returns
-    })
-    
-    return df
+charts = lazy_import('utils.charts')
+generate_data = lazy_import('utils.generate_data')
+go = lazy_import('plotly.graph_objects')
+timer = start_page_timer(__file__)
 
+@instrumented('figure.performance_comparison')
 def plot_performance_comparison(df):
-    """Create a bar chart comparing fund vs index performance"""
-    fig = go.Figure()
-    
-    # Add Fund performance bars
-    fig.add_trace(go.Bar(
-        x=df['Date'],
-        y=df['Fund'] * 100,  # Convert to percentage
-        name='Fund',
-        marker_color='rgb(26, 118, 255)'
-    ))
-    
-    # Add Index performance bars
-    fig.add_trace(go.Bar(
-        x=df['Date'],
-        y=df['Index'] * 100,  # Convert to percentage
-        name='Index',
-        marker_color='rgb(58, 200, 225)'
-    ))
+    """Create a bar chart comparing fund vs index performance (lines for long histories)"""
+    if len(df) > charts.BAR_LIMIT:
+        chart = charts.ChartData()
+        chart.add_line(df['Date'], df['Fund'] * 100, name='Fund', line=dict(color='rgb(26, 118, 255)'))
+        chart.add_line(df['Date'], df['Index'] * 100, name='Index', line=dict(color='rgb(58, 200, 225)'))
+        fig = chart.figure()
+    else:
+        fig = go.Figure()
+
+        # Add Fund performance bars
+        fig.add_trace(go.Bar(
+            x=df['Date'],
+            y=df['Fund'] * 100,  # Convert to percentage
+            name='Fund',
+            marker_color='rgb(26, 118, 255)'
+        ))
+
+        # Add Index performance bars
+        fig.add_trace(go.Bar(
+            x=df['Date'],
+            y=df['Index'] * 100,  # Convert to percentage
+            name='Index',
+            marker_color='rgb(58, 200, 225)'
+        ))
     
     # Update layout
     fig.update_layout(
@@ -66,6 +60,29 @@ def plot_performance_comparison(df):
     
     return fig
 
+@instrumented('figure.metric_panel')
+def plot_metric_panel(dates, series, title, percent=False):
+    """Create a line chart of one or more rolling metrics"""
+    chart = charts.ChartData()
+    scale = 100 if percent else 1
+    for name, values in series.items():
+        chart.add_line(dates, values * scale, name=name, mode='lines')
+    fig = chart.figure()
+    fig.update_layout(
+        title=title,
+        height=350,
+        plot_bgcolor='white',
+        hovermode='x unified',
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='left', x=0),
+        yaxis=dict(
+            gridcolor='lightgrey',
+            zerolinecolor='lightgrey',
+            ticksuffix='%' if percent else ''
+        ),
+        xaxis=dict(gridcolor='lightgrey')
+    )
+    return fig
+
 # Page title
 st.title("Index Performance")
 
@@ -79,13 +96,41 @@ start_date = st.sidebar.date_input(
     max_value=datetime.now()
 )
 
-# Generate data
-df = generate_performance_data(start_date)
+# Rolling window for the risk panels
+window = st.sidebar.selectbox("Rolling Window (months)", WINDOWS, index=0)
+timer.first_render()
+
+# Generate data (cached on the start date, so widget reruns are cache hits). The history
+# starts max(WINDOWS) months early so every window has a full warm-up before the start date.
+start = pd.Timestamp(start_date)
+months = max(1, (pd.Timestamp.now().year - start.year) * 12 + pd.Timestamp.now().month - start.month)
+history = cached(generate_data.generate_performance_data)(start - pd.DateOffset(months=max(WINDOWS)),
+                                                          periods=months + max(WINDOWS))
+metrics = cached(rolling_risk_metrics)(history['Fund'].to_numpy(), history['Index'].to_numpy(), window)
+visible = (history['Date'] >= start).to_numpy()
+df = history[visible].reset_index(drop=True)
 
 # Display the chart
 fig = plot_performance_comparison(df)
 st.plotly_chart(fig, use_container_width=True)
 
+# Rolling risk panels
+st.subheader(f"Rolling Risk Metrics ({window}-month window)")
+dates = df['Date']
+panel = {name: values[visible] for name, values in metrics.items()}
+left, right = st.columns(2)
+left.plotly_chart(plot_metric_panel(dates, {'Beta': panel['beta'], 'Correlation': panel['correlation']},
+                                    'Beta and Correlation'), use_container_width=True)
+right.plotly_chart(plot_metric_panel(dates, {'Alpha': panel['alpha'], 'Tracking Error': panel['tracking_error']},
+                                     'Annualised Alpha and Tracking Error', percent=True), use_container_width=True)
+left, right = st.columns(2)
+left.plotly_chart(plot_metric_panel(dates, {'Information Ratio': panel['information_ratio'], 'Sharpe': panel['sharpe']},
+                                    'Information and Sharpe Ratios'), use_container_width=True)
+right.plotly_chart(plot_metric_panel(dates, {'Drawdown': panel['drawdown'], 'Max Drawdown': panel['max_drawdown']},
+                                     'Fund Drawdown', percent=True), use_container_width=True)
+
 # Optional: Display the data
 if st.checkbox("Show raw data"):
     st.dataframe(df)
+
+timer.finish()
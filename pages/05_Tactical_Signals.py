@@ -0,0 +1,139 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from utils.cache import cached
+from utils.instrument import span
+from utils.startup import lazy_import, start_page_timer
+
+backtest = lazy_import('utils.backtest')
+market_model = lazy_import('utils.market_model')
+market_store = lazy_import('utils.market_store')
+signals = lazy_import('utils.signals')
+go = lazy_import('plotly.graph_objects')
+
+SIGNAL_NAMES = {'Momentum (12-1)': 'momentum', 'Moving-Average Crossover': 'ma_crossover',
+                'Trend Filter': 'trend_filter'}
+REBALANCE = {'Weekly': 5, 'Monthly': 21, 'Quarterly': 63}
+
+# Set page config
+st.set_page_config(page_title="Tactical Signals", page_icon="🧭", layout="wide")
+timer = start_page_timer(__file__)
+
+st.title("🧭 Tactical Allocation Signals")
+st.markdown("### Signal-Driven Rebalancing on Simulated Assets")
+
+# Sidebar controls
+st.sidebar.header("Universe")
+num_assets = st.sidebar.select_slider("Number of Assets", options=[100, 500, 1000, 2000, 3000], value=500)
+years = st.sidebar.slider("History (years)", 2, 20, 10)
+seed = st.sidebar.number_input("Random Seed", min_value=0, value=42, step=1)
+
+st.sidebar.header("Signal")
+signal_label = st.sidebar.selectbox("Ranking Signal", list(SIGNAL_NAMES))
+signal = SIGNAL_NAMES[signal_label]
+params = {}
+if signal == 'momentum':
+    params['lookback'] = st.sidebar.slider("Lookback (days)", 63, 504, 252, step=21)
+    params['skip'] = st.sidebar.slider("Skip Recent (days)", 0, 42, 21, step=1)
+elif signal == 'ma_crossover':
+    params['fast'] = st.sidebar.slider("Fast Average (days)", 10, 100, 50, step=5)
+    params['slow'] = st.sidebar.slider("Slow Average (days)", 120, 300, 200, step=10)
+else:
+    params['window'] = st.sidebar.slider("Moving Average (days)", 50, 300, 200, step=10)
+top_fraction = st.sidebar.slider("Fraction of Universe Held", 0.05, 1.0,
+                                 1.0 if signal == 'trend_filter' else 0.2, step=0.05)
+
+st.sidebar.header("Overlays")
+trend_window = None
+if signal != 'trend_filter' and st.sidebar.checkbox("Trend Filter", value=True):
+    trend_window = st.sidebar.slider("Trend Window (days)", 50, 300, 200, step=10)
+vol_target = None
+if st.sidebar.checkbox("Volatility Targeting", value=False):
+    vol_target = st.sidebar.slider("Target Volatility per Position (%)", 5, 40, 15, step=5) / 100
+
+st.sidebar.header("Trading")
+rebalance = st.sidebar.selectbox("Rebalance", list(REBALANCE), index=1)
+cost_bps = st.sidebar.slider("Transaction Cost (bp)", 0, 50, 10, step=5)
+timer.first_render()
+
+# Shared read-only return matrix: sessions lease one memory-mapped copy per machine
+generate = market_store.shared(market_model.generate_market_returns)
+st.session_state.signal_returns_lease = generate(years * signals.TRADING_DAYS, num_assets, seed=int(seed))
+returns = st.session_state.signal_returns_lease.value['returns']
+every = REBALANCE[rebalance]
+
+result, weights = cached(signals.tactical_backtest)(returns, signal, every, cost_bps, top_fraction=top_fraction,
+                                                    trend_window=trend_window, vol_target=vol_target, **params)
+benchmark = cached(backtest.run_backtest)(returns, np.full(num_assets, 1.0 / num_assets), rebalance_every=every,
+                                          cost_bps=cost_bps)
+summary = pd.concat([backtest.summarize_backtest(result), backtest.summarize_backtest(benchmark)], ignore_index=True)
+summary.insert(0, 'strategy', [signal_label, 'Equal Weight'])
+
+with span('figure.tactical'):
+    days = np.arange(1, len(returns) + 1) / signals.TRADING_DAYS
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(x=days, y=result.values[0], mode='lines', name=signal_label,
+                               line=dict(color='rgb(26, 118, 255)', width=2)))
+    fig.add_trace(go.Scattergl(x=days, y=benchmark.values[0], mode='lines', name='Equal Weight',
+                               line=dict(color='grey', width=1.5)))
+    fig.update_layout(
+        title='Growth of $1',
+        xaxis_title='Years',
+        yaxis_title='Portfolio Value ($)',
+        template='plotly_white',
+        height=500,
+    )
+st.plotly_chart(fig, use_container_width=True)
+
+st.dataframe(
+    summary,
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        'final_value': st.column_config.NumberColumn("Final Value", format="$%.2f"),
+        'cagr': st.column_config.NumberColumn("CAGR", format="percent"),
+        'volatility': st.column_config.NumberColumn("Volatility", format="percent"),
+        'sharpe': st.column_config.NumberColumn("Sharpe", format="%.2f"),
+        'max_drawdown': st.column_config.NumberColumn("Max Drawdown", format="percent"),
+        'turnover': st.column_config.NumberColumn("Turnover", format="%.1f"),
+        'costs': st.column_config.NumberColumn("Costs", format="$%.4f"),
+        'rebalances': st.column_config.NumberColumn("Rebalances"),
+    }
+)
+
+# Exposure and holdings chosen on the rebalance dates
+left, right = st.columns(2)
+with left:
+    st.markdown("#### Invested Fraction and Holdings")
+    decisions = pd.DataFrame({
+        'Invested': weights.sum(axis=1),
+        'Holdings': (weights > 0).sum(axis=1) / num_assets,
+    }, index=pd.Index((np.arange(len(weights)) + 1) * every / signals.TRADING_DAYS, name='Years'))
+    st.line_chart(decisions)
+with right:
+    st.markdown("#### Latest Target Weights")
+    latest = pd.Series(weights[-1], index=[f'Asset {i}' for i in range(num_assets)])
+    top = latest[latest > 0].sort_values(ascending=False).head(15)
+    st.dataframe(
+        pd.DataFrame({'Weight': top}),
+        use_container_width=True,
+        column_config={'Weight': st.column_config.NumberColumn(format="percent")},
+    )
+    st.caption(f"Cash: {1 - weights[-1].sum():.1%}")
+
+st.markdown(f"""
+### How the Signals Work
+
+Signals are computed for every asset and every day in one pass over the {len(returns):,} x {num_assets:,}
+return matrix: each trailing window is the difference of two rows of a cumulative sum, so the cost does not
+depend on the lookback. On each rebalance date the highest-ranked assets each get an equal slot; slots that
+no asset qualifies for (negative score, or below its moving average with the trend filter on) are held in
+cash, and volatility targeting shrinks positions in volatile assets. The portfolio trades into the new
+weights at that day's close.
+
+Run the same engine without the page: `python -m utils.signals --num-assets 3000 --years 20`.
+
+*Note: Returns are generated by a factor model and are for demonstration purposes only.*
+""")
+
+timer.finish()
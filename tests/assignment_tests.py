@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from utils.assignment import solve_assignment, solve_lagrangian_heuristic, solve_min_cost_flow
+from utils.generate_data import generate_allocation_data
+
+def _feasible_instance(num_resources=8, num_tasks=60, seed=7):
+    costs, capacity, requirements = generate_allocation_data(num_resources, num_tasks, seed=seed)
+    capacity = np.ceil(capacity / capacity.sum() * requirements.sum() * 1.1).astype(int)
+    return costs, capacity, requirements
+
+def _brute_force_cost(costs, capacity, requirements):
+    """Exhaustive optimum for unit requirements by trying every task-to-resource mapping."""
+    best = np.inf
+    num_resources, num_tasks = costs.shape
+    for mapping in np.ndindex(*([num_resources] * num_tasks)):
+        loads = np.bincount(mapping, minlength=num_resources)
+        if (loads <= capacity).all():
+            best = min(best, costs[list(mapping), np.arange(num_tasks)].sum())
+    return best
+
+def test_min_cost_flow_is_optimal():
+    """Test the exact solver against exhaustive search on small instances."""
+    rng = np.random.default_rng(3)
+    for _ in range(5):
+        costs = rng.integers(10, 100, size=(3, 5))
+        capacity = rng.integers(1, 4, size=3)
+        capacity[0] += max(0, 5 - capacity.sum())
+        requirements = np.ones(5)
+        result = solve_min_cost_flow(costs, capacity, requirements)
+
+        assert result.unmet_demand == 0, "Demand left unmet"
+        assert result.total_cost == _brute_force_cost(costs, capacity, requirements), "Solution not optimal"
+
+def test_flows_respect_constraints():
+    """Test that both solvers meet demand without exceeding capacity."""
+    costs, capacity, requirements = _feasible_instance()
+    for result in [solve_min_cost_flow(costs, capacity, requirements),
+                   solve_lagrangian_heuristic(costs, capacity, requirements)]:
+        assert np.allclose(result.flows.sum(axis=0), requirements), f"{result.method} misses demand"
+        assert (result.flows.sum(axis=1) <= capacity + 1e-9).all(), f"{result.method} exceeds capacity"
+        assert result.flows.min() >= 0, "Flows must be non-negative"
+        assert np.isclose(result.total_cost, (result.flows * costs).sum()), "Reported cost is wrong"
+
+def test_heuristic_gap_brackets_optimum():
+    """Test that the Lagrangian bound and heuristic cost bracket the exact optimum."""
+    costs, capacity, requirements = _feasible_instance()
+    exact = solve_min_cost_flow(costs, capacity, requirements)
+    heuristic = solve_lagrangian_heuristic(costs, capacity, requirements)
+
+    assert heuristic.lower_bound <= exact.total_cost + 1e-6, "Lower bound exceeds optimum"
+    assert heuristic.total_cost >= exact.total_cost - 1e-6, "Heuristic beats optimum"
+    assert 0 <= heuristic.gap < 0.05, "Heuristic gap too large"
+    assert heuristic.seconds > 0, "Wall time not reported"
+
+def test_sparse_flows_and_unmet_demand():
+    """Test sparse flow output and that shortfalls are reported when capacity runs out."""
+    costs, capacity, requirements = generate_allocation_data(3, 40, seed=1)
+    result = solve_lagrangian_heuristic(costs, capacity, requirements, dense_flows=False)
+
+    assert result.flows.shape[1] == 3, "Sparse flows must be (resource, task, amount) rows"
+    assert np.isclose(result.unmet_demand, requirements.sum() - capacity.sum()), "Unmet demand is wrong"
+    assert result.gap == np.inf, "Gap must be infinite for an infeasible allocation"
+
+def test_solve_assignment_dispatch():
+    """Test method selection and rejection of bad input."""
+    costs, capacity, requirements = _feasible_instance(num_resources=4, num_tasks=20)
+
+    assert solve_assignment(costs, capacity, requirements).method == 'min_cost_flow'
+    assert solve_assignment(costs, capacity, requirements, method='heuristic').method == 'lagrangian'
+    with pytest.raises(ValueError):
+        solve_assignment(costs, capacity, requirements, method='simplex')
+    with pytest.raises(ValueError):
+        solve_assignment(costs[:, :-1], capacity, requirements)
+    with pytest.raises(ValueError):
+        solve_lagrangian_heuristic(costs, capacity, requirements, max_iter=0)
+
+def test_empty_problems():
+    """Test that problems without resources or without tasks return an empty assignment."""
+    no_resources = solve_min_cost_flow(np.empty((0, 3)), np.empty(0), np.array([1.0, 2.0, 3.0]))
+    assert no_resources.flows.shape == (0, 3), "Flows should keep the cost matrix shape"
+    assert no_resources.unmet_demand == 6.0, "All demand should be unmet without resources"
+
+    no_tasks = solve_lagrangian_heuristic(np.empty((2, 0)), np.array([5.0, 5.0]), np.empty(0))
+    assert no_tasks.flows.shape == (2, 0) and no_tasks.total_cost == 0.0, "Nothing should be assigned"
+    assert no_tasks.unmet_demand == 0.0, "No tasks means no unmet demand"
+    for method in ('exact', 'heuristic'):
+        assert solve_assignment(np.empty((0, 0)), [], [], method=method).total_cost == 0.0, \
+            f"Empty {method} problem failed"
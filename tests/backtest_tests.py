@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from utils.backtest import (preset_weights, run_backtest, schedule_from_rebalances,
+                            strategy_grid, summarize_backtest)
+
+def _returns(num_periods=500, num_assets=3, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0.0004, 0.01, (num_periods, num_assets))
+
+def _reference_backtest(returns, weights, every, threshold, cost_bps):
+    """Straightforward single-strategy loop used as ground truth."""
+    holdings = weights.copy()
+    values = []
+    for t, period_returns in enumerate(returns):
+        holdings = holdings * (1 + period_returns)
+        value = holdings.sum()
+        drift = np.abs(holdings / value - weights).max()
+        if (every and (t + 1) % every == 0) or (threshold and drift > threshold):
+            value -= np.abs(weights * value - holdings).sum() * cost_bps / 10_000
+            holdings = weights * value
+        values.append(value)
+    return np.array(values)
+
+def test_matches_reference_loop():
+    """Test that the batched engine matches a per-strategy loop."""
+    returns = _returns()
+    weights = {'a': np.array([0.6, 0.3, 0.1]), 'b': np.array([0.2, 0.2, 0.6])}
+    params, kwargs = strategy_grid(weights, rebalance_every=[0, 21], thresholds=[0.0, 0.03], costs_bps=[0, 25])
+    result = run_backtest(returns, **kwargs)
+
+    assert result.values.shape == (len(params), len(returns)), "Values have incorrect shape"
+    for i, row in params.iterrows():
+        expected = _reference_backtest(returns, weights[row['strategy']], row['rebalance_every'],
+                                       row['threshold'], row['cost_bps'])
+        assert np.allclose(result.values[i], expected), f"Variant {i} differs from reference"
+
+def test_buy_and_hold_drifts():
+    """Test that a never-rebalanced portfolio drifts and pays no costs."""
+    returns = _returns()
+    weights = np.array([0.5, 0.3, 0.2])
+    result = run_backtest(returns, weights, cost_bps=50)
+    growth = np.prod(1 + returns, axis=0)
+
+    assert np.isclose(result.values[0, -1], weights @ growth), "Buy and hold value is wrong"
+    assert np.allclose(result.final_weights[0], weights * growth / (weights @ growth)), "Weights did not drift"
+    assert result.costs[0] == 0 and result.num_rebalances[0] == 0, "Buy and hold should not trade"
+
+def test_costs_reduce_value():
+    """Test that transaction costs are charged on rebalances."""
+    returns = _returns()
+    result = run_backtest(returns, np.array([0.4, 0.4, 0.2]), rebalance_every=21, cost_bps=[0, 100])
+
+    assert result.num_rebalances[0] == len(returns) // 21, "Calendar rebalances miscounted"
+    assert result.values[1, -1] < result.values[0, -1], "Costs did not reduce value"
+    assert result.costs[1] > 0 and result.turnover[1] > 0, "Costs or turnover not reported"
+
+def test_time_varying_schedule():
+    """Test that a forward-filled optimizer schedule switches targets on rebalance."""
+    returns = _returns(num_periods=100, num_assets=2)
+    schedule = schedule_from_rebalances([9, 49], np.array([[1.0, 0.0], [0.0, 1.0]]), len(returns))
+    result = run_backtest(returns, schedule, rebalance_every=50)
+
+    assert np.allclose(result.final_weights[0], [0.0, 1.0]), "Schedule targets not applied"
+
+def test_presets_and_summary():
+    """Test preset alignment and the summary table."""
+    assets = ['Bonds', 'Gold', 'US Stocks']
+    assert np.allclose(preset_weights('60/40', assets), [0.4, 0.0, 0.6]), "Preset misaligned"
+    with pytest.raises(ValueError):
+        preset_weights('All-Weather', assets)
+
+    result = run_backtest(_returns(), preset_weights('60/40', assets), rebalance_every=[21, 63])
+    summary = summarize_backtest(result)
+    assert len(summary) == 2, "Summary needs one row per variant"
+    assert (summary['max_drawdown'] <= 0).all(), "Drawdowns must be non-positive"
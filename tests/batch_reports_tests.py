@@ -0,0 +1,73 @@
+import os
+import tempfile
+import zipfile
+import numpy as np
+import pytest
+from utils.batch_reports import STAGES, generate_clients, load_clients, main, run_batch
+from utils.reports import fan_chart_svg, risk_profile
+
+def test_directory_output_and_resume():
+    """Test that reports land in a directory and a rerun skips finished ones."""
+    clients = generate_clients(12, seed=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'reports')
+        first = run_batch(clients.iloc[:8], output, fmt='html', num_scenarios=200)
+        os.unlink(os.path.join(output, 'C000003.html'))  # simulate a report lost in a crash
+        second = run_batch(clients, output, fmt='html', num_scenarios=200)
+
+        assert first['rendered'] == 8, "First run must render every client"
+        assert second['rendered'] == 5 and second['skipped'] == 7, "Resume redid finished reports"
+        assert len(os.listdir(output)) == 12, "Missing report files"
+        with open(os.path.join(output, 'C000003.html')) as f:
+            assert 'Client C000003' in f.read(), "Report content is wrong"
+        assert set(second['stages']) == set(STAGES), "Stage timings missing"
+
+def test_zip_output_with_workers():
+    """Test parallel rendering into a zip archive and resuming an archive."""
+    clients = generate_clients(20, seed=2)
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'reports.zip')
+        run_batch(clients.iloc[:15], output, fmt='html', num_workers=2, num_scenarios=200)
+        summary = run_batch(clients, output, fmt='html', num_workers=2, num_scenarios=200)
+
+        with zipfile.ZipFile(output) as archive:
+            names = archive.namelist()
+        assert summary['rendered'] == 5, "Packed reports were rendered again"
+        assert sorted(names) == sorted(f'{c}.html' for c in clients['client_id']), "Archive contents wrong"
+        assert not os.path.exists(output + '.parts'), "Staging directory was not removed"
+
+def test_cli_entry_point(capsys):
+    """Test the command line interface end to end."""
+    with tempfile.TemporaryDirectory() as tmp:
+        code = main(['--num-clients', '3', '--output', os.path.join(tmp, 'out'), '--format', 'html',
+                     '--workers', '1', '--scenarios', '100'])
+        assert code == 0 and len(os.listdir(os.path.join(tmp, 'out'))) == 3
+    assert 'render' in capsys.readouterr().out, "Stage timing table not printed"
+
+def test_unsafe_client_ids_rejected(tmp_path):
+    """Test that client ids which would escape the output directory are rejected when loaded."""
+    clients = generate_clients(3, seed=3)
+    clients.to_csv(tmp_path / 'good.csv', index=False)
+    assert load_clients(str(tmp_path / 'good.csv'))['client_id'].tolist() == clients['client_id'].tolist()
+
+    for client_id in ('../escape', 'a/b', '..', '.hidden', ''):
+        clients.loc[1, 'client_id'] = client_id
+        clients.to_csv(tmp_path / 'bad.csv', index=False)
+        with pytest.raises(ValueError):
+            load_clients(str(tmp_path / 'bad.csv'))
+        with pytest.raises(ValueError):
+            run_batch(clients, str(tmp_path / 'out'), fmt='html')
+    with pytest.raises(SystemExit):
+        main(['--clients', str(tmp_path / 'bad.csv'), '--output', str(tmp_path / 'out')])
+    assert not (tmp_path / 'escape.html').exists(), "A report escaped the output directory"
+
+    clients.loc[1, 'client_id'] = clients.loc[0, 'client_id']
+    with pytest.raises(ValueError, match='Duplicate'):
+        run_batch(clients, str(tmp_path / 'out'), fmt='html')
+
+def test_chart_and_risk_profile():
+    """Test the inline SVG chart and the risk level mapping."""
+    svg = fan_chart_svg(np.cumsum(np.ones((5, 12)), axis=1) * np.arange(1, 6)[:, None])
+
+    assert svg.startswith('<svg') and svg.count('<polygon') == 2, "Fan chart bands missing"
+    assert risk_profile(1) == (0.004, 0.02) and risk_profile(10) == (0.007, 0.04), "Risk endpoints wrong"
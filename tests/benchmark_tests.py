@@ -0,0 +1,60 @@
+import os
+import tempfile
+from utils.benchmark import (
+    Benchmark,
+    BenchmarkResult,
+    baseline_run,
+    compare_runs,
+    environment,
+    load_history,
+    run_benchmarks,
+    save_run,
+    time_callable
+)
+
+def test_time_callable():
+    """Test loop calibration and the reported statistics."""
+    stats = time_callable(lambda: sum(range(100)), repeat=3, min_time=0.001)
+
+    assert stats['loops'] > 1, "Fast callables should be looped"
+    assert 0 < stats['min'] <= stats['median'] <= max(stats['mean'], stats['median']) + stats['stdev'] + 1e-9, \
+        "Inconsistent statistics"
+
+def test_run_benchmarks_filter_and_sweep():
+    """Test that filtering and quick mode select the expected sizes."""
+    calls = []
+    benches = [
+        Benchmark('alpha', 'generate', 'n', (1, 2, 3), lambda n: lambda: calls.append(n)),
+        Benchmark('beta', 'page', 'n', (4, 5), lambda n: lambda: calls.append(n)),
+    ]
+    full = run_benchmarks(benches, pattern='generate', repeat=2, min_time=0.0)
+    quick = run_benchmarks(benches, quick=True, repeat=2, min_time=0.0)
+
+    assert [(r.name, r.size) for r in full] == [('alpha', 1), ('alpha', 2), ('alpha', 3)], "Filter ignored"
+    assert [(r.name, r.size) for r in quick] == [('alpha', 1), ('beta', 4)], "Quick mode should keep the smallest size"
+
+def test_real_benchmarks_quick():
+    """Test that every registered benchmark runs at its smallest size."""
+    results = run_benchmarks(pattern='generate_performance_data', quick=True, repeat=1, min_time=0.0)
+
+    assert len(results) == 1 and results[0].median > 0, "Benchmark did not run"
+
+def test_history_and_regressions():
+    """Test the JSON lines history round trip and regression flagging."""
+    env = environment()
+    fast = [BenchmarkResult('alpha', 'g', 'n', 10, 1, 3, 1.0, 1.0, 1.0, 0.0),
+            BenchmarkResult('beta', 'g', 'n', 10, 1, 3, 1.0, 1.0, 1.0, 0.0)]
+    slow = [BenchmarkResult('alpha', 'g', 'n', 10, 1, 3, 1.5, 1.5, 1.5, 0.0),
+            BenchmarkResult('beta', 'g', 'n', 10, 1, 3, 1.1, 1.1, 1.1, 0.0)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.jsonl')
+        save_run(fast, path, env)
+        save_run(slow, path, {**env, 'machine': 'elsewhere'})
+        history = load_history(path)
+
+    assert len(history) == 2, "Runs were not appended"
+    assert baseline_run(history, env) is history[0], "Baseline must come from the same machine"
+    table = compare_runs(history[0], history[1], threshold=0.2)
+    assert table.set_index('name')['regression'].to_dict() == {'alpha': True, 'beta': False}, \
+        "Regression threshold not applied"
+    assert load_history(os.path.join(tmp, 'missing.jsonl')) == [], "Missing history should be empty"
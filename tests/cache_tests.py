@@ -0,0 +1,81 @@
+import tempfile
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+from utils.cache import DiskCache, LRUCache, cached, estimate_nbytes, make_key
+from utils.generate_data import generate_heatmap_data, generate_performance_data
+from utils.optimize import FrontierResult
+
+def test_make_key_stable():
+    """Test that equal arguments map to equal keys and different ones do not."""
+    key = make_key('f', (date(2020, 1, 1),), {'seed': 42})
+
+    assert key == make_key('f', (date(2020, 1, 1),), {'seed': 42}), "Key is not deterministic"
+    assert key != make_key('f', (date(2020, 1, 2),), {'seed': 42}), "Different dates share a key"
+    assert key != make_key('g', (date(2020, 1, 1),), {'seed': 42}), "Different functions share a key"
+
+def test_lru_size_eviction():
+    """Test that the LRU evicts least recently used entries by size."""
+    cache = LRUCache(max_bytes=3 * 8000)
+    for name in 'abc':
+        cache.put(name, np.zeros(1000))
+    cache.get('a')
+    cache.put('d', np.zeros(1000))
+
+    assert 'a' in cache and 'd' in cache, "Recently used entries were evicted"
+    assert 'b' not in cache, "Least recently used entry was kept"
+    assert cache.current_bytes <= cache.max_bytes, "Cache exceeds its size budget"
+
+def test_cached_memory_hit():
+    """Test that repeated calls are served from the in-memory tier."""
+    memory = LRUCache()
+    wrapped = cached(generate_performance_data, memory=memory, use_disk=False)
+    first = wrapped(date(2020, 1, 1))
+    second = wrapped(date(2020, 1, 1))
+
+    assert first is second, "Second call was recomputed"
+    assert memory.hits == 1 and memory.misses == 1, "Unexpected hit/miss counts"
+
+def test_equivalent_calls_share_a_key():
+    """Test that positional, keyword and defaulted spellings of one call hit the same entry."""
+    calls = []
+
+    def simulate(mean, vol=0.1, *, seed=None):
+        calls.append((mean, vol, seed))
+        return np.array([mean, vol])
+
+    memory = LRUCache()
+    wrapped = cached(simulate, memory=memory, use_disk=False)
+    first = wrapped(0.05)
+    for spelling in (wrapped(mean=0.05), wrapped(0.05, 0.1), wrapped(0.05, vol=0.1, seed=None)):
+        assert spelling is first, "Equivalent call was recomputed"
+    assert wrapped.cache_key(0.05) == wrapped.cache_key(vol=0.1, mean=0.05), "cache_key ignores defaults"
+    assert wrapped(0.05, 0.2) is not first and len(calls) == 2, "Different arguments shared an entry"
+    with pytest.raises(TypeError):
+        wrapped(0.05, volatility=0.2)
+
+def test_disk_tier_shared():
+    """Test that a fresh memory tier is filled from the shared disk tier."""
+    with tempfile.TemporaryDirectory() as directory:
+        X, Y, Z = cached(generate_heatmap_data, memory=LRUCache(), disk=DiskCache(directory))(20, seed=42)
+        disk = DiskCache(directory)
+        restored = cached(generate_heatmap_data, memory=LRUCache(), disk=disk)(20, seed=42)
+
+        assert disk.hits == 1, "Value was not read from disk"
+        assert np.array_equal(restored[2], Z), "Disk round trip changed the data"
+        assert not restored[2].flags.writeable, "Cached arrays should be read-only"
+
+def test_dataclass_and_frame_results():
+    """Test that dataclass fields count towards the cache budget and cached values are read-only."""
+    weights = np.ones((200, 500))
+    result = FrontierResult(np.zeros(200), weights, np.zeros(200), np.zeros(200))
+    assert estimate_nbytes(result) >= weights.nbytes, "Dataclass fields not counted"
+
+    memory = LRUCache()
+    shared = cached(lambda: result, memory=memory, use_disk=False)()
+    assert not shared.weights.flags.writeable, "Dataclass fields not frozen"
+    frame = cached(lambda n: pd.DataFrame({'a': np.arange(float(n)), 'b': ['x'] * n}),
+                   memory=memory, use_disk=False)(3)
+    with pytest.raises(ValueError):
+        frame.iloc[0, 0] = 5.0
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from utils.charts import ChartData, lttb_indices, minmax_indices, visible_slice
+
+def test_lttb_keeps_shape():
+    """Test LTTB budget, endpoints and preservation of a single spike."""
+    y = np.sin(np.linspace(0, 20, 100_000))
+    y[54_321] = 5.0
+    kept = lttb_indices(y, 500)
+
+    assert len(kept) == 500 and kept[0] == 0 and kept[-1] == len(y) - 1, "Budget or endpoints wrong"
+    assert (np.diff(kept) > 0).all(), "Indices must be strictly increasing"
+    assert 54_321 in kept, "Spike was dropped"
+    assert np.array_equal(lttb_indices(y[:100], 500), np.arange(100)), "Short series should be untouched"
+
+def test_minmax_keeps_extremes_with_nans():
+    """Test that min-max downsampling keeps every bucket's extremes and skips NaNs."""
+    rng = np.random.default_rng(1)
+    y = np.cumsum(rng.normal(size=50_001))
+    y[:100] = np.nan
+    kept = minmax_indices(y, 1_000)
+
+    assert len(kept) <= 1_002, "Too many points kept"
+    assert np.nanmax(y[kept]) == np.nanmax(y) and np.nanmin(y[kept]) == np.nanmin(y), "Extremes lost"
+    assert np.isnan(y[kept]).sum() <= 1, "NaNs should only be kept at the first point"
+
+def test_chart_data_zoom_webgl_and_payload():
+    """Test zoom windows, the WebGL switch and payload accounting."""
+    dates = pd.bdate_range('1995-01-02', periods=7_560).to_numpy()
+    rng = np.random.default_rng(2)
+    chart = ChartData(max_points=1_000)
+    for i in range(10):
+        chart.add_line(dates, np.cumsum(rng.normal(size=len(dates))), name=f'series {i}')
+    fig = chart.figure(title='Long history')
+    stats = chart.stats(fig)
+
+    assert chart.webgl and fig.data[0].type == 'scattergl', "Large figures should use WebGL"
+    assert fig.layout.xaxis.type == 'date', "Epoch dates need a date axis"
+    assert stats.points_in == 75_600 and stats.points_out == 10_000, "Point counts wrong"
+    assert stats.payload_bytes < stats.full_payload_bytes and stats.savings > 0.8, "No payload savings"
+
+    zoom = ChartData(max_points=1_000, x_range=(pd.Timestamp('2000-01-01'), pd.Timestamp('2000-12-31')))
+    zoom.add_line(dates, np.arange(len(dates), dtype=float))
+    assert zoom.points_in == zoom.points_out < 270 and not zoom.webgl, "Zoomed window should be sent in full"
+    assert visible_slice(dates, None) == slice(0, len(dates)), "No zoom should keep everything"
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from utils.covariance import (EWMACovariance, FactorCovariance, LedoitWolfCovariance,
+                              covariance_from_batches, estimate_covariance)
+from utils.generate_data import generate_time_series_data, iter_time_series_batches
+from utils.optimize import iter_series_returns, series_to_returns
+
+def _returns(num_periods=300, num_assets=15, seed=0):
+    rng = np.random.default_rng(seed)
+    mixing = rng.normal(size=(num_assets, num_assets)) * 0.3
+    return rng.normal(0.001, 0.01, (num_periods, num_assets)) @ mixing
+
+def test_ledoit_wolf_matches_direct_formula():
+    """Test the incremental shrinkage intensity against the textbook computation."""
+    returns = _returns()
+    n, p = returns.shape
+    centered = returns - returns.mean(axis=0)
+    sample = centered.T @ centered / n
+    mu = np.trace(sample) / p
+    distance = np.sum((sample - mu * np.eye(p)) ** 2)
+    spread = sum(np.sum((np.outer(x, x) - sample) ** 2) for x in centered) / n ** 2
+    estimator = LedoitWolfCovariance(p)
+    for row in returns:
+        estimator.update(row)
+
+    assert np.isclose(estimator.shrinkage(), min(spread, distance) / distance), "Shrinkage differs"
+    assert np.allclose(estimator.sample_covariance(), np.cov(returns, rowvar=False)), "Sample covariance differs"
+
+def test_ledoit_wolf_rolling_window():
+    """Test that removing old observations equals estimating on the window alone."""
+    returns = _returns()
+    rolling = LedoitWolfCovariance(returns.shape[1]).update(returns[:200])
+    rolling.update(returns[200:]).remove(returns[:100])
+    window = LedoitWolfCovariance(returns.shape[1]).update(returns[100:])
+
+    assert rolling.count == 200, "Window count is wrong"
+    assert np.allclose(rolling.covariance(), window.covariance()), "Rolling estimate differs"
+
+def test_ewma_blocks_match_weights():
+    """Test block EWMA updates against explicit exponential weights."""
+    returns = _returns()
+    estimator = EWMACovariance(returns.shape[1], decay=0.94, demean=True)
+    estimator.update(returns[:120]).update(returns[120])
+    estimator.update(returns[121:])
+    weights = 0.94 ** np.arange(len(returns) - 1, -1, -1)
+    weights /= weights.sum()
+    mean = weights @ returns
+    expected = ((returns - mean).T * weights) @ (returns - mean)
+
+    assert np.allclose(estimator.covariance(), expected), "EWMA covariance differs"
+    with pytest.raises(ValueError):
+        EWMACovariance(3, decay=1.0)
+
+def test_factor_model_compact_updates():
+    """Test factor fit, exact variance tracking under updates and O(Nk) products."""
+    returns = _returns(num_assets=40)
+    model = FactorCovariance.fit(returns[:200], num_factors=5, decay=0.97)
+    assert np.allclose(model.variances(), returns[:200].var(axis=0, ddof=1)), "Fit must match sample variances"
+
+    expected = model.variances()
+    for row in returns[200:]:
+        expected = 0.97 * expected + 0.03 * row ** 2
+    model.update(returns[200:])
+    weights = np.full(40, 1 / 40)
+
+    assert model.loadings.shape == (40, 5), "Loadings must stay rank k"
+    assert np.allclose(model.variances(), expected), "Variances not tracked exactly"
+    assert np.allclose(model.matvec(weights), model.covariance() @ weights), "matvec differs from dense"
+    assert np.isclose(model.portfolio_variance(weights), weights @ model.covariance() @ weights)
+    assert model.nbytes == 40 * 6 * 8, "Factor model is not stored compactly"
+
+def test_estimators_on_generated_series():
+    """Test streamed generated series feed estimators like the in-memory path."""
+    returns = series_to_returns(generate_time_series_data(num_days=400, num_series=8, seed=1))
+    for method in ['sample', 'ledoit_wolf', 'ewma', 'factor']:
+        cov = estimate_covariance(returns, method, num_factors=3)
+        assert cov.shape == (8, 8), f"{method} has incorrect shape"
+        assert np.linalg.eigvalsh(cov).min() > -1e-12, f"{method} is not positive semidefinite"
+
+    batches = list(iter_time_series_batches(num_days=1000, num_series=8, batch_size=128, seed=3))
+    streamed = covariance_from_batches(iter_series_returns(batches), LedoitWolfCovariance(8))
+    levels = {f'series_{i}': np.concatenate([batch[f'series_{i}'] for batch in batches]) for i in range(8)}
+    full = series_to_returns(levels)
+    assert streamed.count == 999, "Streaming lost observations across batch boundaries"
+    assert np.allclose(streamed.mean, full.mean(axis=0)), "Streamed mean differs"
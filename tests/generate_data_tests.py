@@ -1,10 +1,12 @@
 import os
-import json
 import numpy as np
+from utils.snapshot import SUFFIX, save_snapshot
 from utils.generate_data import (
     generate_allocation_data,
     generate_heatmap_data,
-    generate_time_series_data
+    generate_time_series_data,
+    generate_performance_data,
+    iter_time_series_batches
 )
 
 def test_allocation_data():
@@ -52,23 +54,49 @@ def test_time_series_data():
     
     return time_series
 
+def test_performance_data():
+    """Test fund vs index performance data generation."""
+    df = generate_performance_data('2020-01-01', periods=12, seed=42)
+
+    # Basic validation
+    assert len(df) == 12, "Incorrect number of periods"
+    assert list(df.columns) == ['Date', 'Fund', 'Index'], "Unexpected columns"
+    assert df['Date'].is_monotonic_increasing, "Dates are not ordered"
+
+    return df
+
+def test_time_series_batches():
+    """Test streamed record batches against their concatenation."""
+    batches = list(iter_time_series_batches(num_days=1000, num_series=4, batch_size=300, seed=42))
+    dates = np.concatenate([batch['dates'] for batch in batches])
+    values = np.column_stack([np.concatenate([batch[f'series_{i}'] for batch in batches]) for i in range(4)])
+
+    # Basic validation
+    assert [len(batch['dates']) for batch in batches] == [300, 300, 300, 100], "Incorrect batch sizes"
+    assert dates.dtype == np.dtype('datetime64[D]'), "Dates are not datetime64"
+    assert (np.diff(dates) == np.timedelta64(1, 'D')).all(), "Dates are not consecutive"
+    assert values.dtype == np.float64, "Values are not float64"
+    assert np.allclose(values.min(axis=0), 0), "Series are not shifted to zero"
+
+    repeat = list(iter_time_series_batches(num_days=1000, num_series=4, batch_size=300, seed=42))
+    assert np.array_equal(repeat[-1]['series_2'], batches[-1]['series_2']), "Seeded batches not reproducible"
+
 def run_all_tests():
-    """Run all tests and save results to JSON files."""
+    """Run all tests and save results as binary snapshots."""
     # Create test-data directory if it doesn't exist
     os.makedirs('test-data', exist_ok=True)
     
     # Run tests and save results
     test_results = {
-        'allocation_test.json': test_allocation_data(),
-        'heatmap_test.json': test_heatmap_data(),
-        'time_series_test.json': test_time_series_data()
+        'allocation_test': test_allocation_data(),
+        'heatmap_test': test_heatmap_data(),
+        'time_series_test': test_time_series_data()
     }
     
     # Save all test results
-    for filename, data in test_results.items():
-        filepath = os.path.join('test-data', filename)
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+    for name, data in test_results.items():
+        filepath = os.path.join('test-data', name + SUFFIX)
+        save_snapshot(filepath, data)
         print(f"Test results saved to {filepath}")
 
 if __name__ == "__main__":
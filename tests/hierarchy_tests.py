@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils.generate_data import generate_holdings_data
+from utils.hierarchy import FenwickTree, HoldingsIndex, MaxSegmentTree
+
+LEVELS = ['Asset_Class', 'Sector', 'Sub_Industry', 'Fund']
+
+def _book(num_positions=5_000, seed=0):
+    book = generate_holdings_data(num_positions, seed=seed)
+    book['Asset_Class'] = np.where(book['Sector'].isin(['Real Estate', 'Utilities']), 'Real Assets', 'Equity')
+    return book
+
+def _expected(book, by):
+    grouped = book.assign(weighted=book['Market_Value'] * book['Daily_Return']).groupby(by, observed=True)
+    totals = grouped[['Market_Value', 'weighted']].sum()
+    totals['Daily_Return'] = totals['weighted'] / totals['Market_Value']
+    return totals
+
+def test_fenwick_and_segment_tree_match_brute_force():
+    """Test range sums, point updates and top-k retrieval against direct computation."""
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=1_000)
+    fenwick, segments = FenwickTree(values), MaxSegmentTree(values)
+    changed = rng.integers(0, 1_000, 50)
+    delta = rng.normal(size=50)
+    fenwick.add(changed, delta)
+    np.add.at(values, changed, delta)
+    unique = np.unique(changed)
+    segments.set(unique, values[unique])
+
+    starts, ends = np.array([0, 17, 500]), np.array([1_000, 400, 501])
+    expected = [values[s:e].sum() for s, e in zip(starts, ends)]
+    assert np.allclose(fenwick.range_sum(starts, ends), expected), "Range sums differ"
+    top = segments.top_k(17, 400, 5)
+    assert np.array_equal(top, 17 + np.argsort(-values[17:400])[:5]), "Top-k entries differ"
+
+def test_totals_match_groupby():
+    """Test subtree, level and child totals on a four-level book against pandas groupby."""
+    book = _book()
+    index = HoldingsIndex(book, LEVELS)
+    expected = _expected(book, ['Asset_Class', 'Sector'])
+
+    node = index.subtree(('Equity', 'Technology'))
+    assert np.isclose(node['Market_Value'], expected.loc[('Equity', 'Technology'), 'Market_Value']), \
+        "Subtree value differs"
+    assert np.isclose(node['Daily_Return'], expected.loc[('Equity', 'Technology'), 'Daily_Return']), \
+        "Subtree return differs"
+    assert index.subtree('Equity/Technology')['Positions'] == (book['Sector'] == 'Technology').sum(), \
+        "Position count differs"
+
+    level = index.level_frame(2).set_index(['Asset_Class', 'Sector'])
+    assert np.allclose(level['Market_Value'], expected['Market_Value'].loc[level.index]), "Level totals differ"
+    assert np.isclose(level['Percentage'].sum(), 100.0), "Level shares should add up to the book"
+
+    children = index.children('Equity/Technology')
+    assert set(children['Sub_Industry']) == set(book.loc[book['Sector'] == 'Technology', 'Sub_Industry']), \
+        "Children differ"
+    assert np.isclose(children['Market_Value'].sum(), node['Market_Value']), "Children should add up to parent"
+
+def test_updates_match_rebuilt_index():
+    """Test that batched O(log n) updates, closes and duplicates agree with an index built from scratch."""
+    book = _book()
+    index = HoldingsIndex(book, LEVELS)
+    rng = np.random.default_rng(2)
+    positions = rng.choice(book['Position'], 300)
+    values = rng.lognormal(11, 1, 300)
+    values[:20] = 0.0
+    returns = rng.normal(0, 2, 300)
+    index.update(positions, values, returns)
+    index.update(positions[-5:], daily_return=1.5)
+
+    updated = book.set_index('Position')
+    for position, value, ret in zip(positions, values, returns):
+        updated.loc[position, ['Market_Value', 'Daily_Return']] = [value, ret]
+    updated.loc[positions[-5:], 'Daily_Return'] = 1.5
+    rebuilt = HoldingsIndex(updated.reset_index(), LEVELS)
+
+    for depth in range(1, len(LEVELS) + 1):
+        got, expected = index.level_frame(depth), rebuilt.level_frame(depth)
+        assert np.allclose(got['Market_Value'], expected['Market_Value']), f"Values differ at depth {depth}"
+        assert np.allclose(got['Daily_Return'], expected['Daily_Return']), f"Returns differ at depth {depth}"
+        assert np.array_equal(got['Positions'], expected['Positions']), f"Counts differ at depth {depth}"
+    assert index.top_k(k=10)['Position'].equals(rebuilt.top_k(k=10)['Position']), \
+        "Top positions differ after updates"
+
+def test_full_update_rebuilds_totals():
+    """Test that updating the whole book goes through the periodic rebuild and stays exact."""
+    book = _book(1_000)
+    index = HoldingsIndex(book, LEVELS)
+    index.update(book['Position'], book['Market_Value'] * 2)
+
+    assert np.isclose(index.subtree()['Market_Value'], 2 * book['Market_Value'].sum()), "Book total differs"
+    assert index._updated == 0, "Totals should have been rebuilt"
+
+def test_top_k_contributors():
+    """Test the largest positions, contributors and detractors of a subtree against sorting."""
+    book = _book()
+    index = HoldingsIndex(book, LEVELS)
+    sector = book[book['Sector'] == 'Healthcare']
+    contribution = sector['Market_Value'] * sector['Daily_Return']
+
+    largest = index.top_k('Equity/Healthcare', 5, by='value')
+    assert list(largest['Position']) == list(sector.nlargest(5, 'Market_Value')['Position']), \
+        "Largest positions differ"
+    assert list(largest.columns[:2]) == ['Sub_Industry', 'Fund'], "Paths should start below the node"
+    top = index.top_k('Equity/Healthcare', 5, by='contribution')
+    assert list(top['Position']) == list(sector.loc[contribution.nlargest(5).index, 'Position']), \
+        "Top contributors differ"
+    assert np.isclose(top['Contribution'].iloc[0], contribution.max() / sector['Market_Value'].sum()), \
+        "Contribution should be in points of the subtree return"
+    bottom = index.top_k('Equity/Healthcare', 5, by='detraction')
+    assert list(bottom['Position']) == list(sector.loc[contribution.nsmallest(5).index, 'Position']), \
+        "Top detractors differ"
+
+def test_fund_children_and_breaches():
+    """Test that a fund's children are its open positions and exposure limits flag large nodes."""
+    book = _book()
+    index = HoldingsIndex(book, LEVELS)
+    path = tuple(index.level_frame(4).iloc[0][LEVELS])
+    fund_positions = book.loc[book['Fund'] == path[-1], 'Position']
+    index.update(fund_positions.iloc[:1], 0.0)
+
+    children = index.children(path)
+    assert set(children['Position']) == set(fund_positions.iloc[1:]), "Closed position should be dropped"
+    breaches = index.exposure_breaches(2, 10.0)
+    assert (breaches['Percentage'] > 10.0).all() and breaches['Percentage'].is_monotonic_decreasing, \
+        "Breaches not filtered or sorted"
+
+def test_invalid_lookups():
+    """Test that unknown nodes and positions are rejected."""
+    index = HoldingsIndex(_book(500), LEVELS)
+    with pytest.raises(KeyError):
+        index.subtree('Equity/Nonexistent')
+    with pytest.raises(KeyError):
+        index.update([10**9], 1.0)
+    with pytest.raises(ValueError):
+        HoldingsIndex(pd.concat([_book(10), _book(10)]), LEVELS)
@@ -0,0 +1,104 @@
+import json
+import time
+import urllib.request
+import numpy as np
+import pytest
+from utils import instrument
+from utils.generate_data import generate_heatmap_data
+from utils.instrument import Registry, instrumented, span, to_json, to_prometheus
+
+def test_disabled_records_nothing():
+    """Test that disabled instrumentation passes calls straight through."""
+    instrument.disable()
+    registry = instrument.get_registry()
+    registry.clear()
+    X, _, _ = generate_heatmap_data(num_points=10, seed=1)
+
+    assert X.shape == (10, 10), "Decorated function changed its result"
+    assert registry.snapshot() == {}, "Spans recorded while disabled"
+
+def test_spans_and_percentiles():
+    """Test wall, CPU and nested peak allocation recording."""
+    registry = Registry(window=8)
+    instrument.enable(track_memory=True)
+    try:
+        with span('outer', registry):
+            with span('inner', registry):
+                block = np.ones(2_000_000)
+                del block
+            time.sleep(0.01)
+        for _ in range(10):
+            with span('loop', registry):
+                pass
+    finally:
+        instrument.disable()
+    snapshot = registry.snapshot()
+
+    assert list(snapshot) == ['inner', 'loop', 'outer'], "Spans missing"
+    assert snapshot['inner']['peak_bytes']['max'] >= 16e6, "Inner peak allocation not captured"
+    assert snapshot['outer']['peak_bytes']['max'] >= 16e6, "Outer span should include nested peaks"
+    assert snapshot['outer']['wall']['p50'] >= 0.01 > snapshot['outer']['cpu']['p50'], "Sleep is wall, not CPU"
+    assert snapshot['loop']['count'] == 10 and len(registry._spans['loop'].samples) == 8, "Window not bounded"
+
+def test_decorator_and_exports():
+    """Test the decorator names and the Prometheus and JSON exports."""
+    registry = instrument.get_registry()
+    registry.clear()
+
+    @instrumented
+    def work():
+        return 1
+
+    @instrumented('custom.name')
+    def other():
+        return 2
+
+    instrument.enable()
+    try:
+        assert work() + other() == 3, "Decorated functions changed their results"
+        generate_heatmap_data(num_points=10, seed=1)
+    finally:
+        instrument.disable()
+    text = to_prometheus()
+    data = json.loads(to_json())
+
+    assert 'utils.generate_data.generate_heatmap_data' in data['spans'], "Data generation not instrumented"
+    assert 'custom.name' in data['spans'] and any(name.endswith('.work') for name in data['spans']), "Names wrong"
+    assert '# TYPE portfolio_span_wall_seconds summary' in text, "Missing metric family"
+    assert 'portfolio_span_wall_seconds_count{span="custom.name"} 1' in text, "Missing count sample"
+    registry.clear()
+
+def test_metrics_endpoint():
+    """Test the local HTTP endpoint."""
+    registry = instrument.get_registry()
+    registry.clear()
+    registry.record('endpoint.test', 0.5, 0.25)
+    server = instrument.serve_metrics(port=0)
+    try:
+        host, port = instrument.metrics_address()
+        with urllib.request.urlopen(f'http://{host}:{port}/metrics') as response:
+            text = response.read().decode()
+        with urllib.request.urlopen(f'http://{host}:{port}/metrics.json') as response:
+            data = json.loads(response.read())
+    finally:
+        instrument.stop_metrics()
+        registry.clear()
+
+    assert server is not None and 'span="endpoint.test"' in text, "Prometheus endpoint missing span"
+    assert data['spans']['endpoint.test']['wall']['p50'] == 0.5, "JSON endpoint wrong"
+
+def test_metrics_port_taken(monkeypatch):
+    """Test that a second process's endpoint warns on a taken port instead of raising."""
+    taken = instrument.serve_metrics(port=0)
+    monkeypatch.setattr(instrument, '_server', None)
+    monkeypatch.setattr(instrument, '_serve_failed', False)
+    monkeypatch.setenv(instrument.METRICS_PORT_ENV, str(taken.server_address[1]))
+    instrument.enable()
+    try:
+        with pytest.warns(RuntimeWarning):
+            assert instrument.serve_metrics_from_env() is None, "Endpoint claimed a taken port"
+        assert instrument.serve_metrics_from_env() is None, "Failed start should not be retried"
+    finally:
+        instrument.disable()
+        taken.shutdown()
+        taken.server_close()
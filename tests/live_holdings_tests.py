@@ -0,0 +1,184 @@
+import os
+import socket
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.generate_data import generate_holdings_data
+from utils.live_holdings import (
+    FileDropSource,
+    IngestionPipeline,
+    LiveHoldings,
+    LiveTreemap,
+    SocketSource,
+    send_messages,
+    simulate_updates,
+    write_drop
+)
+from utils.treemap import build_treemap
+
+def _book():
+    return pd.DataFrame({
+        'Sector': ['A', 'A', 'A', 'B'],
+        'Sub_Industry': ['x', 'x', 'y', 'z'],
+        'Fund': ['f1', 'f1', 'f2', 'f3'],
+        'Position': [0, 1, 2, 3],
+        'Market_Value': [100.0, 300.0, 100.0, 50.0],
+        'Daily_Return': [1.0, 2.0, -1.0, 4.0],
+    })
+
+def _assert_matches_rebuild(holdings):
+    positions = holdings.positions_frame()
+    assert np.isclose(holdings.total, positions['Market_Value'].sum()), "Book total drifted"
+    for depth in range(1, 4):
+        expected = build_treemap(positions, max_nodes=10**6)
+        expected = expected[expected['depth'] == depth].set_index('id').sort_index()
+        frame = holdings.level_frame(depth)
+        frame.index = frame[holdings.levels[:depth]].astype(str).agg('/'.join, axis=1)
+        frame = frame.sort_index()
+        assert list(frame.index) == list(expected.index), f"Depth {depth} nodes differ"
+        assert np.allclose(frame['Market_Value'], expected['value']), f"Depth {depth} values differ"
+        assert np.allclose(frame['Daily_Return'], expected['color']), f"Depth {depth} returns differ"
+        assert np.array_equal(frame['Positions'], expected['count']), f"Depth {depth} counts differ"
+
+def test_price_tick_closed_form():
+    """Test that a fund price tick reprices its positions and compounds their returns."""
+    holdings = LiveHoldings(_book())
+    holdings.apply({'type': 'price', 'fund': 'f1', 'change': 10.0})
+    positions = holdings.positions_frame().set_index('Position')
+
+    assert np.allclose(positions.loc[[0, 1], 'Market_Value'], [110.0, 330.0]), "Values not repriced"
+    assert np.allclose(positions.loc[[0, 1], 'Daily_Return'], [11.1, 12.2]), "Returns not compounded"
+    assert np.isclose(positions.loc[2, 'Market_Value'], 100.0), "Other funds changed"
+    _assert_matches_rebuild(holdings)
+
+def test_total_loss_tick_rejected():
+    """Test that a -100% price tick is rejected instead of zeroing the fund's price factor."""
+    holdings = LiveHoldings(_book())
+    for change in (-100.0, -150.0, float('nan')):
+        with pytest.raises(ValueError):
+            holdings.apply({'type': 'price', 'fund': 'f1', 'change': change})
+    holdings.apply({'type': 'position', 'position': 0, 'market_value': 50.0})
+    positions = holdings.positions_frame().set_index('Position')
+
+    assert np.isclose(positions.loc[0, 'Market_Value'], 50.0), "Position not repriced after the rejected ticks"
+    _assert_matches_rebuild(holdings)
+
+def test_position_updates_and_new_funds():
+    """Test revaluing, moving, adding and closing positions against a full rebuild."""
+    holdings = LiveHoldings(_book())
+    holdings.apply({'type': 'price', 'fund': 'f2', 'change': -5.0})
+    holdings.apply({'type': 'position', 'position': 2, 'market_value': 200.0, 'daily_return': 3.0})
+    holdings.apply({'type': 'position', 'position': 0, 'market_value': 120.0, 'fund': 'f3'})
+    holdings.apply({'type': 'position', 'position': 'new', 'market_value': 80.0, 'daily_return': -2.0,
+                    'fund': 'f4', 'sector': 'C', 'sub_industry': 'w'})
+    holdings.apply({'type': 'position', 'position': 3, 'market_value': 0})
+
+    positions = holdings.positions_frame().set_index('Position')
+    assert np.isclose(positions.loc[2, 'Daily_Return'], 3.0), "Position return not set"
+    assert positions.loc[0, 'Fund'] == 'f3', "Position did not move fund"
+    assert 3 not in positions.index, "Closed position still open"
+    assert 'C' in set(holdings.level_frame(1)['Sector']), "New sector missing"
+    _assert_matches_rebuild(holdings)
+
+    with pytest.raises(ValueError):
+        holdings.apply({'type': 'position', 'position': 'orphan', 'market_value': 10.0, 'fund': 'f9'})
+    with pytest.raises(KeyError):
+        holdings.apply({'type': 'price', 'fund': 'missing', 'change': 1.0})
+    _assert_matches_rebuild(holdings)
+
+def test_simulated_feed_matches_rebuild():
+    """Test thousands of random updates on a generated book against a full rebuild."""
+    df = generate_holdings_data(5_000, seed=3)
+    holdings = LiveHoldings(df)
+    for message in simulate_updates(df['Fund'].cat.categories.tolist(), df['Position'].tolist(), 3_000, seed=4):
+        holdings.apply(message)
+    _assert_matches_rebuild(holdings)
+
+def test_treemap_reports_only_changed_nodes():
+    """Test that the live treemap patches only touched nodes and stays consistent."""
+    df = generate_holdings_data(20_000, seed=1)
+    holdings = LiveHoldings(df)
+    tree = LiveTreemap(holdings, max_nodes=400)
+    assert len(tree) <= 400, "Live treemap exceeds its node budget"
+    assert tree.update().empty, "Nothing changed yet"
+
+    fund = df['Fund'].iloc[0]
+    holdings.apply({'type': 'price', 'fund': fund, 'change': 2.0})
+    changed = tree.update()
+    assert len(changed) == 3, "A fund tick should touch its sector, sub-industry and fund (or Other) box"
+    assert changed['id'].iloc[0] == str(df['Sector'].iloc[0]), "Sector box missing from the patch"
+
+    full = tree.frame().set_index('id')
+    for depth in (1, 2, 3):
+        level = full[full['depth'] == depth]
+        assert np.isclose(level['value'].sum(), holdings.total), f"Depth {depth} loses value"
+    rebuilt = LiveTreemap(holdings, max_nodes=400).frame().set_index('id')
+    common = full.index.intersection(rebuilt.index)
+    assert np.allclose(full.loc[common, 'value'], rebuilt.loc[common, 'value']), "Patched values drifted"
+
+def test_file_drop_source(tmp_path):
+    """Test that drop files and appended lines are read once and partial lines wait."""
+    source = FileDropSource(str(tmp_path))
+    write_drop(str(tmp_path), [{'type': 'price', 'fund': 'f1', 'change': 1.0}])
+    assert len(source.poll()) == 1, "Dropped file not read"
+    assert source.poll() == [], "File read twice"
+
+    path = tmp_path / 'feed.jsonl'
+    path.write_text('{"type": "price", "fund": "f1", "change": 1.0}\n{"type": "pri')
+    assert len(source.poll()) == 1, "Complete line not read"
+    with open(path, 'a') as f:
+        f.write('ce", "fund": "f2", "change": 2.0}\n')
+    assert source.poll() == [{'type': 'price', 'fund': 'f2', 'change': 2.0}], "Appended line not read"
+
+    consuming = FileDropSource(str(tmp_path / 'own'), consume=True)
+    written = write_drop(str(tmp_path / 'own'), [{'type': 'price', 'fund': 'f1', 'change': 1.0}])
+    assert len(consuming.poll()) == 1 and not os.path.exists(written), "Consumed file not deleted"
+
+def test_shared_directory_starts_at_end(tmp_path):
+    """Test that a new reader of a used shared directory skips history but reads what follows."""
+    old = write_drop(str(tmp_path), [{'type': 'price', 'fund': 'f1', 'change': 50.0}])
+    holdings = LiveHoldings(_book())
+    pipeline = IngestionPipeline(holdings, [FileDropSource(str(tmp_path))])
+    assert pipeline.pump().applied == 0, "Historical ticks replayed"
+    assert np.isclose(holdings.total, 550.0), "Book changed by old ticks"
+
+    with open(old, 'a') as f:
+        f.write('{"type": "price", "fund": "f3", "change": 10.0}\n')
+    write_drop(str(tmp_path), [{'type': 'price', 'fund': 'f3', 'change': 10.0}])
+    assert pipeline.pump().applied == 2, "Appended lines and new files not read"
+
+def test_malformed_lines_are_reported(tmp_path):
+    """Test that bad lines become errors without losing the valid messages around them."""
+    holdings = LiveHoldings(_book())
+    pipeline = IngestionPipeline(holdings, [FileDropSource(str(tmp_path))])
+    (tmp_path / 'feed.jsonl').write_text('{"type": "price", "fund": "f3", "change": 10.0}\nnot json\n[1]\n'
+                                         '{"type": "price", "fund": "f3", "change": 10.0}\n')
+    stats = pipeline.pump()
+    assert stats.applied == 2 and len(stats.errors) == 2, "Malformed lines not reported or valid ones lost"
+    assert np.isclose(holdings.total, 550.0 + 10.5), "Valid ticks not applied"
+    assert pipeline.pump().applied == 0, "Lines read twice"
+
+def test_pipeline_with_socket():
+    """Test socket ingestion and that bad messages are reported rather than raised."""
+    holdings = LiveHoldings(_book())
+    source = SocketSource()
+    try:
+        pipeline = IngestionPipeline(holdings, [source])
+        send_messages(source.address, [{'type': 'price', 'fund': 'f3', 'change': 10.0},
+                                       {'type': 'bogus'}])
+        with socket.create_connection(source.address) as conn:
+            conn.sendall(b'not json\n{"type": "price", "fund": "f3", "change": 0.0}\n')
+        deadline = time.time() + 5
+        applied, errors = 0, []
+        while applied + len(errors) < 4 and time.time() < deadline:
+            stats = pipeline.pump()
+            applied, errors = applied + stats.applied, errors + stats.errors
+            time.sleep(0.01)
+    finally:
+        source.close()
+
+    assert applied == 2 and len(errors) == 2, "Messages not ingested or errors not reported"
+    assert np.isclose(holdings.level_frame(1).set_index('Sector').loc['B', 'Market_Value'], 55.0)
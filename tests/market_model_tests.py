@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from utils.market_model import (
+    FactorModel,
+    Regime,
+    generate_correlated_returns,
+    generate_market_returns,
+    iter_correlated_returns,
+    simulate_regimes
+)
+
+
+def _target_correlation(n=8, rho=0.4):
+    corr = np.full((n, n), rho)
+    corr[:4, :4] = 0.7
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def test_cholesky_model_reproduces_correlation():
+    """Test that the full Cholesky model matches the target correlation exactly and in samples."""
+    corr = _target_correlation()
+    vols = np.linspace(0.01, 0.03, 8)
+    model = FactorModel.from_correlation(corr, vols)
+    assert model.num_factors == 8, "Cholesky model should have one factor per asset"
+    assert np.allclose(model.correlation(), corr), "Model correlation differs from target"
+
+    sample = generate_correlated_returns(model, 50_000, regimes=None, seed=1)['returns']
+    assert np.allclose(np.corrcoef(sample.T), corr, atol=0.02), "Sample correlation differs from target"
+    assert np.allclose(sample.std(axis=0), vols, rtol=0.02), "Sample volatilities differ from target"
+
+
+def test_truncated_factors_keep_variances():
+    """Test that dropping factors moves variance to the specific part without changing totals."""
+    corr = _target_correlation()
+    vols = np.full(8, 0.02)
+    model = FactorModel.from_correlation(corr, vols, num_factors=2)
+
+    assert model.loadings.shape == (8, 2), "Loadings have incorrect shape"
+    assert np.allclose(np.diag(model.covariance()), vols ** 2), "Asset variances not preserved"
+    assert np.allclose(model.correlation(), corr, atol=1e-3), "Two factors should capture the block structure"
+
+
+def test_student_t_tails():
+    """Test that t shocks keep unit variance but have fat tails."""
+    model = FactorModel(np.full((50, 1), 0.01), np.full(50, 0.01), np.zeros(50))
+    gaussian = generate_correlated_returns(model, 20_000, regimes=None, seed=3)['returns']
+    fat = generate_correlated_returns(model, 20_000, df=4.0, regimes=None, seed=3)['returns']
+
+    def kurtosis(x):
+        x = x - x.mean(axis=0)
+        return float(((x ** 4).mean(axis=0) / (x ** 2).mean(axis=0) ** 2).mean())
+
+    assert np.isclose(fat.std(), gaussian.std(), rtol=0.05), "t shocks changed the volatility"
+    assert kurtosis(fat) > kurtosis(gaussian) + 1.0, "t shocks are not fat tailed"
+    with pytest.raises(ValueError):
+        next(iter_correlated_returns(model, 10, df=2.0))
+
+
+def test_regime_switching():
+    """Test regime frequencies against the stationary distribution and the stressed volatility."""
+    states = simulate_regimes(np.array([[0.9, 0.1], [0.3, 0.7]]), 100_000, np.random.default_rng(0))
+    assert abs(states.mean() - 0.25) < 0.02, "Stressed share differs from the stationary distribution"
+
+    model = FactorModel(np.full((20, 1), 0.01), np.full(20, 0.005), np.zeros(20))
+    regimes = [Regime('Calm'), Regime('Stressed', factor_scale=3.0)]
+    result = generate_correlated_returns(model, 20_000, regimes=regimes,
+                                         transition=[[0.95, 0.05], [0.2, 0.8]], seed=5)
+    calm, stressed = (result['returns'][result['regime'] == r] for r in (0, 1))
+    assert stressed.std() > 2.0 * calm.std(), "Stressed regime is not more volatile"
+    assert (np.corrcoef(stressed.T).mean() > np.corrcoef(calm.T).mean()), "Correlation does not rise under stress"
+
+
+def test_batches_concatenate_to_matrix():
+    """Test that streamed blocks equal the materialised matrix and are bounded."""
+    model = FactorModel.random(30, 4, seed=2)
+    blocks = list(iter_correlated_returns(model, 250, batch_size=100, df=5.0, seed=9))
+    full = generate_correlated_returns(model, 250, batch_size=100, df=5.0, seed=9)
+
+    assert [len(b['regime']) for b in blocks] == [100, 100, 50], "Blocks have incorrect sizes"
+    assert np.array_equal(np.vstack([b['returns'] for b in blocks]), full['returns']), "Blocks differ"
+
+
+def test_market_returns_reproducible():
+    """Test shape and seed reproducibility of the load-testing universe."""
+    first = generate_market_returns(120, 200, seed=42)
+    second = generate_market_returns(120, 200, seed=42)
+
+    assert first['returns'].shape == (120, 200), "Returns have incorrect shape"
+    assert np.array_equal(first['returns'], second['returns']), "Same seed gave different returns"
+    assert np.corrcoef(first['returns'].T).mean() > 0.1, "Assets are not positively correlated"
+
+
+def test_returns_stay_above_total_loss():
+    """Test that fat-tailed, stressed returns at load-test scale never reach -100%."""
+    returns = generate_market_returns(5040, 3000, seed=1)['returns']
+    assert (returns > -1.0).all(), "Simple returns at or below -100%"
+    assert returns.min() < -0.3, "Crash days should still be severe"
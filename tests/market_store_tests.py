@@ -0,0 +1,103 @@
+import gc
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from utils.generate_data import generate_holdings_data
+from utils.market_store import MarketDataStore, shared
+
+def test_sessions_share_one_mapping(tmp_path):
+    """Test that leases of one version return the same read-only, memory-mapped arrays."""
+    store = MarketDataStore(str(tmp_path))
+    store.publish('returns', {'returns': np.arange(12.0).reshape(3, 4)})
+    first, second = store.acquire('returns'), store.acquire('returns')
+
+    assert first.value['returns'] is second.value['returns'], "Sessions received private copies"
+    assert not first.value['returns'].flags.writeable, "Shared data must be read-only"
+    assert not first.value['returns'].flags.owndata, "Data is not a view of the mapping"
+    assert store.refs('returns', 1) == 2, "Reference count is incorrect"
+    first.release()
+    first.release()
+    assert store.refs('returns', 1) == 1, "Double release changed the count"
+    with second:
+        pass
+    assert store.refs('returns', 1) == 0 and second.released, "Context manager did not release"
+
+def test_versions_and_pruning(tmp_path):
+    """Test that readers keep old versions while new ones are published and unused ones are pruned."""
+    store = MarketDataStore(str(tmp_path), keep_versions=1)
+    assert store.publish('book', np.zeros(3)) == 1
+    old = store.acquire('book')
+    assert store.publish('book', np.ones(3)) == 2
+    assert store.publish('book', np.full(3, 2.0)) == 3
+
+    assert store.versions('book') == [1, 3], "Leased version 1 pruned or version 2 kept"
+    assert np.array_equal(old.value, np.zeros(3)), "Old reader saw new data"
+    latest = store.acquire('book')
+    assert np.array_equal(latest.value, np.full(3, 2.0)), "Latest version not served"
+    old.release()
+    assert store.versions('book') == [3], "Released old version not pruned"
+    assert [row['version'] for row in store.stats()] == [3], "Stale mapping kept"
+    latest.release()
+    assert store.stats() == [], "Unleased latest version still mapped"
+
+def test_garbage_collected_lease_releases(tmp_path):
+    """Test that dropping a lease (e.g. with its session) returns the reference."""
+    store = MarketDataStore(str(tmp_path))
+    store.publish('x', np.arange(5))
+    lease = store.acquire('x')
+    assert store.refs('x', 1) == 1
+    del lease
+    gc.collect()
+    assert store.refs('x', 1) == 0, "Collected lease still counted"
+    with pytest.raises(KeyError):
+        store.acquire('missing')
+
+def test_sweep_keeps_store_within_budget(tmp_path):
+    """Test that unleased datasets are deleted least recently used first once the budget is exceeded."""
+    store = MarketDataStore(str(tmp_path), max_bytes=3 * 8_000 + 2_000)
+    for i, name in enumerate(['a', 'b', 'c']):
+        store.publish(name, np.zeros(1_000))
+        os.utime(store._path(name, 1), (i, i))
+    leased = store.acquire('a')
+    os.utime(store._path('a', 1), (0, 0))
+    store.publish('d', np.zeros(1_000))
+
+    assert store.versions('b') == [] and not os.path.exists(tmp_path / 'b'), "Least recent dataset kept"
+    assert store.versions('a') == [1] and store.versions('c') == [1], "Leased or recent dataset deleted"
+    assert store.versions('d') == [1], "Just-published dataset deleted"
+    leased.release()
+    assert np.array_equal(store.get_or_publish('b', lambda: np.ones(3)).value, np.ones(3)), \
+        "Swept dataset not republished"
+
+def test_shared_decorator_publishes_once(tmp_path):
+    """Test that equal calls share a dataset, different arguments do not, and frames round-trip."""
+    store = MarketDataStore(str(tmp_path))
+    calls = []
+
+    def make(n, seed=None):
+        calls.append(n)
+        return generate_holdings_data(n, seed=seed)
+
+    wrapped = shared(make, store=store)
+    first, second = wrapped(500, seed=1), wrapped(500, seed=1)
+    other = wrapped(600, seed=1)
+
+    assert calls == [500, 600], "Dataset generated more than once"
+    assert first.value is second.value, "Equal calls did not share the frame"
+    assert len(other.value) == 600
+    assert first.value.equals(generate_holdings_data(500, seed=1)), "Frame changed in the store"
+
+def test_other_process_reads_published_version(tmp_path):
+    """Test that another process maps the same published snapshot."""
+    store = MarketDataStore(str(tmp_path))
+    store.publish('matrix', np.arange(6.0))
+    script = ("import sys; from utils.market_store import MarketDataStore; "
+              "print(MarketDataStore(sys.argv[1]).acquire('matrix').value.sum())")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-c', script, str(tmp_path)], capture_output=True, text=True,
+                            cwd=root, env={**os.environ, 'PYTHONPATH': root}, check=True).stdout
+    assert float(output) == 15.0, "Other process read different data"
@@ -0,0 +1,49 @@
+import numpy as np
+from utils.generate_data import generate_time_series_data
+from utils.optimize import efficient_frontier, estimate_moments, series_to_returns
+
+def _moments(num_assets=40, num_days=300, seed=42):
+    returns = series_to_returns(generate_time_series_data(num_days, num_assets, seed=seed))
+    return estimate_moments(returns)
+
+def test_series_to_returns_shape():
+    """Test conversion of generated series into a return matrix."""
+    returns = series_to_returns(generate_time_series_data(num_days=10, num_series=3, seed=42))
+
+    assert returns.shape == (9, 3), "Return matrix has incorrect shape"
+
+def test_long_only_frontier_feasible():
+    """Test that long-only frontier weights are feasible and hit their targets."""
+    mu, cov = _moments()
+    result = efficient_frontier(mu, cov, num_points=15)
+
+    assert result.weights.shape == (15, 40), "Weights have incorrect shape"
+    assert result.weights.min() >= 0, "Negative weights in long-only frontier"
+    assert np.allclose(result.weights.sum(axis=1), 1), "Weights do not sum to one"
+    assert np.allclose(result.returns, result.targets, atol=1e-8), "Targets not met"
+    assert result.stats['converged_points'] == 15, "Not all points converged"
+
+def test_long_only_matches_tight_solve():
+    """Test that the polished batch solve matches a tightly converged ADMM solve."""
+    mu, cov = _moments(num_assets=25)
+    fast = efficient_frontier(mu, cov, num_points=8)
+    tight = efficient_frontier(mu, cov, targets=fast.targets, tol=1e-7, max_iter=50000, polish=False)
+
+    assert np.allclose(fast.risks, tight.risks, rtol=1e-4), "Polished risks differ from tight solve"
+
+def test_unconstrained_frontier_closed_form():
+    """Test the unconstrained frontier is never riskier than the long-only one."""
+    mu, cov = _moments()
+    long_only = efficient_frontier(mu, cov, num_points=10)
+    free = efficient_frontier(mu, cov, targets=long_only.targets, long_only=False)
+
+    assert np.allclose(free.returns, free.targets), "Targets not met"
+    assert np.all(free.risks <= long_only.risks + 1e-12), "Unconstrained frontier is riskier"
+
+def test_warm_start_reduces_iterations():
+    """Test that warm starting from a previous frontier needs fewer iterations."""
+    mu, cov = _moments()
+    cold = efficient_frontier(mu, cov, num_points=10, polish=False)
+    warm = efficient_frontier(mu, cov, targets=cold.targets, polish=False, warm_start=cold)
+
+    assert warm.stats['mean_iterations'] <= cold.stats['mean_iterations'], "Warm start did not help"
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from utils.path_metrics import (
+    PathMetrics,
+    _update_loop,
+    _update_numpy,
+    expected_shortfall,
+    path_metrics,
+    summarize_path_metrics
+)
+from utils.simulation import iter_path_chunks, simulate_percentile_bands
+
+
+def _state(n):
+    return (np.ones(n), np.zeros(n), np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64),
+            np.zeros(n, dtype=np.int64))
+
+
+def test_numpy_kernel_matches_loop():
+    """Test the vectorised kernel against the reference loop over several carried blocks."""
+    wealth = np.vstack(list(iter_path_chunks(0.002, 0.05, 300, 40, seed=5, chunk_size=100)))
+    loop_state, numpy_state = _state(300), _state(300)
+    for start in range(0, 40, 7):
+        block = wealth[:, start:start + 7]
+        loop_dd, numpy_dd = np.empty(block.shape[::-1]), np.empty(block.shape[::-1])
+        _update_loop(block, *loop_state, loop_dd)
+        _update_numpy(block, *numpy_state, numpy_dd)
+        assert np.allclose(loop_dd, numpy_dd), "Drawdown blocks differ"
+    for expected, actual in zip(loop_state, numpy_state):
+        assert np.allclose(expected, actual), "Carried state differs between kernels"
+
+
+def test_known_path():
+    """Test metrics of a hand-checked path."""
+    wealth = np.array([[1.1, 0.99, 1.045, 1.2, 1.08, 1.14, 1.26]])
+    result = PathMetrics(1).update(wealth[:, :3]).update(wealth[:, 3:]).result()
+
+    assert np.isclose(result['max_drawdown'][0], -0.1), "Max drawdown is incorrect"
+    assert result['longest_drawdown'][0] == 2, "Longest drawdown is incorrect"
+    assert np.isclose(result['time_under_water'][0], 4 / 7), "Time under water is incorrect"
+    assert np.isclose(result['terminal'][0], 1.26), "Terminal wealth is incorrect"
+
+
+def test_drawdown_from_initial_value():
+    """Test that a path falling from the start is under water from period one."""
+    result = PathMetrics(1, initial_value=100.0).update(np.array([[90.0, 95.0, 80.0]])).result()
+
+    assert np.isclose(result['max_drawdown'][0], -0.2), "Initial value is not the first peak"
+    assert result['longest_drawdown'][0] == 3, "Run does not start at the first period"
+
+
+def test_row_chunks_match_single_pass():
+    """Test that chunking rows does not change any metric or the underwater curve."""
+    wealth = np.vstack(list(iter_path_chunks(0.004, 0.04, 1000, 36, seed=2, chunk_size=1000)))
+    chunked = path_metrics(wealth, chunk_rows=300)
+    single = PathMetrics(1000).update(wealth).result()
+
+    for name, values in single.items():
+        assert np.allclose(chunked[name], values), f"{name} differs when rows are chunked"
+
+
+def test_simulation_path_metrics_match_full_paths():
+    """Test metrics accumulated over time blocks against materialised paths."""
+    kwargs = dict(num_scenarios=2000, num_periods=30, seed=11, chunk_size=500)
+    result = simulate_percentile_bands(0.005, 0.04, max_block_elements=10**9, path_metrics=True, **kwargs)
+    expected = path_metrics(np.vstack(list(iter_path_chunks(0.005, 0.04, **kwargs))))
+
+    for name, values in expected.items():
+        assert np.allclose(result[name], values), f"{name} differs from full-path metrics"
+    assert 'max_drawdown' not in simulate_percentile_bands(0.005, 0.04, **kwargs), \
+        "Metrics returned without being requested"
+
+
+def test_expected_shortfall():
+    """Test VaR and CVaR on a uniform grid of returns."""
+    returns = np.linspace(-0.99, 1.0, 200)
+    var, cvar = expected_shortfall(returns, alpha=0.05)
+
+    assert np.isclose(var, -returns[9]), "VaR is not the 10th worst return"
+    assert np.isclose(cvar, -returns[:10].mean()), "CVaR is not the mean of the worst 10"
+    assert cvar >= var, "CVaR is smaller than VaR"
+
+
+def test_summary_orders_risk():
+    """Test that the higher-volatility strategy shows deeper drawdowns and larger CVaR."""
+    kwargs = dict(num_scenarios=5000, num_periods=120, seed=42, path_metrics=True)
+    conservative = summarize_path_metrics(simulate_percentile_bands(0.004, 0.02, **kwargs))
+    aggressive = summarize_path_metrics(simulate_percentile_bands(0.007, 0.04, **kwargs))
+
+    assert aggressive['median_max_drawdown'] > conservative['median_max_drawdown'], "Drawdowns not ordered"
+    assert aggressive['cvar'] > conservative['cvar'], "CVaR not ordered"
+    assert conservative['tail_max_drawdown'] >= conservative['median_max_drawdown'], "Tail below median"
+
+
+def test_unknown_backend():
+    """Test that an unknown backend is rejected."""
+    with pytest.raises(ValueError):
+        PathMetrics(10, backend='cuda')
@@ -0,0 +1,102 @@
+import threading
+import time
+from datetime import datetime
+import pytest
+from utils import reports
+from utils.cache import LRUCache
+from utils.reports import ReportService, measure_throughput, render_report_html
+
+class SlowRenderer:
+    """Stand-in for wkhtmltopdf that records calls and blocks until released."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, html):
+        self.calls += 1
+        self.release.wait(5)
+        time.sleep(self.delay)
+        return html.encode('utf-8')
+
+def test_render_report_html():
+    """Test that report inputs are filled into the template."""
+    html = render_report_html({'risk_level': 7, 'investment_period': 'Long-term (7+ years)'})
+
+    assert 'Risk Level: 7/10' in html, "Risk level missing"
+    assert 'Long-term (7+ years)' in html, "Investment period missing"
+
+def test_submit_is_non_blocking_and_cached():
+    """Test that submit returns before rendering finishes and repeats hit the cache."""
+    renderer = SlowRenderer()
+    renderer.release.clear()
+    service = ReportService(max_workers=1, renderer=renderer, memory=LRUCache())
+    inputs = {'risk_level': 5, 'investment_period': 'Short-term (1-3 years)'}
+
+    job_id = service.submit(inputs)
+    assert service.status(job_id) in ('queued', 'running'), "Submit must not wait for rendering"
+    assert service.submit(inputs) == job_id, "Identical in-flight requests must share a job"
+
+    renderer.release.set()
+    pdf = service.result(job_id, timeout=5)
+    assert service.status(job_id) == 'done' and b'Risk Level: 5/10' in pdf, "Report not rendered"
+
+    repeat = service.submit(dict(inputs))
+    assert repeat == job_id and service.job(repeat).cache_hit, "Repeat request was not a cache hit"
+    assert renderer.calls == 1, "Report rendered more than once"
+    assert service.stats()['cache_hits'] == 1
+    service.shutdown()
+
+def test_cached_report_carries_its_date(monkeypatch):
+    """Test that a repeat request on a later day is re-rendered with that day's date."""
+    class Clock(datetime):
+        today = datetime(2024, 1, 2, 9, 30)
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.today
+
+    monkeypatch.setattr(reports, 'datetime', Clock)
+    renderer = SlowRenderer()
+    service = ReportService(max_workers=1, renderer=renderer, memory=LRUCache())
+    inputs = {'risk_level': 5, 'investment_period': 'Short-term (1-3 years)'}
+
+    first = service.result(service.submit(inputs), timeout=5)
+    assert service.submit(inputs) is not None and renderer.calls == 1, "Same-day repeat should hit the cache"
+    Clock.today = datetime(2024, 1, 3, 9, 30)
+    second = service.result(service.submit(inputs), timeout=5)
+
+    assert b'Generated on: 2024-01-02' in first, "First report has the wrong date"
+    assert b'Generated on: 2024-01-03' in second and renderer.calls == 2, "Later report served with a stale date"
+
+def test_failures_and_queue_bound():
+    """Test failed renders are reported and the pending queue is bounded."""
+    def broken(html):
+        raise OSError("wkhtmltopdf not found")
+
+    service = ReportService(max_workers=1, renderer=broken, memory=LRUCache())
+    job_id = service.submit({'risk_level': 1, 'investment_period': 'x'})
+    service.result(job_id, timeout=5)
+    assert service.status(job_id) == 'failed' and 'wkhtmltopdf' in service.job(job_id).error
+
+    renderer = SlowRenderer()
+    renderer.release.clear()
+    bounded = ReportService(max_workers=1, max_pending=2, renderer=renderer, memory=LRUCache())
+    bounded.submit({'risk_level': 1, 'investment_period': 'a'})
+    bounded.submit({'risk_level': 2, 'investment_period': 'a'})
+    with pytest.raises(RuntimeError):
+        bounded.submit({'risk_level': 3, 'investment_period': 'a'})
+    renderer.release.set()
+    bounded.shutdown()
+
+def test_throughput_with_concurrent_workers():
+    """Test that a worker pool renders concurrent requests in parallel."""
+    requests = [{'risk_level': level, 'investment_period': 'p'} for level in range(8)] * 2
+    serial = measure_throughput(ReportService(1, renderer=SlowRenderer(0.05), memory=LRUCache()), requests)
+    pooled = measure_throughput(ReportService(4, renderer=SlowRenderer(0.05), memory=LRUCache()), requests)
+
+    assert serial['unique'] == pooled['unique'] == 8, "Duplicate requests were not merged"
+    assert pooled['wall_seconds'] < serial['wall_seconds'] * 0.6, "Pool did not render concurrently"
+    assert pooled['requests_per_second'] > serial['requests_per_second']
@@ -0,0 +1,59 @@
+import numpy as np
+from utils import risk_parity
+from utils.risk_parity import risk_parity_weights, rolling_risk_parity
+
+def _factor_cov(num_assets=60, seed=42):
+    rng = np.random.default_rng(seed)
+    loadings = rng.standard_normal((num_assets, 3))
+    return loadings @ loadings.T * 1e-4 + np.diag(rng.uniform(1e-4, 4e-4, num_assets))
+
+def test_equal_risk_contributions():
+    """Test that both solvers equalise risk contributions."""
+    cov = _factor_cov()
+    for method in ['newton', 'ccd']:
+        result = risk_parity_weights(cov, method=method, max_iter=20000)
+
+        assert result.converged, f"{method} did not converge"
+        assert np.isclose(result.weights.sum(), 1), "Weights do not sum to one"
+        assert result.weights.min() > 0, "Weights must be positive"
+        assert np.allclose(result.risk_contributions, 1 / 60, rtol=1e-5), f"{method} contributions unequal"
+
+def test_custom_budgets():
+    """Test that risk contributions follow non-uniform budgets."""
+    cov = _factor_cov(num_assets=4)
+    budgets = np.array([0.4, 0.3, 0.2, 0.1])
+    result = risk_parity_weights(cov, budgets=budgets)
+
+    assert np.allclose(result.risk_contributions, budgets, rtol=1e-5), "Budgets not respected"
+
+def test_covariance_not_modified():
+    """Test that the solver leaves the covariance matrix untouched."""
+    cov = _factor_cov()
+    original = cov.copy()
+    risk_parity_weights(cov)
+
+    assert np.array_equal(cov, original), "Covariance matrix was modified"
+
+def test_failed_line_search_reports_non_convergence(monkeypatch):
+    """Test that Newton stops without error when no acceptable step length exists."""
+    cov = _factor_cov(num_assets=5)
+    # A huge step towards the boundary leaves a step length below the line search's floor
+    monkeypatch.setattr(risk_parity, '_conjugate_gradient',
+                        lambda cov, curvature, rhs, rtol, max_iter: (np.full_like(rhs, -1e20), 1))
+    result = risk_parity_weights(cov, max_iter=50)
+
+    assert not result.converged and result.iterations == 1, "Failed line search should stop the solver"
+    assert np.all(np.isfinite(result.weights)) and result.weights.min() > 0, "Weights left the feasible set"
+
+def test_rolling_warm_start_report():
+    """Test rolling re-solves and that warm starts need fewer iterations."""
+    rng = np.random.default_rng(0)
+    returns = rng.standard_normal((600, 30)) * 0.01
+    weights, report = rolling_risk_parity(returns, window=252, rebalance_every=21)
+    _, cold_report = rolling_risk_parity(returns, window=252, rebalance_every=21, warm_start=False)
+
+    assert weights.shape == (len(report), 30), "Weights have incorrect shape"
+    assert all(entry['converged'] for entry in report), "A rebalance failed to converge"
+    warm_iterations = sum(entry['iterations'] for entry in report)
+    cold_iterations = sum(entry['iterations'] for entry in cold_report)
+    assert warm_iterations < cold_iterations, "Warm starts did not reduce iterations"
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from utils.generate_data import generate_performance_data
+from utils.rolling import RollingRiskEngine, rolling_risk_metrics
+
+def _returns(num_periods=150, num_funds=4, seed=0):
+    rng = np.random.default_rng(seed)
+    index = rng.normal(0.005, 0.02, num_periods)
+    funds = index[:, None] * rng.uniform(0.5, 1.5, num_funds) + rng.normal(0.002, 0.01, (num_periods, num_funds))
+    return funds, index
+
+def test_matches_pandas_rolling():
+    """Test incremental metrics against full-window pandas recomputation."""
+    funds, index = _returns()
+    metrics = rolling_risk_metrics(funds, index, window=36)
+    df = pd.DataFrame(funds)
+    bench = pd.DataFrame(np.repeat(index[:, None], funds.shape[1], axis=1))
+    beta = df.rolling(36).cov(bench) / bench.rolling(36).var()
+    active = df - bench
+
+    assert np.isnan(metrics['beta'][:35]).all(), "Metrics must be NaN before the window fills"
+    assert np.allclose(metrics['beta'][35:], beta.values[35:]), "Beta differs from pandas"
+    assert np.allclose(metrics['correlation'][35:], df.rolling(36).corr(bench).values[35:]), "Correlation differs"
+    assert np.allclose(metrics['tracking_error'][35:],
+                       active.rolling(36).std().values[35:] * np.sqrt(12)), "Tracking error differs"
+    assert np.allclose(metrics['information_ratio'][35:],
+                       (active.rolling(36).mean() * 12 / (active.rolling(36).std() * np.sqrt(12))).values[35:]), \
+        "Information ratio differs"
+
+def test_drawdown():
+    """Test running and maximum drawdown against the compounded path."""
+    funds, index = _returns(num_funds=1)
+    metrics = rolling_risk_metrics(funds[:, 0], index, window=36)
+    wealth = np.cumprod(1 + funds[:, 0])
+    drawdown = wealth / np.maximum.accumulate(np.maximum(wealth, 1)) - 1
+
+    assert np.allclose(metrics['drawdown'], drawdown), "Drawdown is wrong"
+    assert np.isclose(metrics['max_drawdown'][-1], drawdown.min()), "Max drawdown is wrong"
+
+def test_engine_streaming_many_funds():
+    """Test streaming updates for many funds with per-fund benchmarks."""
+    rng = np.random.default_rng(1)
+    funds = rng.normal(0.004, 0.03, (130, 2000))
+    index = rng.normal(0.004, 0.02, (130, 2000))
+    engine = RollingRiskEngine(2000, window=60)
+    for t in range(130):
+        latest = engine.update(funds[t], index[t])
+    expected = rolling_risk_metrics(funds[-60:], index[-60:], window=60)
+
+    for name in ['beta', 'alpha', 'sharpe', 'tracking_error']:
+        assert np.allclose(latest[name], expected[name][-1]), f"Streaming {name} drifted"
+
+def test_performance_data_metrics():
+    """Test metrics on generated fund vs index data."""
+    df = generate_performance_data('2010-01-01', periods=120)
+    metrics = rolling_risk_metrics(df['Fund'].to_numpy(), df['Index'].to_numpy(), window=60)
+
+    assert metrics['beta'].shape == (120,), "Metric history has incorrect shape"
+    assert np.all(metrics['correlation'][59:] > 0.5), "Fund should track the index"
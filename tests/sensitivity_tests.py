@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from utils.sensitivity import (METRICS, evaluate_points, iter_sweep, refinement_levels, scenario_returns,
+                               sweep, sweep_axis)
+
+def _reference_point(weight, threshold, years, num_scenarios, seed):
+    """Straightforward per-scenario loop used as ground truth for one grid point."""
+    returns = scenario_returns(int(round(years * 12)), num_scenarios, seed)
+    cagr, drawdowns, counts = [], [], []
+    for s in range(num_scenarios):
+        equity, bonds, peak, worst, count = weight, 1 - weight, 1.0, 0.0, 0
+        for r_equity, r_bonds in returns[:, s]:
+            equity, bonds = equity * (1 + r_equity), bonds * (1 + r_bonds)
+            value = equity + bonds
+            if abs(equity - weight * value) > threshold * value:
+                equity, bonds, count = weight * value, (1 - weight) * value, count + 1
+            peak = max(peak, value)
+            worst = min(worst, value / peak - 1)
+        cagr.append(value ** (1 / years) - 1)
+        drawdowns.append(worst)
+        counts.append(count)
+    return np.median(cagr), np.median(drawdowns), np.mean(counts) / years
+
+def test_matches_reference_loop():
+    """Test that the batched kernel matches a per-scenario loop for points with different horizons."""
+    points = [(0.6, 0.05, 3.0), (0.3, 0.0, 1.0), (0.9, 0.1, 2.0)]
+    result = evaluate_points(*map(np.array, zip(*points)), num_scenarios=200, seed=7)
+
+    for i, point in enumerate(points):
+        cagr, drawdown, rebalances = _reference_point(*point, num_scenarios=200, seed=7)
+        assert np.isclose(result['cagr'][i], cagr), f"CAGR differs for {point}"
+        assert np.isclose(result['max_drawdown'][i], drawdown), f"Drawdown differs for {point}"
+        assert np.isclose(result['rebalances_per_year'][i], rebalances), f"Rebalances differ for {point}"
+
+def test_outcomes_follow_parameters():
+    """Test that more equity raises return and risk and that a zero band rebalances monthly."""
+    weights = np.linspace(0, 1, 5)
+    result = evaluate_points(weights, 0.0, 10.0, num_scenarios=500)
+
+    assert np.all(np.diff(result['cagr']) > 0), "CAGR should rise with the equity weight"
+    assert np.all(np.diff(result['max_drawdown']) < 0), "Drawdowns should deepen with the equity weight"
+    assert np.allclose(result['rebalances_per_year'][1:-1], 12), "A zero band should rebalance every month"
+    assert result['rebalances_per_year'][0] == result['rebalances_per_year'][-1] == 0, \
+        "Single-asset portfolios never drift"
+
+def test_common_scenarios_make_batches_consistent():
+    """Test that a point's outcome does not depend on the rest of its batch or on worker splits."""
+    x, y = sweep_axis('equity_weight', 6), sweep_axis('threshold', 5)
+    full = sweep('equity_weight', x, 'threshold', y, num_scenarios=200)
+    split = sweep('equity_weight', x, 'threshold', y, num_scenarios=200, num_workers=2, chunk_points=7)
+    single = evaluate_points(x[2], y[3], 10.0, num_scenarios=200)
+
+    assert full.complete and full.metrics['cagr'].shape == (len(y), len(x)), "Grid has incorrect shape"
+    for name in METRICS:
+        assert np.array_equal(full.metrics[name], split.metrics[name]), f"{name} differs across workers"
+        assert np.isclose(full.metrics[name][3, 2], single[name][0]), f"{name} differs when evaluated alone"
+
+def test_progressive_refinement():
+    """Test that levels partition the grid, start with a spanning coarse grid and end at the full result."""
+    levels = refinement_levels(21, 9)
+    cells = np.concatenate([rows * 21 + columns for rows, columns in levels])
+    assert np.array_equal(np.sort(cells), np.arange(21 * 9)), "Levels should cover every cell exactly once"
+    coarse_rows, coarse_columns = levels[0]
+    assert {0, 8} <= set(coarse_rows) and {0, 20} <= set(coarse_columns), "Coarse level should span the grid"
+
+    x, y = sweep_axis('equity_weight', 21), sweep_axis('horizon', 9)
+    results = list(iter_sweep('equity_weight', x, 'horizon', y, num_scenarios=100))
+    assert len(results) == len(levels) and results[-1].complete, "One result per level, the last complete"
+    assert not np.isnan(results[0].filled('cagr')).any(), "Coarse results should fill every cell for display"
+    assert results[0].computed.sum() < results[-1].computed.sum(), "Refinement should add points"
+    final = sweep('equity_weight', x, 'horizon', y, num_scenarios=100)
+    assert np.array_equal(results[-1].metrics['cagr'], final.metrics['cagr']), "Refined grid differs from batch"
+    assert len(final.frame()) == len(x) * len(y), "Frame should have one row per grid point"
+
+def test_invalid_sweeps():
+    """Test that unknown or repeated parameters are rejected."""
+    with pytest.raises(ValueError):
+        sweep('leverage', [1.0], 'threshold', [0.1])
+    with pytest.raises(ValueError):
+        sweep('horizon', [1.0], 'horizon', [2.0])
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils.backtest import run_backtest
+from utils.signals import (_load_returns, compute_signal, ma_crossover, momentum, rebalance_indices,
+                           rolling_std, signal_weights, tactical_backtest, tactical_weights, trend_filter,
+                           volatility_target, weight_schedule, window_sum)
+
+def _returns(num_periods=400, num_assets=6, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0.0004, 0.01, (num_periods, num_assets)) + rng.normal(0.0, 0.0005, num_assets)
+
+def test_window_sum_matches_pandas():
+    """Test that cumulative-sum window sums match pandas rolling sums, with and without a lag."""
+    values = _returns()
+    frame = pd.DataFrame(values)
+
+    assert np.allclose(window_sum(values, 20), frame.rolling(20).sum(), equal_nan=True), "Window sums differ"
+    assert np.allclose(window_sum(values, 20, lag=5), frame.rolling(20).sum().shift(5), equal_nan=True), \
+        "Lagged window sums differ"
+    assert np.isnan(window_sum(values, 500)).all(), "Windows longer than the history should be NaN"
+
+def test_rolling_std_matches_pandas():
+    """Test that the rolling standard deviation matches pandas."""
+    values = _returns()
+
+    assert np.allclose(rolling_std(values, 30), pd.DataFrame(values).rolling(30).std(), equal_nan=True), \
+        "Rolling standard deviations differ"
+
+def test_signals_match_reference():
+    """Test each signal against a direct pandas computation on the price index."""
+    returns = _returns()
+    prices = pd.DataFrame(np.cumprod(1 + returns, axis=0))
+    with_start = pd.concat([pd.DataFrame(np.ones((1, returns.shape[1]))), prices], ignore_index=True)
+
+    expected_momentum = (with_start.shift(21) / with_start.shift(252) - 1).iloc[1:]
+    expected_gap = prices.rolling(50).mean() / prices.rolling(200).mean() - 1
+    average = prices.rolling(200).mean()
+    expected_trend = (prices > average).astype(float).where(average.notna())
+    expected_scale = np.minimum(0.1 / (pd.DataFrame(returns).rolling(63).std() * np.sqrt(252)), 1.5)
+
+    assert np.allclose(momentum(returns), expected_momentum, equal_nan=True), "Momentum differs"
+    assert np.allclose(ma_crossover(returns), expected_gap, equal_nan=True), "MA crossover differs"
+    assert np.array_equal(trend_filter(returns), expected_trend, equal_nan=True), "Trend filter differs"
+    assert np.allclose(volatility_target(returns, max_leverage=1.5), expected_scale, equal_nan=True), \
+        "Volatility target differs"
+
+def test_signals_use_no_future_returns():
+    """Test that changing later returns leaves earlier signal values unchanged."""
+    returns = _returns()
+    shocked = returns.copy()
+    shocked[300:] += 0.05
+
+    for signal in (momentum, ma_crossover, trend_filter, volatility_target):
+        assert np.array_equal(signal(returns)[:300], signal(shocked)[:300], equal_nan=True), \
+            f"{signal.__name__} looks ahead"
+
+def test_signal_weights_top_slots_and_cash():
+    """Test that the top scores get equal slots and unfilled slots stay in cash."""
+    scores = np.array([[0.3, -0.1, 0.2, np.nan, 0.1],
+                       [-0.2, -0.1, 0.05, -0.3, np.nan]])
+    weights = signal_weights(scores, top_fraction=0.4)
+
+    assert np.allclose(weights[0], [0.5, 0, 0.5, 0, 0]), "Top two positive scores should share the book"
+    assert np.allclose(weights[1], [0, 0, 0.5, 0, 0]), "Only one positive score should leave half in cash"
+
+    masked = signal_weights(scores, top_fraction=0.4, mask=[[0, 1, 1, 1, 1]] * 2, scale=np.full((2, 5), 0.5))
+    assert np.allclose(masked[0], [0, 0, 0.25, 0, 0.25]), "Mask and scale were not applied"
+
+def test_weight_schedule_starts_in_cash():
+    """Test that targets switch at decision closes and hold cash before the first decision."""
+    schedule = weight_schedule([4, 9], np.array([[0.5, 0.0], [0.25, 0.25]]), 12)
+
+    assert schedule.shape == (12, 1, 3), "Schedule should add a cash column"
+    assert np.allclose(schedule[:4, 0], [0, 0, 1]), "Periods before the first decision should be in cash"
+    assert np.allclose(schedule[4:9, 0], [0.5, 0, 0.5]), "First decision not applied from its close"
+    assert np.allclose(schedule[9:, 0], [0.25, 0.25, 0.5]), "Second decision not applied from its close"
+
+def test_tactical_backtest_matches_manual_schedule():
+    """Test that the tactical backtest replays the decided weights with cash through run_backtest."""
+    returns = _returns(num_periods=600)
+    result, weights = tactical_backtest(returns, 'momentum', every=21, trend_window=100, vol_target=0.1)
+    indices, expected, _ = tactical_weights(returns, 'momentum', every=21, trend_window=100, vol_target=0.1)
+    manual = run_backtest(np.hstack([returns, np.zeros((len(returns), 1))]),
+                          weight_schedule(indices, expected, len(returns)), rebalance_every=21)
+
+    assert np.allclose(weights, expected), "Decided weights differ"
+    assert np.allclose(result.values, manual.values), "Backtest values differ"
+    assert np.all(weights.sum(axis=1) <= 1 + 1e-12), "Weights should not exceed full investment"
+    assert np.allclose(result.values[0, :indices[0]], 1.0), "Value should not move before the first decision"
+    assert np.array_equal(rebalance_indices(len(returns), 21), indices), "Rebalance dates differ"
+
+def test_invalid_parameters():
+    """Test that inconsistent windows are rejected."""
+    returns = _returns()
+    with pytest.raises(ValueError):
+        momentum(returns, lookback=20, skip=20)
+    with pytest.raises(ValueError):
+        ma_crossover(returns, fast=200, slow=50)
+    with pytest.raises(ValueError):
+        tactical_weights(returns, 'volatility_target')
+
+def test_total_losses_rejected(tmp_path):
+    """Test that returns at or below -100% are rejected instead of turning into NaN weights."""
+    returns = _returns()
+    returns[100, 2] = -1.0
+    with pytest.raises(ValueError):
+        compute_signal('momentum', returns)
+    with pytest.raises(ValueError):
+        tactical_weights(returns, 'ma_crossover')
+    np.save(tmp_path / 'returns.npy', returns)
+    with pytest.raises(ValueError):
+        _load_returns(str(tmp_path / 'returns.npy'))
+
+def test_non_finite_returns_rejected(tmp_path):
+    """Test that a NaN inside the series is rejected rather than silently poisoning every later window."""
+    returns = _returns()
+    returns[150, 3] = np.nan
+    with pytest.raises(ValueError, match=r'finite.*\[150, 3\]'):
+        compute_signal('momentum', returns)
+    with pytest.raises(ValueError, match='finite'):
+        tactical_weights(returns, 'trend_filter')
+    pd.DataFrame(returns).to_csv(tmp_path / 'returns.csv')
+    with pytest.raises(ValueError, match='finite'):
+        _load_returns(str(tmp_path / 'returns.csv'))
+    returns[150, 3] = np.inf
+    with pytest.raises(ValueError, match='finite'):
+        compute_signal('volatility_target', returns)
@@ -0,0 +1,49 @@
+import numpy as np
+from utils.simulation import (
+    PERCENTILES,
+    iter_path_chunks,
+    simulate_percentile_bands
+)
+
+def test_percentile_bands_shape():
+    """Test that bands have one row per percentile and one column per period."""
+    result = simulate_percentile_bands(0.005, 0.02, num_scenarios=2000, num_periods=24, seed=42)
+
+    assert result['bands'].shape == (len(PERCENTILES), 24), "Bands have incorrect shape"
+    assert result['mean'].shape == (24,), "Mean path has incorrect shape"
+    assert np.all(np.diff(result['bands'], axis=0) >= 0), "Percentile bands are not ordered"
+
+def test_percentile_bands_match_full_paths():
+    """Test blocked percentiles against np.percentile over materialised paths."""
+    kwargs = dict(num_scenarios=3000, num_periods=12, seed=7, chunk_size=1000)
+    result = simulate_percentile_bands(0.004, 0.03, max_block_elements=10**9, **kwargs)
+    paths = np.vstack(list(iter_path_chunks(0.004, 0.03, **kwargs)))
+
+    expected = np.percentile(paths, PERCENTILES, axis=0)
+    assert np.allclose(result['bands'], expected), "Bands differ from full-path percentiles"
+    assert np.allclose(result['mean'], paths.mean(axis=0)), "Mean path differs"
+
+def test_bands_and_chunks_share_paths_at_target_size():
+    """Test that the blocked band kernel and the chunk iterator simulate the same 100k paths."""
+    kwargs = dict(num_scenarios=100_000, num_periods=24, seed=11)
+    result = simulate_percentile_bands(0.005, 0.04, max_block_elements=100_000 * 5, **kwargs)
+    paths = np.vstack(list(iter_path_chunks(0.005, 0.04, **kwargs)))
+
+    assert np.allclose(result['bands'], np.percentile(paths, PERCENTILES, axis=0)), "Bands and chunks differ"
+    assert np.allclose(result['mean'], paths.mean(axis=0)), "Mean path differs"
+
+def test_worker_count_and_blocking_invariance():
+    """Test that results do not depend on the number of worker threads or the time blocking."""
+    kwargs = dict(num_scenarios=5000, num_periods=30, seed=3, chunk_size=1000)
+    serial = simulate_percentile_bands(0.006, 0.04, num_workers=1, max_block_elements=5000 * 7, **kwargs)
+    threaded = simulate_percentile_bands(0.006, 0.04, num_workers=4, max_block_elements=5000 * 7, **kwargs)
+    single_block = simulate_percentile_bands(0.006, 0.04, max_block_elements=10**9, **kwargs)
+
+    assert np.array_equal(serial['bands'], threaded['bands']), "Worker count changed the result"
+    assert np.allclose(serial['bands'], single_block['bands'], rtol=1e-12), "Time blocking changed the paths"
+
+def test_path_chunks_bounded():
+    """Test that path chunks never exceed the requested chunk size."""
+    sizes = [chunk.shape[0] for chunk in iter_path_chunks(0.005, 0.02, 2500, 10, seed=1, chunk_size=1000)]
+
+    assert sizes == [1000, 1000, 500], "Chunks have incorrect sizes"
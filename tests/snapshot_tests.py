@@ -0,0 +1,67 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from utils.generate_data import generate_heatmap_data, generate_holdings_data, generate_time_series_data
+from utils.snapshot import load_snapshot, read_header, save_snapshot
+
+def test_grid_round_trip_memory_mapped():
+    """Test that a large heatmap grid loads as a zero-copy read-only view."""
+    X, Y, Z = generate_heatmap_data(num_points=1000, seed=42)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'heatmap.snap')
+        size = save_snapshot(path, (X, Y, Z))
+        loaded = load_snapshot(path)
+
+        assert size == os.path.getsize(path) and size < 3 * Z.nbytes + 4096, "Snapshot is not compact"
+        assert isinstance(loaded, tuple) and len(loaded) == 3, "Tuple structure lost"
+        assert all(np.array_equal(a, b) for a, b in zip(loaded, (X, Y, Z))), "Grid values differ"
+        assert not loaded[2].flags.owndata and not loaded[2].flags.writeable, "Grid should be a read-only view"
+        assert loaded[2].ctypes.data % 64 == 0, "Columns must be aligned"
+        del loaded
+
+def test_compressed_dict_and_strings():
+    """Test compression and string columns such as formatted dates."""
+    series = generate_time_series_data(num_days=500, num_series=2, seed=42)
+    with tempfile.TemporaryDirectory() as tmp:
+        plain, packed = os.path.join(tmp, 'plain.snap'), os.path.join(tmp, 'packed.snap')
+        save_snapshot(plain, {'dates': series['dates'], 'flat': np.zeros(10_000)})
+        save_snapshot(packed, {'dates': series['dates'], 'flat': np.zeros(10_000)}, compress=True)
+        loaded = load_snapshot(packed)
+        header = read_header(packed)
+
+    assert list(loaded) == ['dates', 'flat'], "Keys or their order changed"
+    assert loaded['dates'].tolist() == series['dates'], "Dates did not round trip"
+    assert {c['codec'] for c in header['columns']} == {'zlib'}, "Columns were not compressed"
+
+def test_dataframe_round_trip():
+    """Test DataFrames with categorical, numeric and index columns."""
+    positions = generate_holdings_data(num_positions=2_000, seed=42)
+    indexed = pd.DataFrame({'value': np.arange(3.0)}, index=pd.date_range('2024-01-31', periods=3, freq='D'))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'positions.snap')
+        save_snapshot(path, positions)
+        loaded = load_snapshot(path, mmap_mode=False)
+        save_snapshot(path, indexed)
+        loaded_indexed = load_snapshot(path)
+
+    pd.testing.assert_frame_equal(loaded, positions)
+    assert isinstance(loaded['Sector'].dtype, pd.CategoricalDtype), "Categorical dtype lost"
+    assert (loaded_indexed.index == indexed.index).all(), "Index lost"
+
+def test_rejects_objects_and_garbage():
+    """Test that object arrays and foreign files are refused."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bad.snap')
+        try:
+            save_snapshot(path, np.array([{'a': 1}], dtype=object))
+            raise AssertionError("Object arrays should be rejected")
+        except TypeError:
+            pass
+        with open(path, 'wb') as f:
+            f.write(b'{"json": true}')
+        try:
+            load_snapshot(path)
+            raise AssertionError("Foreign files should be rejected")
+        except ValueError:
+            pass
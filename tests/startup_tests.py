@@ -0,0 +1,61 @@
+import json
+import os
+import sys
+import tempfile
+from utils.startup import (
+    IMPORT_TIMES,
+    PROFILE_ENV,
+    LazyModule,
+    lazy_import,
+    page_paths,
+    parse_importtime,
+    profile_page,
+    start_page_timer
+)
+
+def test_lazy_import_defers_until_use():
+    """Test that a lazy module is only imported on first attribute access."""
+    sys.modules.pop('colorsys', None)
+    module = lazy_import('colorsys')
+
+    assert isinstance(module, LazyModule) and 'colorsys' not in sys.modules, "Import was not deferred"
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0)[0] == 0.0, "Lazy module does not forward attributes"
+    assert 'colorsys' in sys.modules and 'colorsys' in IMPORT_TIMES, "Import time not recorded"
+    assert lazy_import('colorsys') is sys.modules['colorsys'], "Loaded modules should be returned directly"
+
+def test_page_timer_profile_log():
+    """Test page checkpoints and the profiling log."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'startup.jsonl')
+        os.environ[PROFILE_ENV] = path
+        try:
+            first = start_page_timer('/app/pages/99_Test.py')
+            first.first_render()
+            first.finish()
+            second = start_page_timer('/app/pages/99_Test.py')
+            second.finish()
+        finally:
+            del os.environ[PROFILE_ENV]
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+
+    assert [r['cold'] for r in records] == [True, False], "Only the first run of a page is cold"
+    assert records[0]['page'] == '99_Test.py', "Page name not recorded"
+    assert 0 <= records[0]['first_render'] <= records[0]['complete'], "Checkpoints out of order"
+
+def test_parse_importtime():
+    """Test parsing of -X importtime output."""
+    output = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       120 |        120 |   _json\n"
+              "import time:      1500 |       1620 | json\n")
+    rows = parse_importtime(output)
+
+    assert [(r['module'], r['depth']) for r in rows] == [('_json', 1), ('json', 0)], "Nesting misread"
+    assert abs(rows[1]['cumulative'] - 1.62e-3) < 1e-12, "Times should be in seconds"
+
+def test_profile_home_page():
+    """Test a cold profile of the home page in a fresh interpreter."""
+    profile = profile_page(page_paths()[0], timeout=120)
+
+    assert profile['page'] == 'Home.py' and not profile['exception'], "Home page failed to run"
+    assert profile['run'] > 0 and profile['imports'], "Profile is empty"
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from utils.stress import StressScenario, run_stress_tests, standard_scenarios
+
+ASSETS = ['US Stocks', 'International Stocks', 'Bonds', 'Gold']
+
+def _inputs(num_portfolios=300, seed=0):
+    rng = np.random.default_rng(seed)
+    weights = rng.dirichlet(np.ones(len(ASSETS)), size=num_portfolios)
+    mean = np.array([0.0004, 0.0003, 0.0001, 0.0002])
+    vols = np.array([0.012, 0.014, 0.004, 0.009])
+    corr = np.full((4, 4), 0.3) + 0.7 * np.eye(4)
+    return weights, mean, corr * np.outer(vols, vols)
+
+def test_results_independent_of_workers():
+    """Test that worker count and task size do not change the results."""
+    weights, mean, cov = _inputs()
+    scenarios = standard_scenarios(ASSETS)
+    serial = run_stress_tests(weights, mean, cov, scenarios, num_paths=2000, seed=7, portfolios_per_task=64)
+    parallel = run_stress_tests(weights, mean, cov, scenarios, num_paths=2000, seed=7, num_workers=2,
+                                portfolios_per_task=100)
+
+    assert serial.var.shape == (len(scenarios), 300), "Results have incorrect shape"
+    for name in ['expected_pnl', 'var', 'cvar', 'worst']:
+        assert np.array_equal(getattr(serial, name), getattr(parallel, name)), f"{name} depends on workers"
+
+def test_shared_memory_inputs(monkeypatch):
+    """Test that inputs above the size threshold are sent through shared memory."""
+    import utils.stress as stress
+    monkeypatch.setattr(stress, 'SHARED_MIN_BYTES', 0)
+    weights, mean, cov = _inputs(num_portfolios=50)
+    result = run_stress_tests(weights, mean, cov, standard_scenarios(ASSETS), num_paths=500, seed=1, num_workers=2)
+    reference = run_stress_tests(weights, mean, cov, standard_scenarios(ASSETS), num_paths=500, seed=1)
+
+    assert result.stats['shared_bytes'] == weights.nbytes + mean.nbytes + cov.nbytes, "Inputs not shared"
+    assert np.array_equal(result.cvar, reference.cvar), "Shared inputs changed results"
+
+def test_shock_and_risk_ordering():
+    """Test that shocks shift P&L and CVaR dominates VaR."""
+    weights, mean, cov = _inputs(num_portfolios=20)
+    calm = StressScenario('Calm', np.zeros(4))
+    crash = StressScenario('Crash', np.array([-0.3, -0.3, 0.0, 0.0]), vol_multiplier=2.0)
+    result = run_stress_tests(weights, mean, cov, [calm, crash], num_paths=4000, seed=3)
+
+    assert (result.expected_pnl[1] < result.expected_pnl[0]).all(), "Shock did not reduce P&L"
+    assert (result.cvar >= result.var).all(), "CVaR must not be below VaR"
+    assert (result.worst >= result.cvar).all(), "Worst loss must bound CVaR"
+    assert len(result.to_frame()) == 40, "Frame needs one row per scenario and portfolio"
+
+def test_shock_size_mismatch():
+    """Test that scenarios with the wrong number of shocks are rejected."""
+    weights, mean, cov = _inputs(num_portfolios=5)
+    with pytest.raises(ValueError):
+        run_stress_tests(weights, mean, cov, [StressScenario('Bad', np.zeros(3))])
+
+def test_worker_handles_closed_and_untracked(monkeypatch):
+    """Test that a task's shared memory handles are closed afterwards and never registered with the tracker."""
+    from multiprocessing import resource_tracker, shared_memory
+    import utils.stress as stress
+    registered, closed = [], []
+    monkeypatch.setattr(resource_tracker, 'register', lambda name, rtype: registered.append(name))
+    close = shared_memory.SharedMemory.close
+    monkeypatch.setattr(shared_memory.SharedMemory, 'close', lambda shm: closed.append(shm.name) or close(shm))
+
+    values = np.arange(12.0).reshape(3, 4)
+    with stress.SharedArray(values) as shared:
+        registered.clear()
+        with pytest.raises(RuntimeError):
+            with stress._attached({'x': shared.spec, 'y': ('array', values)}) as inputs:
+                assert np.array_equal(inputs['x'], values) and inputs['y'] is values, "Inputs not attached"
+                raise RuntimeError("task failed")
+        assert shared.spec[1] in closed, "Worker handle was not closed after a failing task"
+        assert registered == [], "Worker attach was registered with the resource tracker"
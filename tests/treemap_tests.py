@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from utils.generate_data import generate_holdings_data
+from utils.treemap import OTHER_LABEL, build_treemap
+
+def test_node_budget_and_totals():
+    """Test that a large book fits the node budget without losing value."""
+    df = generate_holdings_data(num_positions=100_000, seed=42)
+    tree = build_treemap(df, max_nodes=1000)
+
+    assert len(tree) <= 1000, "Treemap exceeds its node budget"
+    assert tree['id'].is_unique, "Node ids must be unique"
+    assert set(tree.loc[tree['parent'] != '', 'parent']) <= set(tree['id']), "Dangling parent"
+    assert (tree['label'] == OTHER_LABEL).any(), "Tail funds were not folded"
+    for depth in [1, 2, 3]:
+        level = tree[tree['depth'] == depth]
+        assert np.isclose(level['value'].sum(), df['Market_Value'].sum()), f"Depth {depth} loses value"
+        assert level['count'].sum() == len(df), f"Depth {depth} loses positions"
+
+def test_weighted_returns():
+    """Test value-weighted colors against a direct computation."""
+    df = pd.DataFrame({
+        'Sector': ['A', 'A', 'A', 'B'],
+        'Sub_Industry': ['x', 'x', 'y', 'z'],
+        'Fund': ['f1', 'f1', 'f2', 'f3'],
+        'Market_Value': [100.0, 300.0, 100.0, 50.0],
+        'Daily_Return': [1.0, 2.0, -1.0, 4.0],
+    })
+    tree = build_treemap(df).set_index('id')
+
+    assert np.isclose(tree.loc['A/x/f1', 'color'], 1.75), "Fund return is not value-weighted"
+    assert np.isclose(tree.loc['A', 'color'], (100 + 600 - 100) / 500), "Sector return is not value-weighted"
+    assert tree.loc['A/x', 'parent'] == 'A', "Sub-industry has the wrong parent"
+
+def test_min_value_filter():
+    """Test that positions below the minimum size are dropped before aggregation."""
+    df = generate_holdings_data(num_positions=5_000, seed=1)
+    tree = build_treemap(df, max_nodes=100_000, min_value=100_000)
+    kept = df[df['Market_Value'] >= 100_000]
+
+    assert tree.loc[tree['depth'] == 1, 'count'].sum() == len(kept), "Small positions not filtered"
+    assert np.isclose(tree.loc[tree['depth'] == 1, 'value'].sum(), kept['Market_Value'].sum())
+    assert not (tree['label'] == OTHER_LABEL).any(), "Nothing should be folded within budget"
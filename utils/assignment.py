@@ -0,0 +1,332 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+EXACT_MAX_CELLS = 250_000
+
+
+@dataclass
+class AssignmentResult:
+    """Allocation of task requirements to resources with its cost report."""
+    flows: np.ndarray
+    total_cost: float
+    lower_bound: float
+    gap: float
+    unmet_demand: float
+    seconds: float
+    method: str
+    stats: Dict[str, float] = field(default_factory=dict)
+
+
+def _validate(costs: np.ndarray,
+              resource_capacity: np.ndarray,
+              task_requirements: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    costs = np.asarray(costs)
+    capacity = np.asarray(resource_capacity, dtype=float)
+    requirements = np.asarray(task_requirements, dtype=float)
+    if costs.shape != (capacity.size, requirements.size):
+        raise ValueError(
+            f"Costs matrix shape {costs.shape} does not match "
+            f"{capacity.size} resources and {requirements.size} tasks"
+        )
+    return costs, capacity, requirements
+
+
+def _relative_gap(cost: float, bound: float) -> float:
+    return float((cost - bound) / max(abs(bound), 1e-12))
+
+
+def _empty_result(costs: np.ndarray, requirements: np.ndarray, method: str, start: float) -> AssignmentResult:
+    """Result for a problem without resources or without tasks, where nothing can flow."""
+    return AssignmentResult(
+        flows=np.zeros(costs.shape),
+        total_cost=0.0,
+        lower_bound=0.0,
+        gap=0.0,
+        unmet_demand=float(requirements.sum()),
+        seconds=time.perf_counter() - start,
+        method=method,
+        stats={},
+    )
+
+
+def solve_min_cost_flow(costs: np.ndarray,
+                        resource_capacity: np.ndarray,
+                        task_requirements: np.ndarray) -> AssignmentResult:
+    """
+    Solve the capacitated assignment exactly as a min-cost flow problem.
+
+    Resources supply their capacity, tasks demand their requirements and each
+    unit of flow from resource r to task t costs ``costs[r, t]``. Successive
+    shortest paths with node potentials are used; each shortest-path pass
+    relaxes the dense bipartite graph one whole layer at a time. With integer
+    data the optimal flows are integral.
+
+    Args:
+        costs: Cost per unit, shape (num_resources, num_tasks)
+        resource_capacity: Units available per resource
+        task_requirements: Units needed per task
+
+    Returns:
+        AssignmentResult with optimal flows (gap is zero)
+    """
+    start = time.perf_counter()
+    costs, capacity, requirements = _validate(costs, resource_capacity, task_requirements)
+    if costs.size == 0:
+        return _empty_result(costs, requirements, 'min_cost_flow', start)
+    costs = costs.astype(float)
+    num_resources, num_tasks = costs.shape
+    flows = np.zeros_like(costs)
+    supply = capacity.copy()
+    demand = requirements.copy()
+
+    # Potentials keep reduced costs c[r, t] + pi_r - pi_t non-negative
+    pi_r = np.zeros(num_resources)
+    pi_t = costs.min(axis=0)
+    augmentations = 0
+    rounds = 0
+
+    while demand.sum() > 0 and supply.sum() > 0:
+        reduced = costs + pi_r[:, None] - pi_t[None, :]
+        # Arcs carrying flow have zero reduced cost, so their reverse arcs cost nothing
+        backward = np.where(flows > 0, -reduced, np.inf)
+        dist_r = np.where(supply > 0, 0.0, np.inf)
+        pred_r = np.full(num_resources, -1)
+        dist_t = np.full(num_tasks, np.inf)
+        pred_t = np.full(num_tasks, -1)
+
+        # The graph is bipartite, so shortest paths alternate resource -> task -> resource.
+        # Relax whole layers at once until resource labels stop improving. Labels only
+        # change on strict improvement so zero-cost ties cannot create predecessor cycles.
+        while True:
+            rounds += 1
+            through = dist_r[:, None] + reduced
+            via_r = np.argmin(through, axis=0)
+            reached = through[via_r, np.arange(num_tasks)]
+            improved = reached < dist_t
+            dist_t[improved] = reached[improved]
+            pred_t[improved] = via_r[improved]
+            back = dist_t[None, :] + backward
+            via = np.argmin(back, axis=1)
+            candidate = back[np.arange(num_resources), via]
+            better = candidate < dist_r
+            if not better.any():
+                break
+            dist_r[better] = candidate[better]
+            pred_r[better] = via[better]
+
+        open_tasks = np.flatnonzero(demand > 0)
+        sink = int(open_tasks[np.argmin(dist_t[open_tasks])])
+        limit = dist_t[sink]
+        if limit == np.inf:
+            break
+
+        # Update potentials, capping nodes beyond the sink at the sink distance
+        pi_r += np.minimum(dist_r, limit)
+        pi_t += np.minimum(dist_t, limit)
+
+        # Walk the path back to its source resource to find the bottleneck
+        path = []
+        t = sink
+        while True:
+            r = int(pred_t[t])
+            path.append((r, t))
+            if pred_r[r] < 0:
+                break
+            t = int(pred_r[r])
+            path.append((r, t))
+        source = path[-1][0]
+        amount = min(supply[source], demand[sink])
+        for i in range(1, len(path), 2):
+            r, t = path[i]
+            amount = min(amount, flows[r, t])
+
+        for i, (r, t) in enumerate(path):
+            flows[r, t] += amount if i % 2 == 0 else -amount
+        supply[source] -= amount
+        demand[sink] -= amount
+        augmentations += 1
+
+    total_cost = float((flows * costs).sum())
+    return AssignmentResult(
+        flows=flows,
+        total_cost=total_cost,
+        lower_bound=total_cost,
+        gap=0.0,
+        unmet_demand=float(demand.sum()),
+        seconds=time.perf_counter() - start,
+        method='min_cost_flow',
+        stats={'augmentations': augmentations, 'relaxation_rounds': rounds},
+    )
+
+
+def _lagrangian_bound(costs: np.ndarray,
+                      capacity: np.ndarray,
+                      requirements: np.ndarray,
+                      multipliers: np.ndarray,
+                      chunk_size: int) -> Tuple[float, np.ndarray, np.ndarray]:
+    """
+    Evaluate the Lagrangian relaxation of the capacity constraints.
+
+    Each task is served entirely by its cheapest resource under the priced
+    costs ``costs + multipliers``; the dual value is a lower bound on the
+    optimal cost. Tasks are processed in column chunks to bound memory.
+    """
+    loads = np.zeros(capacity.size)
+    choice = np.empty(requirements.size, dtype=np.int64)
+    value = 0.0
+    for start in range(0, requirements.size, chunk_size):
+        block = slice(start, start + chunk_size)
+        priced = costs[:, block] + multipliers[:, None]
+        best = np.argmin(priced, axis=0)
+        choice[block] = best
+        value += float(priced[best, np.arange(best.size)] @ requirements[block])
+        loads += np.bincount(best, weights=requirements[block], minlength=capacity.size)
+    return value - float(multipliers @ capacity), loads, choice
+
+
+def _greedy_repair(costs: np.ndarray,
+                   capacity: np.ndarray,
+                   requirements: np.ndarray,
+                   multipliers: np.ndarray,
+                   chunk_size: int) -> Tuple[Dict[Tuple[int, int], float], float, float]:
+    """
+    Build a feasible allocation, serving tasks with the largest regret first.
+
+    Regret is the gap between a task's best and second-best priced resource,
+    so tasks that would lose most from a fallback are placed first. Each task
+    fills its cheapest resources with remaining capacity, splitting if needed.
+    """
+    num_resources = capacity.size
+    regret = np.empty(requirements.size)
+    for start in range(0, requirements.size, chunk_size):
+        block = slice(start, start + chunk_size)
+        priced = costs[:, block] + multipliers[:, None]
+        if num_resources > 1:
+            two = np.partition(priced, 1, axis=0)[:2]
+            regret[block] = (two[1] - two[0]) * requirements[block]
+        else:
+            regret[block] = 0.0
+    order = np.argsort(-regret, kind='stable')
+
+    remaining = capacity.copy()
+    allocation: Dict[Tuple[int, int], float] = {}
+    total_cost = 0.0
+    unmet = 0.0
+    for start in range(0, order.size, chunk_size):
+        tasks = order[start:start + chunk_size]
+        # One contiguous (tasks x resources) block keeps the per-task scans cheap
+        block_costs = np.ascontiguousarray(costs[:, tasks].T, dtype=float)
+        block_priced = block_costs + multipliers
+        for row, t in enumerate(tasks):
+            need = requirements[t]
+            priced = np.where(remaining > 0, block_priced[row], np.inf)
+            while need > 0:
+                r = int(np.argmin(priced))
+                if priced[r] == np.inf:
+                    unmet += need
+                    break
+                amount = min(need, remaining[r])
+                allocation[(r, int(t))] = allocation.get((r, int(t)), 0.0) + amount
+                total_cost += amount * block_costs[row, r]
+                remaining[r] -= amount
+                need -= amount
+                if remaining[r] <= 0:
+                    priced[r] = np.inf
+    return allocation, total_cost, unmet
+
+
+def solve_lagrangian_heuristic(costs: np.ndarray,
+                               resource_capacity: np.ndarray,
+                               task_requirements: np.ndarray,
+                               max_iter: int = 50,
+                               chunk_size: int = 4096,
+                               dense_flows: Optional[bool] = None) -> AssignmentResult:
+    """
+    Fast heuristic for large capacitated assignments with a certified gap.
+
+    Subgradient ascent on the capacity multipliers yields a lower bound; the
+    best multipliers then price a regret-ordered greedy repair that produces a
+    feasible allocation. Memory beyond the cost matrix is O(num_tasks).
+
+    Args:
+        costs: Cost per unit, shape (num_resources, num_tasks)
+        resource_capacity: Units available per resource
+        task_requirements: Units needed per task
+        max_iter: Subgradient iterations (at least one, which evaluates the bound)
+        chunk_size: Number of tasks processed per vectorised block
+        dense_flows: Return a dense flow matrix (defaults to True for small problems)
+
+    Returns:
+        AssignmentResult whose gap is measured against the Lagrangian bound
+    """
+    if max_iter < 1:
+        raise ValueError("The Lagrangian heuristic needs at least one iteration")
+    start = time.perf_counter()
+    costs, capacity, requirements = _validate(costs, resource_capacity, task_requirements)
+    if costs.size == 0:
+        return _empty_result(costs, requirements, 'lagrangian', start)
+    if dense_flows is None:
+        dense_flows = costs.size <= 10_000_000
+
+    multipliers = np.zeros(capacity.size)
+    best_bound, best_multipliers = -np.inf, multipliers.copy()
+    scale = float(np.ptp(costs))
+    for iteration in range(max_iter):
+        bound, loads, _ = _lagrangian_bound(costs, capacity, requirements, multipliers, chunk_size)
+        if bound > best_bound:
+            best_bound, best_multipliers = bound, multipliers.copy()
+        subgradient = loads - capacity
+        norm = np.linalg.norm(subgradient)
+        if norm == 0:
+            break
+        # Diminishing step sizes relative to the cost range
+        step = scale / (norm * np.sqrt(iteration + 1))
+        multipliers = np.maximum(multipliers + step * subgradient, 0.0)
+    bound_seconds = time.perf_counter() - start
+
+    allocation, total_cost, unmet = _greedy_repair(costs, capacity, requirements, best_multipliers, chunk_size)
+    if dense_flows:
+        flows = np.zeros(costs.shape)
+        for (r, t), amount in allocation.items():
+            flows[r, t] = amount
+    else:
+        flows = np.array([(r, t, amount) for (r, t), amount in allocation.items()])
+
+    return AssignmentResult(
+        flows=flows,
+        total_cost=total_cost,
+        lower_bound=best_bound,
+        gap=_relative_gap(total_cost, best_bound) if unmet == 0 else np.inf,
+        unmet_demand=unmet,
+        seconds=time.perf_counter() - start,
+        method='lagrangian',
+        stats={'bound_seconds': bound_seconds, 'iterations': iteration + 1},
+    )
+
+
+def solve_assignment(costs: np.ndarray,
+                     resource_capacity: np.ndarray,
+                     task_requirements: np.ndarray,
+                     method: str = 'auto') -> AssignmentResult:
+    """
+    Allocate task requirements (e.g. capital per mandate) to capacity-limited resources.
+
+    Args:
+        costs: Cost per unit, shape (num_resources, num_tasks)
+        resource_capacity: Units available per resource
+        task_requirements: Units needed per task
+        method: 'exact', 'heuristic' or 'auto' (exact up to EXACT_MAX_CELLS cells)
+
+    Returns:
+        AssignmentResult with flows, cost, optimality gap and wall time
+    """
+    if method == 'auto':
+        method = 'exact' if np.size(costs) <= EXACT_MAX_CELLS else 'heuristic'
+    if method == 'exact':
+        return solve_min_cost_flow(costs, resource_capacity, task_requirements)
+    if method == 'heuristic':
+        return solve_lagrangian_heuristic(costs, resource_capacity, task_requirements)
+    raise ValueError(f"Unknown assignment method: {method}")
@@ -0,0 +1,222 @@
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Dict, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Target weights per asset class for the classic static allocations
+PRESET_WEIGHTS = {
+    '60/40': {'US Stocks': 0.60, 'Bonds': 0.40},
+    'Three-Fund': {'US Stocks': 0.48, 'International Stocks': 0.32, 'Bonds': 0.20},
+    'All-Weather': {'US Stocks': 0.30, 'Long-Term Bonds': 0.40, 'Intermediate Bonds': 0.15,
+                    'Gold': 0.075, 'Commodities': 0.075},
+}
+
+# Calendar rebalance intervals in trading days (0 disables calendar rebalancing)
+REBALANCE_PERIODS = {'never': 0, 'monthly': 21, 'quarterly': 63, 'annual': 252}
+
+
+@dataclass
+class BacktestResult:
+    """Simulated value paths of a batch of strategy variants and their trading report."""
+    values: np.ndarray
+    final_weights: np.ndarray
+    turnover: np.ndarray
+    costs: np.ndarray
+    num_rebalances: np.ndarray
+    seconds: float
+
+
+def preset_weights(name: str, assets: Sequence[str]) -> np.ndarray:
+    """
+    Align a preset allocation to the columns of an asset-return matrix.
+
+    Args:
+        name: Key of PRESET_WEIGHTS, e.g. '60/40'
+        assets: Asset names in column order
+
+    Returns:
+        Array of shape (N,) with zero weight on assets the preset does not hold
+    """
+    if name not in PRESET_WEIGHTS:
+        raise ValueError(f"Unknown preset: {name}")
+    missing = set(PRESET_WEIGHTS[name]) - set(assets)
+    if missing:
+        raise ValueError(f"Preset {name} needs assets {sorted(missing)}")
+    return np.array([PRESET_WEIGHTS[name].get(asset, 0.0) for asset in assets])
+
+
+def schedule_from_rebalances(indices: Sequence[int],
+                             weights: np.ndarray,
+                             num_periods: int) -> np.ndarray:
+    """
+    Forward-fill optimizer output into a per-period target weight schedule.
+
+    Weights decided at the close of period ``indices[k]`` become the target
+    from the next period on; earlier periods use the first weights.
+
+    Args:
+        indices: Period index of each decision, e.g. the 'index' entries of a rolling report
+        weights: Decided weights, shape (R, N)
+        num_periods: Length T of the return matrix
+
+    Returns:
+        Array of shape (T, 1, N) that broadcasts across strategy variants
+    """
+    weights = np.asarray(weights, dtype=float)
+    effective = np.asarray(indices) + 1
+    position = np.searchsorted(effective, np.arange(num_periods), side='right') - 1
+    return weights[np.maximum(position, 0)][:, None, :]
+
+
+def strategy_grid(weights: Dict[str, np.ndarray],
+                  rebalance_every: Sequence[int] = (0,),
+                  thresholds: Sequence[float] = (0.0,),
+                  costs_bps: Sequence[float] = (0.0,)) -> Tuple[pd.DataFrame, Dict[str, np.ndarray]]:
+    """
+    Build the cartesian product of allocations and trading rules.
+
+    Args:
+        weights: Static target weights of shape (N,) keyed by strategy name
+        rebalance_every: Calendar intervals in periods (0 = no calendar trigger)
+        thresholds: Drift bands as absolute weight deviation (0 = no threshold trigger)
+        costs_bps: Proportional transaction costs in basis points of traded value
+
+    Returns:
+        Tuple of (one row of parameters per variant, keyword arguments for run_backtest)
+    """
+    rows = list(itertools.product(weights, rebalance_every, thresholds, costs_bps))
+    params = pd.DataFrame(rows, columns=['strategy', 'rebalance_every', 'threshold', 'cost_bps'])
+    kwargs = {
+        'weights': np.stack([np.asarray(weights[name], dtype=float) for name in params['strategy']]),
+        'rebalance_every': params['rebalance_every'].to_numpy(),
+        'threshold': params['threshold'].to_numpy(dtype=float),
+        'cost_bps': params['cost_bps'].to_numpy(dtype=float),
+    }
+    return params, kwargs
+
+
+def run_backtest(returns: Union[np.ndarray, pd.DataFrame],
+                 weights: np.ndarray,
+                 rebalance_every: Union[int, np.ndarray] = 0,
+                 threshold: Union[float, np.ndarray] = 0.0,
+                 cost_bps: Union[float, np.ndarray] = 0.0,
+                 initial_value: float = 1.0,
+                 dtype=np.float64) -> BacktestResult:
+    """
+    Backtest many rebalanced strategies over one asset-return history at once.
+
+    Holdings drift with asset returns each period. A variant rebalances back
+    to its targets at the close of a period when its calendar interval has
+    elapsed or when any weight has drifted more than its threshold from
+    target. Trading costs ``cost_bps`` on the traded value and are paid out
+    of the portfolio. Only the time axis is a Python loop; every step is
+    vectorised across variants and assets.
+
+    Args:
+        returns: T x N matrix of simple asset returns
+        weights: Targets of shape (N,), (S, N) per variant, or (T, S, N) per period
+        rebalance_every: Calendar interval in periods, scalar or shape (S,)
+        threshold: Maximum absolute weight drift, scalar or shape (S,)
+        cost_bps: Transaction cost in basis points, scalar or shape (S,)
+        initial_value: Starting portfolio value of every variant
+        dtype: Floating point dtype of the value paths
+
+    Returns:
+        BacktestResult with values of shape (S, T) and per-variant trading totals
+    """
+    start = time.perf_counter()
+    returns = np.asarray(returns, dtype=float)
+    num_periods, num_assets = returns.shape
+    weights = np.asarray(weights, dtype=float)
+    if weights.shape[-1] != num_assets:
+        raise ValueError(f"Weights have {weights.shape[-1]} assets but returns have {num_assets}")
+    time_varying = weights.ndim == 3
+    if time_varying and weights.shape[0] != num_periods:
+        raise ValueError(f"Weight schedule covers {weights.shape[0]} periods, returns have {num_periods}")
+
+    static_count = weights.shape[-2] if weights.ndim > 1 else 1
+    num_variants = max(static_count, *(np.size(x) for x in (rebalance_every, threshold, cost_bps)))
+    every = np.broadcast_to(np.asarray(rebalance_every, dtype=np.int64), (num_variants,))
+    band = np.broadcast_to(np.asarray(threshold, dtype=float), (num_variants,))
+    cost_rate = np.broadcast_to(np.asarray(cost_bps, dtype=float), (num_variants,)) / 10_000.0
+    targets = np.broadcast_to(weights[0] if time_varying else weights, (num_variants, num_assets))
+
+    calendar = every > 0
+    period = np.where(calendar, every, 1)
+    use_band = band > 0
+    check_bands = use_band.any()
+
+    growth = 1.0 + returns
+    holdings = targets * initial_value
+    values = np.empty((num_variants, num_periods), dtype=dtype)
+    turnover = np.zeros(num_variants)
+    costs = np.zeros(num_variants)
+    num_rebalances = np.zeros(num_variants, dtype=np.int64)
+
+    for t in range(num_periods):
+        holdings *= growth[t]
+        value = holdings.sum(axis=1)
+        if time_varying:
+            targets = np.broadcast_to(weights[t], (num_variants, num_assets))
+
+        due = calendar & ((t + 1) % period == 0)
+        if check_bands:
+            drift = np.abs(holdings - targets * value[:, None]).max(axis=1)
+            due |= use_band & (drift > band * np.abs(value))
+        if due.any():
+            rows = np.flatnonzero(due)
+            before = value[rows]
+            traded = np.abs(targets[rows] * before[:, None] - holdings[rows]).sum(axis=1)
+            paid = traded * cost_rate[rows]
+            value[rows] = before - paid
+            holdings[rows] = targets[rows] * value[rows, None]
+            turnover[rows] += traded / np.where(before != 0, before, 1.0)
+            costs[rows] += paid
+            num_rebalances[rows] += 1
+        values[:, t] = value
+
+    final_value = values[:, -1:] if num_periods else np.ones((num_variants, 1))
+    return BacktestResult(
+        values=values,
+        final_weights=holdings / np.where(final_value != 0, final_value, 1.0),
+        turnover=turnover,
+        costs=costs,
+        num_rebalances=num_rebalances,
+        seconds=time.perf_counter() - start,
+    )
+
+
+def summarize_backtest(result: BacktestResult,
+                       periods_per_year: int = 252,
+                       initial_value: float = 1.0) -> pd.DataFrame:
+    """
+    Annualised performance and trading statistics per strategy variant.
+
+    Args:
+        result: Output of run_backtest
+        periods_per_year: Number of return periods in a year (252 for daily data)
+        initial_value: Starting value used in the backtest
+
+    Returns:
+        DataFrame with one row per variant
+    """
+    values = result.values
+    previous = np.concatenate([np.full((values.shape[0], 1), initial_value), values[:, :-1]], axis=1)
+    period_returns = values / previous - 1.0
+    years = values.shape[1] / periods_per_year
+    running_peak = np.maximum.accumulate(np.maximum(values, initial_value), axis=1)
+    vol = period_returns.std(axis=1) * np.sqrt(periods_per_year)
+    mean = period_returns.mean(axis=1) * periods_per_year
+    return pd.DataFrame({
+        'final_value': values[:, -1],
+        'cagr': (values[:, -1] / initial_value) ** (1.0 / years) - 1.0,
+        'volatility': vol,
+        'sharpe': np.divide(mean, vol, out=np.zeros_like(mean), where=vol > 0),
+        'max_drawdown': (values / running_peak - 1.0).min(axis=1),
+        'turnover': result.turnover,
+        'costs': result.costs,
+        'rebalances': result.num_rebalances,
+    })
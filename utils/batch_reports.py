@@ -0,0 +1,276 @@
+"""
+Headless batch rendering of allocation reports for many client portfolios.
+
+Usage:
+    python -m utils.batch_reports --num-clients 5000 --output reports.zip --workers 8
+    python -m utils.batch_reports --clients clients.csv --output reports/ --format html
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.reports import fan_chart_svg, make_renderer, render_client_report_html, risk_profile
+from utils.simulation import simulate_percentile_bands
+
+STAGES = ('data', 'chart', 'render', 'write')
+CLIENT_COLUMNS = ('client_id', 'risk_level', 'investment_period', 'initial_value')
+# Client ids become file names, so they may not contain separators or start with a dot
+CLIENT_ID_PATTERN = re.compile(r'[A-Za-z0-9_-][A-Za-z0-9_.-]{0,127}')
+INVESTMENT_PERIODS = {
+    'Short-term (1-3 years)': 36,
+    'Medium-term (3-7 years)': 84,
+    'Long-term (7+ years)': 120,
+}
+
+# Renderer built once per worker process by the pool initializer
+_WORKER: Dict[str, Any] = {}
+
+
+def generate_clients(num_clients: int, seed: Optional[int] = None) -> pd.DataFrame:
+    """
+    Generate synthetic client portfolios.
+
+    Args:
+        num_clients: Number of clients
+        seed: Random seed for reproducibility
+
+    Returns:
+        DataFrame with client_id, risk_level, investment_period and initial_value
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'client_id': [f'C{i:06d}' for i in range(num_clients)],
+        'risk_level': rng.integers(1, 11, num_clients),
+        'investment_period': rng.choice(list(INVESTMENT_PERIODS), num_clients),
+        'initial_value': np.round(rng.lognormal(12, 1, num_clients), -2),
+    })
+
+
+def check_client_ids(clients: pd.DataFrame) -> None:
+    """Raise ValueError unless every client_id is a unique, safe file name."""
+    ids = clients['client_id']
+    bad = [client_id for client_id in ids
+           if pd.isna(client_id) or not CLIENT_ID_PATTERN.fullmatch(str(client_id))]
+    if bad:
+        raise ValueError(f"Client ids may only use letters, digits, '_', '-' and '.' "
+                         f"(and not start with '.'): {', '.join(map(repr, bad[:5]))}")
+    ids = ids.astype(str)
+    duplicated = ids[ids.duplicated()].unique().tolist()
+    if duplicated:
+        raise ValueError(f"Duplicate client ids: {', '.join(duplicated[:5])}")
+
+
+def load_clients(path: str) -> pd.DataFrame:
+    """
+    Read a client table from CSV and validate it.
+
+    Raises:
+        ValueError: If columns are missing or a client_id is not a safe, unique file name
+    """
+    clients = pd.read_csv(path, dtype={'client_id': str})
+    missing = [column for column in CLIENT_COLUMNS if column not in clients.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    check_client_ids(clients)
+    return clients
+
+
+def _init_worker(fmt: str, num_scenarios: int) -> None:
+    _WORKER['renderer'] = make_renderer(fmt)
+    _WORKER['num_scenarios'] = num_scenarios
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def render_client(client: Dict[str, Any], path: str) -> Dict[str, float]:
+    """
+    Produce one client's report file and time each stage.
+
+    Runs inside a worker; the renderer comes from the pool initializer. The
+    file is written under a temporary name and renamed, so a crash never
+    leaves a partial report behind to be mistaken for a finished one.
+
+    Returns:
+        Seconds spent per stage in STAGES
+    """
+    timings = {}
+    start = time.perf_counter()
+    mean, vol = risk_profile(int(client['risk_level']))
+    periods = INVESTMENT_PERIODS.get(client['investment_period'], 60)
+    seed = zlib.crc32(str(client['client_id']).encode('utf-8'))
+    result = simulate_percentile_bands(mean, vol, _WORKER['num_scenarios'], periods, seed=seed,
+                                       initial_value=float(client['initial_value']))
+    timings['data'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chart = fan_chart_svg(result['bands'])
+    timings['chart'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    output = _WORKER['renderer'](render_client_report_html(client, result['percentiles'], result['bands'], chart))
+    timings['render'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _write_atomic(path, output)
+    timings['write'] = time.perf_counter() - start
+    return timings
+
+
+def run_batch(clients: pd.DataFrame,
+              output: str,
+              fmt: str = 'pdf',
+              num_workers: int = 1,
+              num_scenarios: int = 2_000,
+              progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Render reports for every client, skipping the ones already finished.
+
+    Reports are written to a directory as they complete. When ``output``
+    ends in .zip they are staged in ``<output>.parts`` and packed into the
+    archive once all are done, so an interrupted run resumes from the staged
+    files instead of from a half-written archive.
+
+    Args:
+        clients: Client table as returned by generate_clients
+        output: Output directory or .zip path
+        fmt: 'pdf' or 'html'
+        num_workers: Worker processes (1 renders in-process)
+        num_scenarios: Monte Carlo scenarios per report
+        progress: Optional callback receiving (completed, total)
+
+    Returns:
+        Dictionary with counts, wall time and per-stage timing statistics
+
+    Raises:
+        ValueError: If a client_id is not a safe, unique file name (see check_client_ids)
+    """
+    check_client_ids(clients)
+    start = time.perf_counter()
+    as_zip = output.endswith('.zip')
+    directory = output + '.parts' if as_zip else output
+    os.makedirs(directory, exist_ok=True)
+
+    # Reports already packed by an earlier completed run count as finished too
+    packed = set()
+    if as_zip and os.path.exists(output):
+        with zipfile.ZipFile(output) as archive:
+            packed = set(archive.namelist())
+
+    records = clients.to_dict('records')
+    paths = [os.path.join(directory, f"{client['client_id']}.{fmt}") for client in records]
+    todo = [(client, path) for client, path in zip(records, paths)
+            if not os.path.exists(path) and os.path.basename(path) not in packed]
+
+    timings: List[Dict[str, float]] = []
+    if num_workers <= 1:
+        _init_worker(fmt, num_scenarios)
+        for client, path in todo:
+            timings.append(render_client(client, path))
+            if progress is not None:
+                progress(len(timings), len(todo))
+    else:
+        with ProcessPoolExecutor(num_workers, initializer=_init_worker, initargs=(fmt, num_scenarios)) as executor:
+            chunksize = max(1, len(todo) // (num_workers * 16))
+            for stage_times in executor.map(render_client, *zip(*todo), chunksize=chunksize) if todo else []:
+                timings.append(stage_times)
+                if progress is not None:
+                    progress(len(timings), len(todo))
+
+    pack_seconds = 0.0
+    if as_zip:
+        pack_start = time.perf_counter()
+        tmp_zip = output + '.tmp'
+        with zipfile.ZipFile(tmp_zip, 'w', zipfile.ZIP_DEFLATED) as archive:
+            if packed:
+                with zipfile.ZipFile(output) as previous:
+                    for name in previous.namelist():
+                        archive.writestr(previous.getinfo(name), previous.read(name))
+            for path in paths:
+                if os.path.exists(path) and os.path.basename(path) not in packed:
+                    archive.write(path, os.path.basename(path))
+        os.replace(tmp_zip, output)
+        shutil.rmtree(directory)
+        pack_seconds = time.perf_counter() - pack_start
+
+    table = np.array([[t[stage] for stage in STAGES] for t in timings]).reshape(-1, len(STAGES))
+    return {
+        'total': len(records),
+        'rendered': len(todo),
+        'skipped': len(records) - len(todo),
+        'wall_seconds': time.perf_counter() - start,
+        'pack_seconds': pack_seconds,
+        'stages': {
+            stage: {
+                'total': float(table[:, i].sum()),
+                'mean': float(table[:, i].mean()) if len(table) else 0.0,
+                'p95': float(np.percentile(table[:, i], 95)) if len(table) else 0.0,
+            }
+            for i, stage in enumerate(STAGES)
+        },
+    }
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    lines = [
+        f"Rendered {summary['rendered']} of {summary['total']} reports "
+        f"({summary['skipped']} already done) in {summary['wall_seconds']:.1f}s",
+        f"{'stage':<8}{'total s':>10}{'mean ms':>10}{'p95 ms':>10}",
+    ]
+    for stage, stats in summary['stages'].items():
+        lines.append(f"{stage:<8}{stats['total']:>10.2f}{stats['mean'] * 1e3:>10.2f}{stats['p95'] * 1e3:>10.2f}")
+    if summary['pack_seconds']:
+        lines.append(f"zip packing: {summary['pack_seconds']:.2f}s")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Render allocation reports for many client portfolios.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--clients', help="CSV with client_id, risk_level, investment_period, initial_value")
+    source.add_argument('--num-clients', type=int, help="Generate this many synthetic clients")
+    parser.add_argument('--output', required=True, help="Output directory, or a path ending in .zip")
+    parser.add_argument('--format', choices=['pdf', 'html'], default='pdf')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--scenarios', type=int, default=2_000, help="Monte Carlo scenarios per report")
+    parser.add_argument('--seed', type=int, default=42, help="Seed for synthetic clients")
+    args = parser.parse_args(argv)
+
+    if args.clients:
+        try:
+            clients = load_clients(args.clients)
+        except ValueError as e:
+            parser.error(f"{args.clients}: {e}")
+    else:
+        clients = generate_clients(args.num_clients, args.seed)
+
+    def progress(done: int, total: int) -> None:
+        if done == total or done % 100 == 0:
+            print(f"\r{done}/{total} reports", end='\n' if done == total else '', file=sys.stderr, flush=True)
+
+    summary = run_batch(clients, args.output, args.format, args.workers, args.scenarios, progress)
+    print(format_summary(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
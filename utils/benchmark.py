@@ -0,0 +1,328 @@
+"""
+Timing harness for data generation, simulation and the page data paths.
+
+Usage:
+    python -m utils.benchmark                    # full size sweep, appended to the history
+    python -m utils.benchmark --quick --filter generate
+    python -m utils.benchmark --fail-on-regression --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.covariance import estimate_covariance
+from utils.generate_data import (
+    generate_allocation_data,
+    generate_heatmap_data,
+    generate_holdings_data,
+    generate_performance_data,
+    generate_time_series_data,
+)
+from utils.hierarchy import HoldingsIndex
+from utils.market_model import generate_market_returns
+from utils.optimize import efficient_frontier, estimate_moments, series_to_returns
+from utils.rolling import WINDOWS, rolling_risk_metrics
+from utils.sensitivity import sweep, sweep_axis
+from utils.signals import SIGNALS, TRADING_DAYS
+from utils.simulation import simulate_percentile_bands
+from utils.treemap import build_treemap
+
+HISTORY_PATH = os.path.join('.benchmarks', 'history.jsonl')
+DEFAULT_THRESHOLD = 0.2
+
+
+@dataclass
+class Benchmark:
+    """
+    One timed operation swept over a size parameter.
+
+    ``setup(size)`` does any untimed preparation and returns the zero-argument
+    callable that is timed.
+    """
+    name: str
+    group: str
+    param: str
+    sizes: Sequence[int]
+    setup: Callable[[int], Callable[[], Any]]
+
+
+@dataclass
+class BenchmarkResult:
+    """Timing statistics of one benchmark at one size, in seconds per call."""
+    name: str
+    group: str
+    param: str
+    size: int
+    loops: int
+    repeat: int
+    min: float
+    median: float
+    mean: float
+    stdev: float
+
+
+def _allocation_page(num_scenarios: int) -> Callable[[], Any]:
+    return lambda: simulate_percentile_bands(0.007, 0.04, num_scenarios, 120, seed=42, path_metrics=True)
+
+
+def _heatmap_page(num_positions: int) -> Callable[[], Any]:
+    positions = generate_holdings_data(num_positions, seed=42)
+    return lambda: build_treemap(positions, max_nodes=2_000)
+
+
+def _drill_down(num_positions: int) -> Callable[[], Any]:
+    positions = generate_holdings_data(num_positions, seed=42)
+    index = HoldingsIndex(positions)
+    rng = np.random.default_rng(42)
+
+    def run():
+        # One drill-down step plus a batch of position updates, as on the heatmap page
+        changed = rng.integers(0, num_positions, 100)
+        index.update(changed, rng.lognormal(11, 1.2, 100))
+        return index.subtree('Technology'), index.children('Technology'), index.top_k('Technology', 10)
+    return run
+
+
+def _index_page(num_months: int) -> Callable[[], Any]:
+    def run():
+        history = generate_performance_data('2000-01-01', periods=num_months + max(WINDOWS), seed=42)
+        return rolling_risk_metrics(history['Fund'].to_numpy(), history['Index'].to_numpy(), 36)
+    return run
+
+
+def _frontier_page(num_assets: int) -> Callable[[], Any]:
+    series_data = generate_time_series_data(750, num_assets, seed=42)
+
+    def run():
+        returns = series_to_returns(series_data)
+        mu, _ = estimate_moments(returns)
+        cov = estimate_covariance(returns, 'ledoit_wolf', ridge=1e-6)
+        return efficient_frontier(mu, cov, num_points=50, long_only=True)
+    return run
+
+
+def _signal(name: str) -> Callable[[int], Callable[[], Any]]:
+    def setup(num_assets: int) -> Callable[[], Any]:
+        returns = generate_market_returns(20 * TRADING_DAYS, num_assets, seed=42)['returns']
+        return lambda: SIGNALS[name](returns)
+    return setup
+
+
+BENCHMARKS = [
+    Benchmark('generate_allocation_data', 'generate', 'num_resources', (10, 100, 1_000),
+              lambda n: lambda: generate_allocation_data(n, 2 * n, seed=42)),
+    Benchmark('generate_heatmap_data', 'generate', 'num_points', (100, 500, 2_000),
+              lambda n: lambda: generate_heatmap_data(n, seed=42)),
+    Benchmark('generate_time_series_data', 'generate', 'num_days', (365, 3_650, 36_500),
+              lambda n: lambda: generate_time_series_data(n, 3, seed=42)),
+    Benchmark('generate_performance_data', 'generate', 'periods', (36, 360, 3_600),
+              lambda n: lambda: generate_performance_data('2000-01-01', periods=n, seed=42)),
+    Benchmark('generate_holdings_data', 'generate', 'num_positions', (10_000, 50_000, 250_000),
+              lambda n: lambda: generate_holdings_data(n, seed=42)),
+    Benchmark('generate_market_returns', 'generate', 'num_assets', (100, 1_000, 5_000),
+              lambda n: lambda: generate_market_returns(1_000, n, seed=42)),
+    Benchmark('allocation_page', 'page', 'num_scenarios', (10_000, 100_000), _allocation_page),
+    Benchmark('heatmap_page', 'page', 'num_positions', (50_000, 250_000), _heatmap_page),
+    Benchmark('sensitivity_sweep', 'page', 'grid_points', (11, 21),
+              lambda n: lambda: sweep('equity_weight', sweep_axis('equity_weight', n),
+                                      'threshold', sweep_axis('threshold', n), fixed={'horizon': 6})),
+    Benchmark('drill_down', 'page', 'num_positions', (250_000, 1_000_000), _drill_down),
+    Benchmark('index_performance_page', 'page', 'num_months', (36, 360), _index_page),
+    Benchmark('efficient_frontier_page', 'page', 'num_assets', (20, 100), _frontier_page),
+] + [Benchmark(f'{name}_signal', 'signal', 'num_assets', (300, 3_000), _signal(name)) for name in SIGNALS]
+
+
+def time_callable(func: Callable[[], Any],
+                  repeat: int = 5,
+                  min_time: float = 0.05) -> Dict[str, float]:
+    """
+    Time a callable, calibrating the loop count like timeit.autorange.
+
+    Args:
+        func: Zero-argument callable to time
+        repeat: Number of timed samples
+        min_time: Minimum duration of one sample in seconds
+
+    Returns:
+        Dictionary with loops and min/median/mean/stdev seconds per call
+    """
+    func()  # warm-up: imports, allocator and lazily built state
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops)
+    return {
+        'loops': loops,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def run_benchmarks(benchmarks: Sequence[Benchmark] = BENCHMARKS,
+                   pattern: Optional[str] = None,
+                   quick: bool = False,
+                   repeat: int = 5,
+                   min_time: float = 0.05) -> List[BenchmarkResult]:
+    """
+    Run benchmarks over their size sweeps.
+
+    Args:
+        benchmarks: Benchmarks to consider
+        pattern: Only run benchmarks whose name or group contains this string
+        quick: Only run the smallest size of each benchmark
+        repeat: Timed samples per size
+        min_time: Minimum duration of one sample in seconds
+
+    Returns:
+        One BenchmarkResult per benchmark and size
+    """
+    results = []
+    for bench in benchmarks:
+        if pattern and pattern not in bench.name and pattern != bench.group:
+            continue
+        for size in bench.sizes[:1] if quick else bench.sizes:
+            stats = time_callable(bench.setup(size), repeat, min_time)
+            results.append(BenchmarkResult(bench.name, bench.group, bench.param, size, repeat=repeat, **stats))
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    """Commit, machine and library versions recorded with every run."""
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'machine': platform.node(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def save_run(results: Sequence[BenchmarkResult],
+             path: str = HISTORY_PATH,
+             env: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Append one run as a JSON line to the history file and return the record."""
+    record = {'env': env or environment(), 'results': [asdict(result) for result in results]}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    return record
+
+
+def load_history(path: str = HISTORY_PATH) -> List[Dict[str, Any]]:
+    """All recorded runs, oldest first; missing files give an empty history."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_runs(baseline: Dict[str, Any],
+                 current: Dict[str, Any],
+                 threshold: float = DEFAULT_THRESHOLD) -> pd.DataFrame:
+    """
+    Compare median timings of two recorded runs.
+
+    Args:
+        baseline: Earlier run record from load_history
+        current: Later run record
+        threshold: Relative slowdown flagged as a regression (0.2 means 20%)
+
+    Returns:
+        DataFrame with name, size, both medians, their ratio and a regression
+        flag for every benchmark present in both runs
+    """
+    columns = ['name', 'size', 'median']
+    before = pd.DataFrame(baseline['results'], columns=columns)
+    after = pd.DataFrame(current['results'], columns=columns)
+    table = before.merge(after, on=['name', 'size'], suffixes=('_baseline', '_current'))
+    table['ratio'] = table['median_current'] / table['median_baseline']
+    table['regression'] = table['ratio'] > 1.0 + threshold
+    return table
+
+
+def baseline_run(history: Sequence[Dict[str, Any]], env: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Most recent run recorded on the same machine, since timings do not transfer across hosts."""
+    for record in reversed(history):
+        if record['env'].get('machine') == env['machine'] and record['env'].get('cpu_count') == env['cpu_count']:
+            return record
+    return None
+
+
+def format_results(results: Sequence[BenchmarkResult]) -> str:
+    lines = [f"{'benchmark':<28}{'size':>10}{'loops':>8}{'median ms':>12}{'stdev ms':>12}"]
+    for r in results:
+        lines.append(f"{r.name:<28}{r.size:>10}{r.loops:>8}{r.median * 1e3:>12.3f}{r.stdev * 1e3:>12.3f}")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time data generation and page data paths.")
+    parser.add_argument('--filter', help="Only run benchmarks whose name contains this (or whose group is this)")
+    parser.add_argument('--quick', action='store_true', help="Only the smallest size of each benchmark")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.05, help="Minimum seconds per sample")
+    parser.add_argument('--history', default=HISTORY_PATH, help="JSON lines file of previous runs")
+    parser.add_argument('--no-save', action='store_true', help="Do not append this run to the history")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+
+    env = environment()
+    baseline = baseline_run(load_history(args.history), env)
+    results = run_benchmarks(pattern=args.filter, quick=args.quick, repeat=args.repeat, min_time=args.min_time)
+    print(format_results(results))
+    record = {'env': env, 'results': [asdict(result) for result in results]}
+    if not args.no_save:
+        save_run(results, args.history, env)
+
+    if baseline is None:
+        return 0
+    table = compare_runs(baseline, record, args.threshold)
+    commit = (baseline['env'].get('commit') or 'unknown')[:10]
+    print(f"\nCompared with {commit} ({baseline['env']['timestamp']}):")
+    print(table.to_string(index=False, float_format=lambda x: f'{x:.4g}'))
+    regressions = table[table['regression']]
+    if len(regressions):
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}", file=sys.stderr)
+        return 1 if args.fail_on_regression else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+import dataclasses
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.snapshot import SUFFIX as SNAPSHOT_SUFFIX, load_snapshot, save_snapshot
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+CACHE_DIR_ENV = 'PORTFOLIO_CACHE_DIR'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _normalize(value: Any) -> Any:
+    """Turn call arguments into a deterministic, hashable representation."""
+    if isinstance(value, np.ndarray):
+        return ('ndarray', value.dtype.str, value.shape,
+                hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest())
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return ('date', value.isoformat())
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((str(k), _normalize(v)) for k, v in value.items())))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_normalize(v) for v in value))
+    if isinstance(value, type) or callable(value):
+        return ('callable', getattr(value, '__module__', ''), getattr(value, '__qualname__', repr(value)))
+    return value
+
+
+def make_key(name: str, args: Tuple = (), kwargs: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build a stable cache key from a function name and its arguments.
+
+    Args:
+        name: Qualified name of the cached function
+        args: Positional arguments
+        kwargs: Keyword arguments
+
+    Returns:
+        Hex digest that is identical across processes for equal arguments
+    """
+    payload = repr((name, _normalize(tuple(args)), _normalize(kwargs or {})))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def estimate_nbytes(value: Any) -> int:
+    """Approximate the memory footprint of a cached value."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(v) for v in value.values()) + 64 * len(value)
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(v, (int, float, str)) for v in value[:10]):
+            return 64 * len(value)
+        return sum(estimate_nbytes(v) for v in value) + 8 * len(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        fields = dataclasses.fields(value)
+        return sum(estimate_nbytes(getattr(value, f.name)) for f in fields) + 64 * len(fields)
+    return 64
+
+
+def _freeze_array(array: np.ndarray) -> None:
+    """Mark an array and every array it views read-only."""
+    while isinstance(array, np.ndarray):
+        array.flags.writeable = False
+        array = array.base
+
+
+def _freeze(value: Any) -> Any:
+    """Mark arrays read-only so a value shared between sessions cannot be mutated."""
+    if isinstance(value, np.ndarray):
+        _freeze_array(value)
+    elif isinstance(value, pd.DataFrame):
+        for _, column in value.items():
+            _freeze_array(column.to_numpy(copy=False))
+    elif isinstance(value, pd.Series):
+        _freeze_array(value.to_numpy(copy=False))
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        for f in dataclasses.fields(value):
+            _freeze(getattr(value, f.name))
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _freeze(v)
+    return value
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache bounded by the total size of its values."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Tuple[Any, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: Any) -> None:
+        size = estimate_nbytes(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+class DiskCache:
+    """
+    On-disk cache tier shared by every process pointing at the same directory.
+
+    Arrays (and tuples/dicts of arrays) are stored as binary snapshots that
+    are memory-mapped on load, DataFrames as Parquet when pyarrow is
+    available, and anything else is pickled. Files
+    are written to a temporary name and atomically renamed, so concurrent
+    Streamlit processes never observe a partial entry.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        loaders = ((SNAPSHOT_SUFFIX, load_snapshot), ('.parquet', pd.read_parquet), ('.pkl', _load_pickle))
+        for suffix, loader in loaders:
+            path = self._path(key, suffix)
+            if os.path.exists(path):
+                try:
+                    value = loader(path)
+                except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+                    continue
+                self.hits += 1
+                return value
+        self.misses += 1
+        return default
+
+    def put(self, key: str, value: Any) -> None:
+        if _is_array_tree(value):
+            suffix, writer = SNAPSHOT_SUFFIX, save_snapshot
+        elif isinstance(value, pd.DataFrame) and HAS_PARQUET:
+            suffix, writer = '.parquet', lambda path, df: df.to_parquet(path)
+        else:
+            suffix, writer = '.pkl', _save_pickle
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            writer(tmp_path, value)
+            os.replace(tmp_path, self._path(key, suffix))
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            if name.endswith((SNAPSHOT_SUFFIX, '.parquet', '.pkl')):
+                os.unlink(os.path.join(self.directory, name))
+
+
+def _is_array_tree(value: Any) -> bool:
+    if isinstance(value, np.ndarray):
+        return value.dtype != object
+    if isinstance(value, tuple) and value:
+        return all(isinstance(v, np.ndarray) and v.dtype != object for v in value)
+    if isinstance(value, dict) and value:
+        return all(isinstance(k, str) and isinstance(v, np.ndarray) and v.dtype != object
+                   for k, v in value.items())
+    return False
+
+
+def _save_pickle(path: str, value: Any) -> None:
+    with open(path, 'wb') as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load_pickle(path: str) -> Any:
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+_default_memory = LRUCache()
+_default_disk: Optional[DiskCache] = None
+_default_lock = threading.Lock()
+
+
+def get_memory_cache() -> LRUCache:
+    """Return the process-wide in-memory cache shared by all sessions."""
+    return _default_memory
+
+
+def get_disk_cache() -> Optional[DiskCache]:
+    """Return the shared on-disk cache, enabled by setting PORTFOLIO_CACHE_DIR."""
+    global _default_disk
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if not directory:
+        return None
+    with _default_lock:
+        if _default_disk is None or _default_disk.directory != directory:
+            _default_disk = DiskCache(directory)
+        return _default_disk
+
+
+def cached(func: Optional[Callable] = None,
+           *,
+           memory: Optional[LRUCache] = None,
+           disk: Optional[DiskCache] = None,
+           use_disk: bool = True) -> Callable:
+    """
+    Memoize a data-generating function on its arguments.
+
+    Lookups go to the in-process LRU first, then to the on-disk tier, and
+    only call ``func`` on a miss in both. Returned arrays, including the
+    columns of frames and the fields of dataclasses, are read-only and
+    shared between callers, so they must be copied before being modified.
+
+    Args:
+        func: Function to wrap (allows use as ``@cached`` or ``@cached(...)``)
+        memory: In-memory tier (defaults to the process-wide cache)
+        disk: On-disk tier (defaults to PORTFOLIO_CACHE_DIR when set)
+        use_disk: Whether to consult the on-disk tier at all
+
+    Returns:
+        Wrapped function with the same signature
+    """
+    def decorator(target: Callable) -> Callable:
+        name = f'{target.__module__}.{target.__qualname__}'
+        signature = inspect.signature(target)
+
+        def call_key(*args, **kwargs) -> str:
+            # Keyed on the bound arguments, so f(1), f(x=1) and f(1, default) share one entry
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return make_key(name, (), bound.arguments)
+
+        @functools.wraps(target)
+        def wrapper(*args, **kwargs):
+            memory_tier = memory if memory is not None else get_memory_cache()
+            key = call_key(*args, **kwargs)
+            value = memory_tier.get(key)
+            if value is not None:
+                return value
+
+            disk_tier = (disk if disk is not None else get_disk_cache()) if use_disk else None
+            if disk_tier is not None:
+                value = disk_tier.get(key)
+            if value is None:
+                value = target(*args, **kwargs)
+                if disk_tier is not None:
+                    disk_tier.put(key, value)
+            value = _freeze(value)
+            memory_tier.put(key, value)
+            return value
+
+        wrapper.cache_key = call_key
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,236 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.instrument import instrumented
+from utils.startup import lazy_import
+
+go = lazy_import('plotly.graph_objects')
+
+# Points kept per trace; about twice the pixel width of a wide chart
+DEFAULT_MAX_POINTS = 2_000
+# Figures sending more points than this are drawn with WebGL traces
+WEBGL_THRESHOLD = 5_000
+# Bar charts with more categories than this are unreadable and slow, so they become lines
+BAR_LIMIT = 240
+
+
+@dataclass
+class ChartStats:
+    """Points and JSON payload of a figure before and after downsampling."""
+    points_in: int
+    points_out: int
+    webgl: bool
+    payload_bytes: int
+    full_payload_bytes: int
+
+    @property
+    def savings(self) -> float:
+        """Fraction of the full payload saved by downsampling."""
+        if not self.full_payload_bytes:
+            return 0.0
+        return 1.0 - self.payload_bytes / self.full_payload_bytes
+
+    def summary(self) -> str:
+        if self.points_out == self.points_in:
+            return (f"Showing all {self.points_in:,} points{' with WebGL' if self.webgl else ''}; "
+                    f"payload {self.payload_bytes / 1e3:,.0f} kB")
+        return (f"Showing {self.points_out:,} of {self.points_in:,} points"
+                f"{' with WebGL' if self.webgl else ''}; payload {self.payload_bytes / 1e3:,.0f} kB "
+                f"instead of ~{self.full_payload_bytes / 1e3:,.0f} kB ({self.savings:.0%} smaller)")
+
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb_indices(y: np.ndarray, n_out: int, x: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    The interior points are split into ``n_out - 2`` buckets and from each
+    the point forming the largest triangle with the previously kept point
+    and the next bucket's centroid is kept, which preserves the visual shape
+    of the line. NaN points are only kept when a bucket has nothing else.
+
+    Args:
+        y: Values, shape (n,)
+        n_out: Number of points to keep (first and last are always kept)
+        x: Optional x positions (numeric or datetime64); defaults to the index
+
+    Returns:
+        Sorted indices of the kept points
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float) if x is None else _as_float(x)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    valid = ~np.isnan(y)
+    y_filled = np.where(valid, y, 0.0)
+    valid_counts = np.add.reduceat(valid[1:n - 1], edges[:-1] - 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+        mean_y = np.add.reduceat(y_filled[1:n - 1], edges[:-1] - 1) / valid_counts
+    # Centroid of the following bucket; the last bucket looks at the final point
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        xa, ya = x[previous], y_filled[previous]
+        area = np.abs((xa - next_x[b]) * (y[lo:hi] - ya) - (xa - x[lo:hi]) * (next_y[b] - ya))
+        area = np.where(np.isnan(area), -1.0, area)
+        previous = lo + int(np.argmax(area))
+        kept[b + 1] = previous
+    return kept
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Keep the minimum and maximum of every bucket of ``n_out // 2`` equal buckets.
+
+    Unlike LTTB it never hides a spike, which suits noisy daily data.
+    A 2-D ``y`` keeps the extremes of every column at shared indices.
+
+    Returns:
+        Sorted indices of the kept points, including the first and last
+    """
+    y = np.asarray(y, dtype=float)
+    y = y.reshape(len(y), -1)
+    n = len(y)
+    buckets = n_out // 2
+    if n_out >= n or buckets < 1:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    bucket = np.repeat(np.arange(buckets), np.diff(edges))
+    offset = np.arange(n) - edges[bucket]
+    width = int(np.diff(edges).max())
+    kept = [np.array([0, n - 1])]
+    for column in y.T:
+        # Buckets differ in length by at most one, so pad them into a rectangle
+        padded = np.full((buckets, width), np.inf)
+        padded[bucket, offset] = np.where(np.isnan(column), np.inf, column)
+        kept.append(edges[:-1] + np.argmin(padded, axis=1))
+        padded[bucket, offset] = np.where(np.isnan(column), -np.inf, -column)
+        kept.append(edges[:-1] + np.argmin(padded, axis=1))
+    return np.unique(np.concatenate(kept))
+
+
+def downsample_indices(y: np.ndarray,
+                       max_points: int = DEFAULT_MAX_POINTS,
+                       method: str = 'lttb',
+                       x: Optional[np.ndarray] = None) -> np.ndarray:
+    """Indices to keep for 'lttb', 'minmax' or 'none' downsampling."""
+    if method == 'lttb':
+        return lttb_indices(y, max_points, x)
+    if method == 'minmax':
+        return minmax_indices(y, max_points)
+    if method == 'none':
+        return np.arange(len(y))
+    raise ValueError(f"Unknown downsampling method: {method}")
+
+
+def visible_slice(x: np.ndarray, x_range: Optional[Tuple[Any, Any]]) -> slice:
+    """Positions of sorted ``x`` inside ``x_range``, widened by one point on each side."""
+    if x_range is None:
+        return slice(0, len(x))
+    x = np.asarray(x)
+    bounds = np.asarray(x_range, dtype=x.dtype)
+    start = max(int(np.searchsorted(x, bounds[0], side='left')) - 1, 0)
+    stop = min(int(np.searchsorted(x, bounds[1], side='right')) + 1, len(x))
+    return slice(start, stop)
+
+
+class ChartData:
+    """
+    Collects line traces for one figure, downsampled to a point budget.
+
+    Each added series is cut to ``x_range`` (the zoom window) and then
+    downsampled to ``max_points``, so zooming in re-requests full detail for
+    the visible span. Once the figure would send more than
+    ``webgl_threshold`` points, every trace is emitted as ``Scattergl``
+    (all of them, so fills between traces keep working).
+    """
+
+    def __init__(self,
+                 max_points: int = DEFAULT_MAX_POINTS,
+                 x_range: Optional[Tuple[Any, Any]] = None,
+                 method: str = 'lttb',
+                 webgl_threshold: int = WEBGL_THRESHOLD):
+        self.max_points = max_points
+        self.x_range = x_range
+        self.method = method
+        self.webgl_threshold = webgl_threshold
+        self.points_in = 0
+        self._traces: List[Tuple[np.ndarray, np.ndarray, Dict[str, Any]]] = []
+
+    def add_line(self, x: Sequence, y: Sequence, **kwargs: Any) -> 'ChartData':
+        """Add a series; keyword arguments are passed to the Plotly trace."""
+        x = np.asarray(x)
+        y = np.asarray(y, dtype=float)
+        window = visible_slice(x, self.x_range)
+        x, y = x[window], y[window]
+        self.points_in += len(y)
+        keep = downsample_indices(y, self.max_points, self.method, x)
+        self._traces.append((x[keep], y[keep], kwargs))
+        return self
+
+    @property
+    def points_out(self) -> int:
+        return sum(len(y) for _, y, _ in self._traces)
+
+    @property
+    def webgl(self) -> bool:
+        return self.points_out > self.webgl_threshold
+
+    @property
+    def has_dates(self) -> bool:
+        return any(np.issubdtype(x.dtype, np.datetime64) for x, _, _ in self._traces)
+
+    def traces(self) -> List[Any]:
+        """
+        Plotly traces of the downsampled series.
+
+        Dates are sent as epoch milliseconds, which serialise as compact
+        binary arrays instead of ISO strings; ``figure`` sets the date axis
+        type that this requires.
+        """
+        trace_type = go.Scattergl if self.webgl else go.Scatter
+        traces = []
+        for x, y, kwargs in self._traces:
+            if np.issubdtype(x.dtype, np.datetime64):
+                x = x.astype('datetime64[ms]').astype(np.int64).astype(float)
+            traces.append(trace_type(x=x, y=y, **kwargs))
+        return traces
+
+    @instrumented('figure.chart_data')
+    def figure(self, **layout: Any) -> Any:
+        fig = go.Figure(self.traces())
+        if self.has_dates:
+            fig.update_xaxes(type='date')
+        fig.update_layout(**layout)
+        return fig
+
+    def stats(self, fig: Any) -> ChartStats:
+        """
+        Measure the JSON payload of ``fig`` and extrapolate the undownsampled one.
+
+        The full payload is estimated from the bytes per point actually sent,
+        so the large figure never has to be serialised.
+        """
+        payload = len(fig.to_json())
+        base = len(go.Figure(layout=fig.layout).to_json())
+        per_point = (payload - base) / max(self.points_out, 1)
+        full = int(base + per_point * self.points_in)
+        return ChartStats(self.points_in, self.points_out, self.webgl, payload, max(full, payload))
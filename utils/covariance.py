@@ -0,0 +1,256 @@
+from typing import Iterable, Optional
+
+import numpy as np
+
+from utils.instrument import instrumented
+
+
+class LedoitWolfCovariance:
+    """
+    Sample covariance with Ledoit-Wolf shrinkage towards a scaled identity.
+
+    Observations enter through running sums (count, sum, cross-product
+    matrix, and the second and fourth moments of the observation norms), so
+    adding or removing a return vector is a rank-one O(N^2) update and the
+    shrinkage intensity is recomputed without revisiting history. Removing
+    the oldest observations turns it into a rolling-window estimator.
+    """
+
+    def __init__(self, num_assets: int):
+        self.count = 0
+        self._sum = np.zeros(num_assets)
+        self._cross = np.zeros((num_assets, num_assets))
+        self._norm_sq = 0.0
+        self._norm_sq_weighted = np.zeros(num_assets)
+        self._norm_quad = 0.0
+
+    def _accumulate(self, returns: np.ndarray, sign: float) -> None:
+        x = np.atleast_2d(np.asarray(returns, dtype=float))
+        norm_sq = np.einsum('ij,ij->i', x, x)
+        self.count += int(sign) * x.shape[0]
+        self._sum += sign * x.sum(axis=0)
+        self._cross += sign * (x.T @ x)
+        self._norm_sq += sign * norm_sq.sum()
+        self._norm_sq_weighted += sign * (norm_sq @ x)
+        self._norm_quad += sign * (norm_sq @ norm_sq)
+
+    def update(self, returns: np.ndarray) -> 'LedoitWolfCovariance':
+        """Add one return vector (N,) or a block of them (k, N)."""
+        self._accumulate(returns, 1.0)
+        return self
+
+    def remove(self, returns: np.ndarray) -> 'LedoitWolfCovariance':
+        """Remove previously added observations, e.g. the ones leaving a rolling window."""
+        self._accumulate(returns, -1.0)
+        return self
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self._sum / self.count
+
+    def sample_covariance(self, ddof: int = 1) -> np.ndarray:
+        """Unshrunk covariance of the current observations."""
+        mean = self.mean
+        return (self._cross - self.count * np.outer(mean, mean)) / (self.count - ddof)
+
+    def shrinkage(self) -> float:
+        """Optimal Ledoit-Wolf weight on the scaled identity target."""
+        n = self.count
+        mean = self.mean
+        emp = self.sample_covariance(ddof=0)
+        mu = np.trace(emp) / emp.shape[0]
+        emp_sq = float(np.sum(emp * emp))
+        distance = emp_sq - 2.0 * mu * np.trace(emp) + mu * mu * emp.shape[0]
+        if distance <= 0:
+            return 0.0
+
+        # Sum over t of ||x_t - mean||^4, expanded in terms of the running sums
+        c = float(mean @ mean)
+        sum_b = float(mean @ self._sum)
+        sum_b_sq = float(mean @ self._cross @ mean)
+        sum_ab = float(mean @ self._norm_sq_weighted)
+        centered_quad = (self._norm_quad + 4.0 * sum_b_sq + n * c * c
+                         - 4.0 * sum_ab + 2.0 * c * self._norm_sq - 4.0 * c * sum_b)
+        spread = max(centered_quad / n - emp_sq, 0.0) / n
+        return float(min(spread, distance) / distance)
+
+    def covariance(self) -> np.ndarray:
+        """Shrunk covariance estimate (maximum likelihood scaling, as Ledoit and Wolf)."""
+        emp = self.sample_covariance(ddof=0)
+        delta = self.shrinkage()
+        shrunk = (1.0 - delta) * emp
+        shrunk[np.diag_indices_from(shrunk)] += delta * np.trace(emp) / emp.shape[0]
+        return shrunk
+
+
+class EWMACovariance:
+    """
+    Exponentially weighted covariance (RiskMetrics style).
+
+    Each observation is a rank-one O(N^2) update of the form
+    ``S = decay * S + (1 - decay) * x x'``; a block of observations is applied
+    as one weighted cross product. Returns are treated as zero mean unless
+    ``demean`` is set, in which case the exponentially weighted mean is
+    removed. Weights are normalised so early estimates are not biased to zero.
+    """
+
+    def __init__(self, num_assets: int, decay: float = 0.94, demean: bool = False):
+        if not 0.0 < decay < 1.0:
+            raise ValueError("Decay must lie strictly between 0 and 1")
+        self.decay = decay
+        self.demean = demean
+        self.count = 0
+        self._first = np.zeros(num_assets)
+        self._raw = np.zeros((num_assets, num_assets))
+
+    def update(self, returns: np.ndarray) -> 'EWMACovariance':
+        """Add one return vector (N,) or a block of them (k, N) in time order."""
+        x = np.atleast_2d(np.asarray(returns, dtype=float))
+        weights = (1.0 - self.decay) * self.decay ** np.arange(x.shape[0] - 1, -1, -1)
+        carry = self.decay ** x.shape[0]
+        self._first = carry * self._first + weights @ x
+        self._raw *= carry
+        self._raw += (x.T * weights) @ x
+        self.count += x.shape[0]
+        return self
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self._first / (1.0 - self.decay ** self.count)
+
+    def covariance(self) -> np.ndarray:
+        cov = self._raw / (1.0 - self.decay ** self.count)
+        if self.demean:
+            mean = self.mean
+            cov -= np.outer(mean, mean)
+        return cov
+
+
+class FactorCovariance:
+    """
+    Low-rank plus diagonal covariance ``L L' + diag(D)`` stored in O(N k) memory.
+
+    ``fit`` extracts the leading principal components of a return history.
+    ``update`` applies an exponentially weighted rank-one update without ever
+    forming an N x N matrix: the scaled loadings and the new observation are
+    re-factored with a thin SVD, the leading ``k`` directions are kept and the
+    discarded one is folded into the diagonal, so every asset's variance is
+    tracked exactly. Portfolio risk uses the factors directly.
+    """
+
+    def __init__(self, loadings: np.ndarray, specific: np.ndarray, decay: float = 0.97):
+        self.loadings = np.asarray(loadings, dtype=float)
+        self.specific = np.asarray(specific, dtype=float)
+        self.decay = decay
+
+    @classmethod
+    def fit(cls, returns: np.ndarray, num_factors: int = 10, decay: float = 0.97) -> 'FactorCovariance':
+        """
+        Estimate the factor model from a T x N return matrix by truncated PCA.
+
+        Args:
+            returns: T x N matrix of asset returns
+            num_factors: Number of statistical factors k
+            decay: Decay applied by later incremental updates
+
+        Returns:
+            FactorCovariance whose diagonal equals the sample variances
+        """
+        returns = np.asarray(returns, dtype=float)
+        centered = returns - returns.mean(axis=0)
+        _, singular, vt = np.linalg.svd(centered, full_matrices=False)
+        k = min(num_factors, len(singular))
+        loadings = vt[:k].T * (singular[:k] / np.sqrt(len(returns) - 1))
+        variances = (centered * centered).sum(axis=0) / (len(returns) - 1)
+        specific = np.maximum(variances - (loadings * loadings).sum(axis=1), 0.0)
+        return cls(loadings, specific, decay)
+
+    @property
+    def num_factors(self) -> int:
+        return self.loadings.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.loadings.nbytes + self.specific.nbytes
+
+    def update(self, returns: np.ndarray) -> 'FactorCovariance':
+        """Add one return vector (N,) or a block of them (k, N) in time order."""
+        k = self.num_factors
+        for x in np.atleast_2d(np.asarray(returns, dtype=float)):
+            stacked = np.column_stack([np.sqrt(self.decay) * self.loadings, np.sqrt(1.0 - self.decay) * x])
+            u, singular, _ = np.linalg.svd(stacked, full_matrices=False)
+            dropped = u[:, k:] * singular[k:]
+            self.loadings = u[:, :k] * singular[:k]
+            self.specific = self.decay * self.specific + (dropped * dropped).sum(axis=1)
+        return self
+
+    def variances(self) -> np.ndarray:
+        return (self.loadings * self.loadings).sum(axis=1) + self.specific
+
+    def matvec(self, weights: np.ndarray) -> np.ndarray:
+        """Covariance times a vector (or N x m matrix) in O(N k)."""
+        weights = np.asarray(weights, dtype=float)
+        specific = self.specific if weights.ndim == 1 else self.specific[:, None]
+        return self.loadings @ (self.loadings.T @ weights) + specific * weights
+
+    def portfolio_variance(self, weights: np.ndarray) -> float:
+        exposure = self.loadings.T @ weights
+        return float(exposure @ exposure + (self.specific * weights) @ weights)
+
+    def covariance(self) -> np.ndarray:
+        """Dense N x N matrix; only for universes small enough to materialise."""
+        dense = self.loadings @ self.loadings.T
+        dense[np.diag_indices_from(dense)] += self.specific
+        return dense
+
+
+@instrumented
+def estimate_covariance(returns: np.ndarray,
+                        method: str = 'ledoit_wolf',
+                        decay: float = 0.94,
+                        num_factors: int = 10,
+                        ridge: Optional[float] = None) -> np.ndarray:
+    """
+    Dense covariance of a T x N return matrix with the chosen estimator.
+
+    Args:
+        returns: T x N matrix of asset returns
+        method: 'sample', 'ledoit_wolf', 'ewma' or 'factor'
+        decay: EWMA decay per period
+        num_factors: Factors kept by the factor model
+        ridge: Optional diagonal loading relative to the average variance
+
+    Returns:
+        Covariance matrix of shape (N, N)
+    """
+    returns = np.asarray(returns, dtype=float)
+    num_assets = returns.shape[1]
+    if method == 'sample':
+        cov = np.cov(returns, rowvar=False).reshape(num_assets, num_assets)
+    elif method == 'ledoit_wolf':
+        cov = LedoitWolfCovariance(num_assets).update(returns).covariance()
+    elif method == 'ewma':
+        cov = EWMACovariance(num_assets, decay=decay, demean=True).update(returns).covariance()
+    elif method == 'factor':
+        cov = FactorCovariance.fit(returns, num_factors).covariance()
+    else:
+        raise ValueError(f"Unknown covariance method: {method}")
+    if ridge:
+        cov[np.diag_indices_from(cov)] += ridge * np.trace(cov) / num_assets
+    return cov
+
+
+def covariance_from_batches(batches: Iterable[np.ndarray], estimator):
+    """
+    Feed blocks of returns (e.g. from optimize.iter_series_returns) into an estimator.
+
+    Args:
+        batches: Iterable of (k, N) return blocks in time order
+        estimator: Any estimator in this module exposing ``update``
+
+    Returns:
+        The updated estimator
+    """
+    for block in batches:
+        estimator.update(block)
+    return estimator
@@ -0,0 +1,58 @@
+import pandas as pd
+import streamlit as st
+
+from utils import instrument
+from utils.market_store import get_store
+
+
+def spans_frame(snapshot: dict) -> pd.DataFrame:
+    """Flatten a registry snapshot into one row per span, times in milliseconds."""
+    rows = []
+    for name, summary in snapshot.items():
+        rows.append({
+            'span': name,
+            'calls': summary['count'],
+            'wall p50 (ms)': summary['wall']['p50'] * 1e3,
+            'wall p90 (ms)': summary['wall']['p90'] * 1e3,
+            'wall p99 (ms)': summary['wall']['p99'] * 1e3,
+            'cpu p50 (ms)': summary['cpu']['p50'] * 1e3,
+            'peak p90 (MB)': summary['peak_bytes']['p90'] / 1e6,
+            'total wall (s)': summary['wall_total'],
+        })
+    return pd.DataFrame(rows)
+
+
+def render_diagnostics() -> None:
+    """Hidden diagnostics view with span percentiles, controls and exports."""
+    st.title("Diagnostics")
+    enabled = st.toggle("Instrumentation enabled", value=instrument.ENABLED)
+    track_memory = st.toggle("Track peak allocations (slow)", value=instrument.TRACK_MEMORY, disabled=not enabled)
+    if enabled and (not instrument.ENABLED or track_memory != instrument.TRACK_MEMORY):
+        instrument.enable(track_memory)
+    elif not enabled and instrument.ENABLED:
+        instrument.disable()
+
+    frame = spans_frame(instrument.get_registry().snapshot())
+    if frame.empty:
+        st.info("No spans recorded yet. Enable instrumentation and use the other pages.")
+    else:
+        st.dataframe(frame.sort_values('total wall (s)', ascending=False), hide_index=True,
+                     use_container_width=True)
+
+    left, middle, right = st.columns(3)
+    if left.button("Reset"):
+        instrument.get_registry().clear()
+        st.rerun()
+    middle.download_button("Prometheus text", instrument.to_prometheus(), file_name='metrics.txt')
+    right.download_button("JSON", instrument.to_json(), file_name='metrics.json')
+    address = instrument.metrics_address()
+    if address is not None:
+        host, port = address
+        st.caption(f"Serving http://{host}:{port}/metrics and /metrics.json")
+
+    st.markdown("### Shared Market Data")
+    mapped = pd.DataFrame(get_store().stats())
+    if mapped.empty:
+        st.caption(f"Nothing mapped from {get_store().directory} in this process.")
+    else:
+        st.dataframe(mapped.assign(MB=mapped.pop('bytes') / 1e6), hide_index=True, use_container_width=True)
@@ -1,9 +1,19 @@
 import numpy as np
+import pandas as pd
 import json
 import os
-from typing import Dict, List, Tuple, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 
+from utils.instrument import instrumented
+
+try:
+    import pyarrow as pa
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+@instrumented
 def generate_allocation_data(num_resources: int = 5, 
                            num_tasks: int = 10, 
                            seed: int = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
@@ -32,12 +42,15 @@ def generate_allocation_data(num_resources: int = 5,
     
     return costs, resource_capacity, task_requirements
 
+@instrumented
 def generate_heatmap_data(num_points: int = 100,
                          x_range: Tuple[float, float] = (-5, 5),
                          y_range: Tuple[float, float] = (-5, 5),
                          seed: int = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Generate random data for heatmap demonstration.
+    Generate a synthetic sin/cos surface, used as a large-grid fixture in tests and benchmarks.
+
+    Heatmaps of portfolio outcomes come from utils.sensitivity instead.
     
     Args:
         num_points: Number of points in each dimension
@@ -61,6 +74,7 @@ def generate_heatmap_data(num_points: int = 100,
     
     return X, Y, Z
 
+@instrumented
 def generate_time_series_data(num_days: int = 30,
                             num_series: int = 3,
                             seed: int = None) -> Dict[str, List]:
@@ -94,3 +108,150 @@ def generate_time_series_data(num_days: int = 30,
         series_data[f'series_{i}'] = values.tolist()
     
     return series_data
+
+def _walk_batches(children: List[np.random.SeedSequence],
+                  num_days: int,
+                  num_series: int,
+                  batch_size: int) -> Iterator[np.ndarray]:
+    """Yield consecutive (batch, num_series) blocks of unscaled random walks."""
+    level = np.zeros(num_series)
+    for index, child in enumerate(children):
+        rows = min(batch_size, num_days - index * batch_size)
+        steps = np.random.default_rng(child).standard_normal((rows, num_series))
+        np.cumsum(steps, axis=0, out=steps)
+        steps += level
+        level = steps[-1].copy()
+        yield steps
+
+def iter_time_series_batches(num_days: int = 30,
+                             num_series: int = 3,
+                             batch_size: int = 65_536,
+                             seed: Optional[int] = None,
+                             end_date: Optional[datetime] = None,
+                             shift_to_zero: bool = True,
+                             as_arrow: bool = False) -> Iterator[Union[Dict[str, np.ndarray], 'pa.RecordBatch']]:
+    """
+    Stream random walk time series as fixed-size record batches.
+
+    Unlike generate_time_series_data, nothing is materialised as Python lists:
+    each batch holds a ``datetime64[D]`` date column and one float64 column per
+    series, so peak memory is O(batch_size * num_series) for any horizon. Every
+    batch draws from its own generator spawned from ``seed``. Shifting the walks
+    so their minimum is zero (as generate_time_series_data does) needs the
+    global minimum, which is found with a first pass that regenerates and
+    discards the batches.
+
+    Args:
+        num_days: Number of days to generate data for
+        num_series: Number of different time series
+        batch_size: Maximum number of days per batch
+        seed: Random seed for reproducibility
+        end_date: Last date of the series (defaults to today)
+        shift_to_zero: Offset each series so that its minimum is zero
+        as_arrow: Yield pyarrow.RecordBatch objects instead of dicts of arrays
+
+    Yields:
+        Dictionaries with 'dates' and 'series_<i>' arrays of up to batch_size rows
+    """
+    if as_arrow and not HAS_ARROW:
+        raise ImportError("pyarrow is required for as_arrow=True")
+    num_batches = -(-num_days // batch_size)
+    children = np.random.SeedSequence(seed).spawn(num_batches)
+
+    offset = np.zeros(num_series)
+    if shift_to_zero:
+        minimum = np.full(num_series, np.inf)
+        for block in _walk_batches(children, num_days, num_series, batch_size):
+            np.minimum(minimum, block.min(axis=0), out=minimum)
+        offset = minimum if num_days else offset
+
+    last = np.datetime64(end_date or datetime.now(), 'D')
+    first = last - np.timedelta64(num_days - 1, 'D')
+    names = [f'series_{i}' for i in range(num_series)]
+    for index, block in enumerate(_walk_batches(children, num_days, num_series, batch_size)):
+        block -= offset
+        block *= 100
+        batch = {'dates': first + np.arange(index * batch_size, index * batch_size + len(block))}
+        batch.update(zip(names, np.ascontiguousarray(block.T)))
+        yield pa.RecordBatch.from_pydict(batch) if as_arrow else batch
+
+# Sector -> sub-industry taxonomy used for generated holdings
+SECTORS = {
+    'Technology': ['Software', 'Semiconductors', 'Hardware', 'IT Services'],
+    'Financial': ['Banks', 'Insurance', 'Capital Markets', 'Fintech'],
+    'Healthcare': ['Biotechnology', 'Pharmaceuticals', 'Medical Devices', 'Health Services'],
+    'Consumer': ['Staples', 'Retail', 'E-commerce', 'Leisure'],
+    'Energy': ['Oil & Gas', 'Clean Energy', 'Energy Services'],
+    'Industrials': ['Aerospace', 'Machinery', 'Transportation'],
+    'Real Estate': ['REITs', 'Property Developers'],
+    'Utilities': ['Electric', 'Water', 'Gas'],
+}
+
+@instrumented
+def generate_holdings_data(num_positions: int = 50_000,
+                           positions_per_fund: int = 25,
+                           seed: int = None) -> pd.DataFrame:
+    """
+    Generate a large book of positions classified by sector, sub-industry and fund.
+
+    Args:
+        num_positions: Number of positions
+        positions_per_fund: Average number of positions held by each fund
+        seed: Random seed for reproducibility
+
+    Returns:
+        DataFrame with Sector, Sub_Industry, Fund, Position, Market_Value and
+        Daily_Return (in percent) columns
+    """
+    if seed is not None:
+        np.random.seed(seed)
+
+    pairs = [(sector, sub) for sector, subs in SECTORS.items() for sub in subs]
+    num_funds = max(1, num_positions // positions_per_fund)
+
+    # Each fund sits in one sub-industry and has a fund-level return; fund sizes are heavy tailed
+    fund_group = np.random.randint(0, len(pairs), num_funds)
+    fund_return = np.random.normal(0.2, 1.5, num_funds)
+    fund_weight = np.random.pareto(1.2, num_funds) + 0.1
+    fund = np.random.choice(num_funds, num_positions, p=fund_weight / fund_weight.sum())
+
+    sector = np.array([sector for sector, _ in pairs])[fund_group[fund]]
+    sub_industry = np.array([sub for _, sub in pairs])[fund_group[fund]]
+    return pd.DataFrame({
+        'Sector': pd.Categorical(sector, categories=list(SECTORS)),
+        'Sub_Industry': pd.Categorical(sub_industry),
+        'Fund': pd.Categorical(np.char.add('Fund ', fund.astype(str))),
+        'Position': np.arange(num_positions),
+        'Market_Value': np.round(np.random.lognormal(11, 1.2, num_positions), 2),
+        'Daily_Return': fund_return[fund] + np.random.normal(0, 1.0, num_positions),
+    })
+
+@instrumented
+def generate_performance_data(start_date,
+                              periods: int = 36,
+                              seed: int = 42) -> pd.DataFrame:
+    """
+    Generate mock monthly performance data for a fund and its index.
+
+    Args:
+        start_date: First month of the series
+        periods: Number of monthly observations
+        seed: Random seed for reproducibility
+
+    Returns:
+        DataFrame with Date, Fund and Index return columns
+    """
+    np.random.seed(seed)
+
+    # Generate monthly dates
+    dates = pd.date_range(start=start_date, periods=periods, freq=pd.offsets.MonthEnd())
+
+    # Generate random returns with some correlation
+    index_returns = np.random.normal(0.005, 0.02, periods)  # mean 0.5%, std 2%
+    fund_returns = index_returns + np.random.normal(0.002, 0.01, periods)  # slightly higher returns
+
+    return pd.DataFrame({
+        'Date': dates,
+        'Fund': fund_returns,
+        'Index': index_returns
+    })
@@ -0,0 +1,338 @@
+"""
+In-memory hierarchy index over a book of holdings.
+
+Positions are laid out in Euler-tour (depth-first) order of their path, e.g.
+asset class -> sector -> industry -> fund -> security, so every node of the
+hierarchy owns one contiguous range of positions. Fenwick trees over that
+order give the market value, value-weighted return and position count of
+any subtree in O(log n), and max segment trees give its top-k contributors
+in O(k log n). Changing one position's value or return costs O(log n).
+The set of positions and their paths is fixed when the index is built;
+positions can be closed (market value zero) but new ones need a rebuild.
+"""
+import heapq
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.instrument import instrumented
+from utils.treemap import LEVELS
+
+NodePath = Union[str, Sequence[str]]
+RANKINGS = ('value', 'contribution', 'detraction')
+
+
+class FenwickTree:
+    """
+    Prefix sums of a fixed-length array of (optionally vector-valued) entries.
+
+    Point updates and prefix sums both take O(log n) steps, and each step is
+    vectorised across a batch of indices.
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.build(values)
+
+    def build(self, values: np.ndarray) -> None:
+        """Rebuild from the full array in O(n)."""
+        values = np.asarray(values, dtype=float)
+        self.size = len(values)
+        cumulative = np.zeros((self.size + 1,) + values.shape[1:])
+        np.cumsum(values, axis=0, out=cumulative[1:])
+        index = np.arange(1, self.size + 1)
+        self.tree = np.zeros_like(cumulative)
+        self.tree[1:] = cumulative[1:] - cumulative[index & (index - 1)]
+
+    def add(self, index: np.ndarray, delta: np.ndarray) -> None:
+        """Add ``delta`` to the entries at ``index`` (0-based, duplicates allowed)."""
+        index = np.atleast_1d(np.asarray(index, dtype=np.int64)) + 1
+        delta = np.asarray(delta, dtype=float).reshape((len(index),) + self.tree.shape[1:])
+        while len(index):
+            np.add.at(self.tree, index, delta)
+            index = index + (index & -index)
+            inside = index <= self.size
+            index, delta = index[inside], delta[inside]
+
+    def prefix(self, end: np.ndarray) -> np.ndarray:
+        """Sums of the entries before each ``end``, shape end.shape + entry shape."""
+        index = np.array(end, dtype=np.int64)
+        total = np.zeros(index.shape + self.tree.shape[1:])
+        while index.any():
+            total += self.tree[index]
+            index &= index - 1
+        return total
+
+    def range_sum(self, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        """Sums of the entries in each half-open range [start, end)."""
+        return self.prefix(end) - self.prefix(start)
+
+
+class MaxSegmentTree:
+    """
+    Range maximum over a fixed-length array, with top-k retrieval.
+
+    Leaves that should never be returned hold -inf.
+    """
+
+    def __init__(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        self.size = 1 << max(int(len(values) - 1).bit_length(), 0)
+        self.tree = np.full(2 * self.size, -np.inf)
+        self.tree[self.size:self.size + len(values)] = values
+        width = self.size // 2
+        while width:
+            children = self.tree[2 * width:4 * width]
+            np.maximum(children[0::2], children[1::2], out=self.tree[width:2 * width])
+            width //= 2
+
+    def set(self, index: np.ndarray, values: np.ndarray) -> None:
+        """Overwrite the entries at ``index`` (unique, 0-based) and refresh their ancestors."""
+        node = np.atleast_1d(np.asarray(index, dtype=np.int64)) + self.size
+        self.tree[node] = values
+        node = np.unique(node >> 1)
+        while len(node) and node[-1] >= 1:
+            self.tree[node] = np.maximum(self.tree[2 * node], self.tree[2 * node + 1])
+            node = np.unique(node >> 1)
+            node = node[node >= 1]
+
+    def top_k(self, start: int, end: int, k: int) -> np.ndarray:
+        """
+        Indices of the ``k`` largest finite entries in [start, end), largest first.
+
+        The range is covered by O(log n) tree nodes; a heap then expands the
+        node with the largest maximum until ``k`` leaves have been popped.
+        """
+        heap = []
+        low, high = start + self.size, end + self.size
+        while low < high:
+            if low & 1:
+                heap.append((-self.tree[low], low))
+                low += 1
+            if high & 1:
+                high -= 1
+                heap.append((-self.tree[high], high))
+            low >>= 1
+            high >>= 1
+        heap = [item for item in heap if item[0] != np.inf]
+        heapq.heapify(heap)
+        found = []
+        while heap and len(found) < k:
+            _, node = heapq.heappop(heap)
+            if node >= self.size:
+                found.append(node - self.size)
+                continue
+            for child in (2 * node, 2 * node + 1):
+                if self.tree[child] != -np.inf:
+                    heapq.heappush(heap, (-self.tree[child], child))
+        return np.array(found, dtype=np.int64)
+
+
+class HoldingsIndex:
+    """
+    Subtree totals and top contributors of a holdings book, updated in O(log n).
+
+    Nodes are addressed by their path from the root, as a tuple of labels
+    or as a '/'-joined id like the treemap's ('Technology/Software'); the
+    empty path is the whole book and a full path of ``levels`` is a fund,
+    whose children are its positions. Fenwick totals accumulate rounding
+    error under many small updates, so they are rebuilt from the position
+    values once as many positions have been updated as the book holds,
+    which costs amortised O(1) per update.
+    """
+
+    def __init__(self,
+                 positions: pd.DataFrame,
+                 levels: Sequence[str] = LEVELS,
+                 value: str = 'Market_Value',
+                 color: str = 'Daily_Return',
+                 position: str = 'Position'):
+        self.levels = list(levels)
+        codes, self._labels = [], []
+        for level in self.levels:
+            level_codes, labels = pd.factorize(positions[level], sort=True)
+            codes.append(level_codes)
+            self._labels.append(np.asarray(labels.astype(str), dtype=object))
+        order = np.lexsort(codes[::-1]) if codes else np.arange(len(positions))
+        self._codes = [level_codes[order] for level_codes in codes]
+        self._ids = pd.Index(positions[position].to_numpy()[order])
+        if not self._ids.is_unique:
+            raise ValueError(f"{position} values must be unique")
+        self.size = len(order)
+
+        # Start offset of every node at each depth; a node begins wherever its path changes
+        changed = np.zeros(max(self.size - 1, 0), dtype=bool)
+        self._starts = [np.zeros(1, dtype=np.int64)]
+        for level_codes in self._codes:
+            changed |= level_codes[1:] != level_codes[:-1]
+            self._starts.append(np.concatenate([[0], np.flatnonzero(changed) + 1]).astype(np.int64)
+                                if self.size else np.zeros(0, dtype=np.int64))
+        self._node_index = {}
+        for depth in range(1, len(self.levels) + 1):
+            starts = self._starts[depth]
+            labels = zip(*(self._labels[d][self._codes[d][starts]] for d in range(depth)))
+            self._node_index.update((path, (depth, i)) for i, path in enumerate(labels))
+
+        self._value = positions[value].to_numpy(dtype=float)[order]
+        self._return = positions[color].to_numpy(dtype=float)[order]
+        self._value[self._value < 0] = 0.0
+        self._open = self._value > 0
+        self._totals = FenwickTree(self._terms(self._value, self._return, self._open))
+        self._rankings = {name: MaxSegmentTree(self._ranking(name, np.arange(self.size))) for name in RANKINGS}
+        self._updated = 0
+
+    @staticmethod
+    def _terms(value: np.ndarray, returns: np.ndarray, is_open: np.ndarray) -> np.ndarray:
+        """Per-position (value, value x return, open) columns summed by the Fenwick tree."""
+        return np.column_stack([value, value * returns, is_open.astype(float)])
+
+    def _ranking(self, name: str, slots: np.ndarray) -> np.ndarray:
+        """Keys ranked by top_k: closed positions are never returned."""
+        value, returns = self._value[slots], self._return[slots]
+        key = {'value': value, 'contribution': value * returns, 'detraction': -value * returns}[name]
+        return np.where(self._open[slots], key, -np.inf)
+
+    def _locate(self, path: NodePath) -> Tuple[int, int, int, Tuple[str, ...]]:
+        """Depth, node number and [start, end) position range of a node."""
+        if isinstance(path, str):
+            path = tuple(path.split('/')) if path else ()
+        path = tuple(str(part) for part in path)
+        if not path:
+            return 0, 0, self.size, path
+        if path not in self._node_index:
+            raise KeyError(f"Unknown node: {'/'.join(path)}")
+        depth, node = self._node_index[path]
+        starts = self._starts[depth]
+        end = starts[node + 1] if node + 1 < len(starts) else self.size
+        return depth, int(starts[node]), int(end), path
+
+    def _frame(self, keys: pd.DataFrame, totals: np.ndarray, parent_value: float) -> pd.DataFrame:
+        value, weighted, count = totals[:, 0], totals[:, 1], np.rint(totals[:, 2]).astype(np.int64)
+        frame = keys.reset_index(drop=True)
+        frame['Market_Value'] = value
+        frame['Daily_Return'] = np.divide(weighted, value, out=np.zeros(len(value)), where=value > 0)
+        frame['Positions'] = count
+        frame['Percentage'] = value / parent_value * 100.0 if parent_value else 0.0
+        return frame
+
+    def subtree(self, path: NodePath = ()) -> dict:
+        """
+        Totals of one node in O(log n).
+
+        Returns:
+            Dictionary with Market_Value, Daily_Return (value-weighted, in
+            percent), Positions and Percentage of the whole book
+        """
+        _, start, end, _ = self._locate(path)
+        value, weighted, count = self._totals.range_sum(start, end)
+        total = self._totals.prefix(self.size)[0]
+        return {
+            'Market_Value': float(value),
+            'Daily_Return': float(weighted / value) if value > 0 else 0.0,
+            'Positions': int(round(count)),
+            'Percentage': float(value / total * 100.0) if total else 0.0,
+        }
+
+    def children(self, path: NodePath = ()) -> pd.DataFrame:
+        """
+        Totals of every child of a node, with their share of the node's value.
+
+        Children of a fund are its open positions.
+        """
+        depth, start, end, path = self._locate(path)
+        parent_value = self._totals.range_sum(start, end)[0]
+        if depth == len(self.levels):
+            slots = np.arange(start, end)[self._open[start:end]]
+            keys = pd.DataFrame({'Position': self._ids[slots]})
+            totals = self._terms(self._value[slots], self._return[slots], self._open[slots])
+            return self._frame(keys, totals, parent_value)
+        starts = self._starts[depth + 1]
+        first, last = np.searchsorted(starts, [start, end])
+        bounds = np.append(starts[first:last], end)
+        keys = pd.DataFrame({self.levels[depth]: self._labels[depth][self._codes[depth][bounds[:-1]]]})
+        return self._frame(keys, self._totals.range_sum(bounds[:-1], bounds[1:]), parent_value)
+
+    def level_frame(self, depth: int = 1) -> pd.DataFrame:
+        """Totals of every node at ``depth`` (1 = top level), with their share of the book."""
+        if not 1 <= depth <= len(self.levels):
+            raise ValueError(f"Depth must be between 1 and {len(self.levels)}")
+        bounds = np.append(self._starts[depth], self.size)
+        keys = pd.DataFrame({level: self._labels[d][self._codes[d][bounds[:-1]]]
+                             for d, level in enumerate(self.levels[:depth])})
+        return self._frame(keys, self._totals.range_sum(bounds[:-1], bounds[1:]), self._totals.prefix(self.size)[0])
+
+    def exposure_breaches(self, depth: int, limit: float) -> pd.DataFrame:
+        """Nodes at ``depth`` holding more than ``limit`` percent of the book, largest first."""
+        frame = self.level_frame(depth)
+        return frame[frame['Percentage'] > limit].sort_values('Percentage', ascending=False, ignore_index=True)
+
+    @instrumented('hierarchy.top_k')
+    def top_k(self, path: NodePath = (), k: int = 10, by: str = 'value') -> pd.DataFrame:
+        """
+        The ``k`` positions in a subtree with the largest value, return contribution or detraction.
+
+        Contribution is the position's share of the subtree's value-weighted
+        return, in percentage points; ``detraction`` ranks the most negative
+        contributions first.
+        """
+        if by not in RANKINGS:
+            raise ValueError(f"Unknown ranking: {by}")
+        depth, start, end, path = self._locate(path)
+        slots = self._rankings[by].top_k(start, end, k)
+        subtree_value = self._totals.range_sum(start, end)[0]
+        frame = pd.DataFrame({level: self._labels[d][self._codes[d][slots]]
+                              for d, level in enumerate(self.levels) if d >= depth})
+        frame['Position'] = self._ids[slots]
+        frame['Market_Value'] = self._value[slots]
+        frame['Daily_Return'] = self._return[slots]
+        frame['Contribution'] = (self._value[slots] * self._return[slots] / subtree_value
+                                 if subtree_value else 0.0)
+        return frame
+
+    @instrumented('hierarchy.update')
+    def update(self,
+               positions: Sequence,
+               market_value: Optional[Sequence[float]] = None,
+               daily_return: Optional[Sequence[float]] = None) -> None:
+        """
+        Set the market value and/or daily return of existing positions, O(log n) each.
+
+        A market value of zero closes a position. When a position appears
+        more than once, its last entry wins.
+
+        Raises:
+            KeyError: If a position is not in the index
+        """
+        positions = np.atleast_1d(np.asarray(positions))
+        slots = self._ids.get_indexer(positions)
+        if (slots < 0).any():
+            raise KeyError(f"Unknown positions (rebuild the index to add them): {positions[slots < 0][:5].tolist()}")
+        last = len(slots) - 1 - np.unique(slots[::-1], return_index=True)[1]
+        slots = slots[last]
+
+        def latest(values):
+            return np.broadcast_to(np.asarray(values, dtype=float), positions.shape)[last]
+
+        old = self._terms(self._value[slots], self._return[slots], self._open[slots])
+        if market_value is not None:
+            self._value[slots] = np.maximum(latest(market_value), 0.0)
+            self._open[slots] = self._value[slots] > 0
+        if daily_return is not None:
+            self._return[slots] = latest(daily_return)
+
+        self._updated += len(slots)
+        if self._updated >= self.size:
+            self._totals.build(self._terms(self._value, self._return, self._open))
+            self._updated = 0
+        else:
+            self._totals.add(slots, self._terms(self._value[slots], self._return[slots], self._open[slots]) - old)
+        for name, tree in self._rankings.items():
+            tree.set(slots, self._ranking(name, slots))
+
+    def positions_frame(self) -> pd.DataFrame:
+        """Every position in Euler-tour order with its path and current values (O(n); for checks)."""
+        frame = pd.DataFrame({level: self._labels[d][self._codes[d]] for d, level in enumerate(self.levels)})
+        frame['Position'] = self._ids
+        frame['Market_Value'] = self._value
+        frame['Daily_Return'] = self._return
+        return frame
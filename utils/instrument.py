@@ -0,0 +1,273 @@
+"""
+Lightweight timing of hot paths: data generation, figure construction and report rendering.
+
+Instrumentation is off unless PORTFOLIO_INSTRUMENT is set ('1' for wall and
+CPU time, 'memory' to also trace peak allocations with tracemalloc). When
+off, an instrumented call costs one global flag check. Samples are kept per
+span name in a bounded in-memory window and summarised as percentiles, shown
+on the hidden diagnostics view (``/?diagnostics=1``) and, when
+PORTFOLIO_METRICS_PORT is set, served on localhost as Prometheus text at
+``/metrics`` and as JSON at ``/metrics.json``. The app starts the endpoint
+(serve_metrics_from_env) rather than the import, so CLIs and worker
+processes that import this module never compete for the port.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import warnings
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+INSTRUMENT_ENV = 'PORTFOLIO_INSTRUMENT'
+METRICS_PORT_ENV = 'PORTFOLIO_METRICS_PORT'
+QUANTILES = (0.5, 0.9, 0.99)
+# Samples kept per span; percentiles describe the most recent calls
+WINDOW = 1_024
+
+ENABLED = False
+TRACK_MEMORY = False
+_server: Optional[ThreadingHTTPServer] = None
+_serve_failed = False
+_local = threading.local()
+
+
+class SpanStats:
+    """Running totals plus a window of recent (wall, cpu, peak bytes) samples for one span."""
+
+    def __init__(self, window: int = WINDOW):
+        self.count = 0
+        self.wall_total = 0.0
+        self.cpu_total = 0.0
+        self.peak_total = 0
+        self.samples: Deque[Tuple[float, float, int]] = deque(maxlen=window)
+
+    def add(self, wall: float, cpu: float, peak: int) -> None:
+        self.count += 1
+        self.wall_total += wall
+        self.cpu_total += cpu
+        self.peak_total += peak
+        self.samples.append((wall, cpu, peak))
+
+    def summary(self) -> Dict[str, Any]:
+        values = np.array(self.samples, dtype=float).reshape(-1, 3)
+        quantiles = np.quantile(values, QUANTILES, axis=0) if len(values) else np.zeros((len(QUANTILES), 3))
+        result = {'count': self.count, 'wall_total': self.wall_total, 'cpu_total': self.cpu_total,
+                  'peak_bytes_total': self.peak_total}
+        for i, metric in enumerate(('wall', 'cpu', 'peak_bytes')):
+            result[metric] = {f'p{int(q * 100)}': float(quantiles[j, i]) for j, q in enumerate(QUANTILES)}
+            result[metric]['max'] = float(values[:, i].max()) if len(values) else 0.0
+        return result
+
+
+class Registry:
+    """Thread-safe collection of SpanStats keyed by span name."""
+
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        self._spans: Dict[str, SpanStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, wall: float, cpu: float, peak: int = 0) -> None:
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = SpanStats(self.window)
+            stats.add(wall, cpu, peak)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Percentile summary of every span, sorted by name."""
+        with self._lock:
+            return {name: self._spans[name].summary() for name in sorted(self._spans)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+_registry = Registry()
+
+
+def get_registry() -> Registry:
+    return _registry
+
+
+def enable(track_memory: bool = False) -> None:
+    """Turn instrumentation on; ``track_memory`` starts tracemalloc, which slows allocation-heavy code."""
+    global ENABLED, TRACK_MEMORY
+    TRACK_MEMORY = track_memory
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    ENABLED = True
+
+
+def disable() -> None:
+    global ENABLED, TRACK_MEMORY
+    ENABLED = False
+    if TRACK_MEMORY and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    TRACK_MEMORY = False
+
+
+def _memory_stack() -> List[int]:
+    stack = getattr(_local, 'peaks', None)
+    if stack is None:
+        stack = _local.peaks = []
+    return stack
+
+
+@contextmanager
+def span(name: str, registry: Optional[Registry] = None) -> Iterator[None]:
+    """
+    Record wall time, CPU time of the calling thread and peak allocation of a block.
+
+    Nested spans each reset the tracemalloc peak, so every span reports the
+    peak reached above its own starting allocation; an enclosing span folds
+    in the peaks of the spans it contains.
+    """
+    if not ENABLED:
+        yield
+        return
+    track = TRACK_MEMORY and tracemalloc.is_tracing()
+    if track:
+        stack = _memory_stack()
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1] = max(stack[-1], peak)
+        stack.append(0)
+        tracemalloc.reset_peak()
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+        peak_bytes = 0
+        if track:
+            inner_peak = max(stack.pop(), tracemalloc.get_traced_memory()[1])
+            if stack:
+                stack[-1] = max(stack[-1], inner_peak)
+            peak_bytes = max(inner_peak - current, 0)
+        (registry or _registry).record(name, wall, cpu, peak_bytes)
+
+
+def instrumented(name: Union[str, Callable, None] = None) -> Callable:
+    """
+    Decorator recording every call of a function as a span.
+
+    Usable bare (``@instrumented``) or with a span name (``@instrumented('figure.treemap')``);
+    the default name is ``module.qualname``.
+    """
+    def decorate(func: Callable) -> Callable:
+        label = name if isinstance(name, str) else f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+
+    if callable(name):
+        return decorate(name)
+    return decorate
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def to_prometheus(registry: Optional[Registry] = None) -> str:
+    """Render the registry in the Prometheus text exposition format (summaries per span)."""
+    snapshot = (registry or _registry).snapshot()
+    lines = []
+    for metric, family in (('wall', 'portfolio_span_wall_seconds'), ('cpu', 'portfolio_span_cpu_seconds'),
+                           ('peak_bytes', 'portfolio_span_peak_bytes')):
+        lines.append(f'# TYPE {family} summary')
+        for name, summary in snapshot.items():
+            label = f'span="{_escape_label(name)}"'
+            for q in QUANTILES:
+                lines.append(f'{family}{{{label},quantile="{q}"}} {summary[metric][f"p{int(q * 100)}"]:.9g}')
+            lines.append(f'{family}_sum{{{label}}} {summary[metric + "_total"]:.9g}')
+            lines.append(f'{family}_count{{{label}}} {summary["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def to_json(registry: Optional[Registry] = None) -> str:
+    return json.dumps({'enabled': ENABLED, 'track_memory': TRACK_MEMORY,
+                       'spans': (registry or _registry).snapshot()})
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/metrics':
+            body, content_type = to_prometheus(), 'text/plain; version=0.0.4'
+        elif self.path == '/metrics.json':
+            body, content_type = to_json(), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port: int = 9464, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Serve /metrics and /metrics.json from a daemon thread; repeated calls reuse the server."""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+    return _server
+
+
+def serve_metrics_from_env() -> Optional[ThreadingHTTPServer]:
+    """
+    Start the endpoint on PORTFOLIO_METRICS_PORT when instrumentation is on.
+
+    Called by the app on every run; only the first call binds. A port that
+    is already taken (e.g. by a second app process) is reported once as a
+    warning instead of failing the page.
+    """
+    global _serve_failed
+    port = os.environ.get(METRICS_PORT_ENV)
+    if not ENABLED or not port or _serve_failed:
+        return _server
+    try:
+        return serve_metrics(int(port))
+    except OSError as e:
+        _serve_failed = True
+        warnings.warn(f"Metrics endpoint not started on port {port}: {e}", RuntimeWarning)
+        return None
+
+
+def metrics_address() -> Optional[Tuple[str, int]]:
+    """Host and port of the running metrics endpoint, if any."""
+    return _server.server_address[:2] if _server is not None else None
+
+
+def stop_metrics() -> None:
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
+
+
+_mode = os.environ.get(INSTRUMENT_ENV, '').lower()
+if _mode in ('1', 'true', 'on', 'memory'):
+    enable(track_memory=_mode == 'memory')
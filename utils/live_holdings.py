@@ -0,0 +1,643 @@
+"""
+Live holdings: position and price updates applied as deltas.
+
+Updates arrive as newline-delimited JSON messages, either from files dropped
+into a directory (FileDropSource) or from a local TCP socket (SocketSource):
+
+    {"type": "price", "fund": "Fund 12", "change": 0.35}
+    {"type": "position", "position": 1041, "market_value": 250000.0, "daily_return": 1.2}
+
+A price message moves every position of a fund by ``change`` percent; a
+position message sets one position's market value and daily return (adding
+it when it is new, given its fund and, for a new fund, its sector and
+sub-industry; a market value of zero closes it). LiveHoldings applies each
+message in O(levels) time by updating the fund's totals and its ancestors'
+totals, never rebuilding the table. LiveTreemap maps funds onto a bounded
+treemap layout and reports only the nodes changed since its last update.
+
+``python -m utils.live_holdings`` feeds simulated updates into a drop
+directory or socket, as a local stand-in for a price feed.
+"""
+import argparse
+import glob
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.instrument import instrumented
+from utils.treemap import LEVELS, OTHER_LABEL, _leaves_within_budget
+
+DROP_ENV = 'PORTFOLIO_HOLDINGS_DROP'
+
+
+def _grow(array: np.ndarray, size: int, fill: Any = 0) -> np.ndarray:
+    """Return ``array`` with room for at least ``size`` entries, doubling its capacity."""
+    if size <= len(array):
+        return array
+    grown = np.full(max(size, 2 * len(array)), fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class LiveHoldings:
+    """
+    Holdings table keyed by fund with incrementally maintained totals.
+
+    Positions keep a base market value and return, and each fund a price
+    factor accumulated since the table was loaded; a position's current
+    value is its base value times its fund's factor. A price tick therefore
+    updates one factor and the fund's totals in closed form instead of
+    touching every position. Totals (value, value-weighted return, position
+    count) are kept for every fund and every ancestor level, and each fund
+    records the version of its last change so consumers can ask what
+    changed since they last looked.
+    """
+
+    def __init__(self,
+                 positions: pd.DataFrame,
+                 levels: Sequence[str] = LEVELS,
+                 value: str = 'Market_Value',
+                 color: str = 'Daily_Return',
+                 position: str = 'Position'):
+        self.levels = list(levels)
+        self._lock = threading.RLock()
+        grouper = positions.groupby(self.levels, observed=True, sort=False)
+        leaf = grouper.ngroup().to_numpy().astype(np.int64)
+        self._paths: List[Tuple[str, ...]] = [tuple(str(part) for part in key) for key in grouper.size().index]
+        self._fund_leaf: Dict[str, int] = {}
+        for index, path in enumerate(self._paths):
+            if self._fund_leaf.setdefault(path[-1], index) != index:
+                raise ValueError(f"Fund {path[-1]} appears under several parents")
+
+        # Ancestor prefixes per depth (1 .. len(levels) - 1) and each fund's code at that depth
+        self._prefixes: List[List[Tuple[str, ...]]] = []
+        self._prefix_code: List[Dict[Tuple[str, ...], int]] = []
+        self._parent_codes: List[np.ndarray] = []
+        for depth in range(1, len(self.levels)):
+            codes = np.empty(len(self._paths), dtype=np.int64)
+            prefixes, lookup = [], {}
+            for index, path in enumerate(self._paths):
+                codes[index] = lookup.setdefault(path[:depth], len(prefixes))
+                if codes[index] == len(prefixes):
+                    prefixes.append(path[:depth])
+            self._prefixes.append(prefixes)
+            self._prefix_code.append(lookup)
+            self._parent_codes.append(codes)
+
+        values = positions[value].to_numpy(dtype=float)
+        returns = positions[color].to_numpy(dtype=float)
+        self._row: Dict[Any, int] = dict(zip(positions[position].tolist(), range(len(positions))))
+        self._base_value = values.copy()
+        self._base_return = returns.copy()
+        self._position_leaf = leaf
+        self._num_positions = len(positions)
+
+        num_leaves = len(self._paths)
+        self._factor = np.ones(num_leaves)
+        self._value = np.bincount(leaf, values, minlength=num_leaves)
+        self._weighted = np.bincount(leaf, values * returns, minlength=num_leaves)
+        self._count = np.bincount(leaf, minlength=num_leaves).astype(np.int64)
+        self._level_totals = [self._sum_to_parents(codes, len(prefixes))
+                              for codes, prefixes in zip(self._parent_codes, self._prefixes)]
+        self.total = float(self._value.sum())
+        self.version = 0
+        self._leaf_version = np.zeros(num_leaves, dtype=np.int64)
+
+    def _sum_to_parents(self, codes: np.ndarray, size: int) -> List[np.ndarray]:
+        n = self.num_leaves
+        return [np.bincount(codes[:n], self._value[:n], minlength=size),
+                np.bincount(codes[:n], self._weighted[:n], minlength=size),
+                np.bincount(codes[:n], self._count[:n], minlength=size).astype(np.int64)]
+
+    @property
+    def num_leaves(self) -> int:
+        return len(self._paths)
+
+    def _add_to_leaf(self, leaf: int, d_value: float, d_weighted: float, d_count: int) -> None:
+        self._value[leaf] += d_value
+        self._weighted[leaf] += d_weighted
+        self._count[leaf] += d_count
+        for codes, (value, weighted, count) in zip(self._parent_codes, self._level_totals):
+            code = codes[leaf]
+            value[code] += d_value
+            weighted[code] += d_weighted
+            count[code] += d_count
+        self.total += d_value
+        self.version += 1
+        self._leaf_version[leaf] = self.version
+
+    def _new_leaf(self, path: Tuple[str, ...]) -> int:
+        """Register a fund that was not in the table, creating missing ancestors."""
+        leaf = len(self._paths)
+        self._paths.append(path)
+        self._fund_leaf[path[-1]] = leaf
+        for depth in range(1, len(self.levels)):
+            index = depth - 1
+            lookup, prefixes = self._prefix_code[index], self._prefixes[index]
+            code = lookup.setdefault(path[:depth], len(prefixes))
+            if code == len(prefixes):
+                prefixes.append(path[:depth])
+                self._level_totals[index] = [_grow(array, code + 1) for array in self._level_totals[index]]
+            self._parent_codes[index] = _grow(self._parent_codes[index], leaf + 1)
+            self._parent_codes[index][leaf] = code
+        self._factor = _grow(self._factor, leaf + 1, 1.0)
+        self._value = _grow(self._value, leaf + 1)
+        self._weighted = _grow(self._weighted, leaf + 1)
+        self._count = _grow(self._count, leaf + 1)
+        self._leaf_version = _grow(self._leaf_version, leaf + 1)
+        return leaf
+
+    def _leaf_for(self, message: Dict[str, Any]) -> Optional[int]:
+        fund = message.get(self.levels[-1].lower())
+        if fund is None:
+            return None
+        leaf = self._fund_leaf.get(str(fund))
+        if leaf is None:
+            path = tuple(message.get(level.lower()) for level in self.levels)
+            if any(part is None for part in path):
+                raise ValueError(f"New fund {fund} needs {', '.join(level.lower() for level in self.levels)}")
+            leaf = self._new_leaf(tuple(str(part) for part in path))
+        return leaf
+
+    def apply_price(self, fund: str, change: float) -> None:
+        """
+        Move every position of ``fund`` by ``change`` percent.
+
+        With p = change / 100, each position's value scales by (1 + p) and its
+        return r becomes (1 + p) r + 100 p, so the fund's value V and
+        value-weighted return W become (1 + p) V and
+        (1 + p)^2 W + 100 p (1 + p) V.
+
+        Changes at or below -100% are rejected: they would zero the fund's
+        price factor, and positions are stored relative to it.
+        """
+        if not change > -100.0:
+            raise ValueError(f"Price change for {fund} must be above -100%, got {change}")
+        with self._lock:
+            leaf = self._fund_leaf.get(str(fund))
+            if leaf is None:
+                raise KeyError(f"Unknown fund: {fund}")
+            growth = 1.0 + change / 100.0
+            value, weighted = self._value[leaf], self._weighted[leaf]
+            self._factor[leaf] *= growth
+            self._add_to_leaf(leaf, (growth - 1.0) * value,
+                              (growth * growth - 1.0) * weighted + change * growth * value, 0)
+
+    def _current(self, row: int) -> Tuple[int, float, float]:
+        leaf = int(self._position_leaf[row])
+        factor = self._factor[leaf]
+        return leaf, self._base_value[row] * factor, ((1.0 + self._base_return[row] / 100.0) * factor - 1.0) * 100.0
+
+    def apply_position(self, message: Dict[str, Any]) -> None:
+        """Set, add or (with a zero market value) close one position."""
+        with self._lock:
+            value = float(message['market_value'])
+            row = self._row.get(message['position'])
+            is_open = row is not None and self._position_leaf[row] >= 0
+            leaf = self._leaf_for(message)
+            if leaf is None and not is_open:
+                raise ValueError(f"New position {message['position']} needs a fund")
+
+            old_return = 0.0
+            if is_open:
+                old_leaf, old_value, old_return = self._current(row)
+                self._add_to_leaf(old_leaf, -old_value, -old_value * old_return, -1)
+                leaf = old_leaf if leaf is None else leaf
+            if row is None:
+                row = self._num_positions
+                self._num_positions += 1
+                self._row[message['position']] = row
+                self._base_value = _grow(self._base_value, row + 1)
+                self._base_return = _grow(self._base_return, row + 1)
+                self._position_leaf = _grow(self._position_leaf, row + 1, -1)
+
+            if value <= 0:
+                self._position_leaf[row] = -1
+                return
+            ret = float(message.get('daily_return', old_return))
+            factor = self._factor[leaf]
+            self._position_leaf[row] = leaf
+            self._base_value[row] = value / factor
+            self._base_return[row] = ((1.0 + ret / 100.0) / factor - 1.0) * 100.0
+            self._add_to_leaf(leaf, value, value * ret, 1)
+
+    def apply(self, message: Dict[str, Any]) -> None:
+        kind = message.get('type')
+        if kind == 'price':
+            self.apply_price(message['fund'], float(message['change']))
+        elif kind == 'position':
+            self.apply_position(message)
+        else:
+            raise ValueError(f"Unknown message type: {kind}")
+
+    def changed_since(self, version: int) -> np.ndarray:
+        """Indices of funds changed after ``version``."""
+        with self._lock:
+            return np.flatnonzero(self._leaf_version[:self.num_leaves] > version)
+
+    def leaf_totals(self, leaves: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Copies of (value, weighted return, count) for the given funds (default: all)."""
+        with self._lock:
+            leaves = np.arange(self.num_leaves) if leaves is None else leaves
+            return self._value[leaves].copy(), self._weighted[leaves].copy(), self._count[leaves].copy()
+
+    def parent_codes(self, depth: int) -> np.ndarray:
+        """Code of each fund's ancestor at ``depth`` (1 = top level)."""
+        return self._parent_codes[depth - 1][:self.num_leaves]
+
+    def prefixes(self, depth: int) -> List[Tuple[str, ...]]:
+        return self._prefixes[depth - 1]
+
+    def fund_path(self, leaf: int) -> Tuple[str, ...]:
+        return self._paths[leaf]
+
+    def _totals_frame(self, keys: Sequence[Tuple[str, ...]], columns: Sequence[str],
+                      value: np.ndarray, weighted: np.ndarray, count: np.ndarray) -> pd.DataFrame:
+        frame = pd.DataFrame(list(keys), columns=list(columns))
+        frame['Market_Value'] = value
+        frame['Daily_Return'] = np.divide(weighted, value, out=np.zeros(len(value)), where=value > 0)
+        frame['Positions'] = count
+        frame['Percentage'] = value / self.total * 100.0 if self.total else 0.0
+        return frame[frame['Positions'] > 0].reset_index(drop=True)
+
+    def level_frame(self, depth: int = 1) -> pd.DataFrame:
+        """Totals, value-weighted daily return and share of the book per node at ``depth``."""
+        with self._lock:
+            if depth == len(self.levels):
+                n = self.num_leaves
+                return self._totals_frame(self._paths, self.levels, self._value[:n], self._weighted[:n],
+                                          self._count[:n])
+            prefixes = self._prefixes[depth - 1]
+            value, weighted, count = (array[:len(prefixes)] for array in self._level_totals[depth - 1])
+            return self._totals_frame(prefixes, self.levels[:depth], value, weighted, count)
+
+    def positions_frame(self) -> pd.DataFrame:
+        """Materialise every open position at current prices (for display and checks; O(positions))."""
+        with self._lock:
+            n = self._num_positions
+            leaf = self._position_leaf[:n]
+            open_rows = np.flatnonzero(leaf >= 0)
+            factor = self._factor[leaf[open_rows]]
+            ids = np.empty(n, dtype=object)
+            for key, row in self._row.items():
+                ids[row] = key
+            paths = pd.DataFrame([self._paths[i] for i in leaf[open_rows]], columns=self.levels)
+            value = self._base_value[open_rows] * factor
+            paths['Position'] = ids[open_rows]
+            paths['Market_Value'] = value
+            paths['Daily_Return'] = ((1.0 + self._base_return[open_rows] / 100.0) * factor - 1.0) * 100.0
+            paths['Percentage'] = value / self.total * 100.0
+            return paths
+
+
+class LiveTreemap:
+    """
+    Bounded treemap over LiveHoldings that reports only changed nodes.
+
+    ``build`` fixes the layout like utils.treemap.build_treemap (sector and
+    sub-industry nodes, the largest funds, and one "Other" bucket per
+    sub-industry for the rest) and maps every fund onto its node at each
+    depth. ``update`` then applies the changes of funds touched since the
+    previous call to those nodes only and returns just those rows. New funds
+    trigger a rebuild, after which every node is returned.
+    """
+
+    def __init__(self, holdings: LiveHoldings, max_nodes: int = 2_000):
+        self.holdings = holdings
+        self.max_nodes = max_nodes
+        self.build()
+
+    def build(self) -> pd.DataFrame:
+        holdings = self.holdings
+        depths = len(holdings.levels)
+        with holdings._lock:
+            self.version = holdings.version
+            self._num_leaves = holdings.num_leaves
+            self._value, self._weighted, self._count = holdings.leaf_totals()
+            parent_codes = [holdings.parent_codes(depth).copy() for depth in range(1, depths)]
+            prefixes = [list(holdings.prefixes(depth)) for depth in range(1, depths)]
+            paths = [holdings.fund_path(leaf) for leaf in range(self._num_leaves)]
+
+        ids, labels, parents, node_depth = [], [], [], []
+        self._node_of: List[np.ndarray] = []
+        for depth, (codes, keys) in enumerate(zip(parent_codes, prefixes), start=1):
+            offset = len(ids)
+            ids += ['/'.join(key) for key in keys]
+            labels += [key[-1] for key in keys]
+            parents += ['/'.join(key[:-1]) for key in keys]
+            node_depth += [depth] * len(keys)
+            self._node_of.append(offset + codes)
+
+        # Leaves: keep the largest funds within the budget, fold the rest into "Other"
+        leaf_parent = parent_codes[-1] if parent_codes else np.zeros(self._num_leaves, dtype=np.int64)
+        keep = np.ones(self._num_leaves, dtype=bool)
+        if len(ids) + self._num_leaves > self.max_nodes and parent_codes:
+            keep = _leaves_within_budget(leaf_parent, self._value, self.max_nodes - len(ids))
+        leaf_node = np.empty(self._num_leaves, dtype=np.int64)
+        kept = np.flatnonzero(keep)
+        leaf_node[kept] = len(ids) + np.arange(len(kept))
+        ids += ['/'.join(paths[leaf]) for leaf in kept]
+        labels += [paths[leaf][-1] for leaf in kept]
+        parents += ['/'.join(paths[leaf][:-1]) for leaf in kept]
+        node_depth += [depths] * len(kept)
+        folded = np.flatnonzero(~keep)
+        other_parents, other_code = np.unique(leaf_parent[folded], return_inverse=True)
+        leaf_node[folded] = len(ids) + other_code
+        for code in other_parents:
+            parent = '/'.join(prefixes[-1][code])
+            ids.append(f'{parent}/{OTHER_LABEL}')
+            labels.append(OTHER_LABEL)
+            parents.append(parent)
+            node_depth.append(depths)
+        self._node_of.append(leaf_node)
+
+        self._ids = np.array(ids, dtype=object)
+        self._labels = np.array(labels, dtype=object)
+        self._parents = np.array(parents, dtype=object)
+        self._depth = np.array(node_depth, dtype=np.int64)
+        size = len(ids)
+        self._node_value = np.zeros(size)
+        self._node_weighted = np.zeros(size)
+        self._node_count = np.zeros(size, dtype=np.int64)
+        self._apply(np.arange(self._num_leaves), self._value, self._weighted, self._count)
+        return self.frame()
+
+    def _apply(self, leaves: np.ndarray, d_value: np.ndarray, d_weighted: np.ndarray,
+               d_count: np.ndarray) -> np.ndarray:
+        touched = []
+        for node_of in self._node_of:
+            nodes = node_of[leaves]
+            np.add.at(self._node_value, nodes, d_value)
+            np.add.at(self._node_weighted, nodes, d_weighted)
+            np.add.at(self._node_count, nodes, d_count)
+            touched.append(nodes)
+        return np.unique(np.concatenate(touched)) if touched else np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def frame(self, nodes: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Node rows (all, or ``nodes``) with the columns of build_treemap."""
+        nodes = np.arange(len(self._ids)) if nodes is None else nodes
+        value = self._node_value[nodes]
+        return pd.DataFrame({
+            'id': self._ids[nodes],
+            'label': self._labels[nodes],
+            'parent': self._parents[nodes],
+            'value': value,
+            'count': self._node_count[nodes],
+            'depth': self._depth[nodes],
+            'color': np.divide(self._node_weighted[nodes], value, out=np.zeros(len(nodes)), where=value > 0),
+        })
+
+    @instrumented('live.treemap_update')
+    def update(self) -> pd.DataFrame:
+        """Rows of the nodes whose value, return or count changed since the last update."""
+        if self.holdings.num_leaves != self._num_leaves:
+            return self.build()
+        with self.holdings._lock:
+            version = self.holdings.version
+            leaves = self.holdings.changed_since(self.version)
+            value, weighted, count = self.holdings.leaf_totals(leaves)
+        self.version = version
+        if not len(leaves):
+            return self.frame(np.empty(0, dtype=np.int64))
+        nodes = self._apply(leaves, value - self._value[leaves], weighted - self._weighted[leaves],
+                            count - self._count[leaves])
+        self._value[leaves], self._weighted[leaves], self._count[leaves] = value, weighted, count
+        return self.frame(nodes)
+
+
+@dataclass
+class Undecodable:
+    """A line that is not a JSON object, passed on by a source so the pipeline can report it."""
+    line: str
+    error: str
+
+
+def _decode(line: bytes) -> Union[Dict[str, Any], Undecodable]:
+    """Parse one message line, turning a malformed line into an Undecodable instead of raising."""
+    try:
+        message = json.loads(line)
+    except ValueError as e:
+        return Undecodable(line.decode('utf-8', 'replace').strip(), str(e))
+    if not isinstance(message, dict):
+        return Undecodable(line.decode('utf-8', 'replace').strip(), "Message is not a JSON object")
+    return message
+
+
+class FileDropSource:
+    """
+    Newline-delimited JSON files dropped into a directory.
+
+    Files are read from where the previous poll stopped, so both new files
+    and lines appended to existing ones are picked up; a trailing partial
+    line waits for the next poll. Writers should create files under another
+    name and rename them into place (see write_drop). With ``consume`` the
+    reader owns the directory and deletes files once they are fully read,
+    so it only suits writers that never append. Without it the directory is
+    shared and never cleaned, so the reader starts at the current end of
+    the files already there rather than replaying their history.
+    """
+
+    def __init__(self, directory: str, pattern: str = '*.jsonl', consume: bool = False):
+        self.directory = directory
+        self.pattern = pattern
+        self.consume = consume
+        self._offsets: Dict[str, int] = {}
+        if not consume:
+            for path in glob.glob(os.path.join(directory, pattern)):
+                self._offsets[path] = os.path.getsize(path)
+
+    def poll(self) -> List[Union[Dict[str, Any], Undecodable]]:
+        messages = []
+        for path in sorted(glob.glob(os.path.join(self.directory, self.pattern))):
+            offset = self._offsets.get(path, 0)
+            if os.path.getsize(path) <= offset:
+                continue
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+            complete = data.rfind(b'\n') + 1
+            self._offsets[path] = offset + complete
+            messages += [_decode(line) for line in data[:complete].splitlines() if line.strip()]
+            if self.consume and complete == len(data):
+                os.unlink(path)
+                del self._offsets[path]
+        return messages
+
+
+class _LineHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if line.strip():
+                self.server.messages.put(_decode(line))
+
+
+class SocketSource:
+    """Local TCP listener queueing newline-delimited JSON messages from any number of feeders."""
+
+    def __init__(self, port: int = 0, host: str = '127.0.0.1'):
+        self._server = socketserver.ThreadingTCPServer((host, port), _LineHandler)
+        self._server.daemon_threads = True
+        self._server.messages = queue.Queue()
+        threading.Thread(target=self._server.serve_forever, name='holdings-socket', daemon=True).start()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def poll(self) -> List[Union[Dict[str, Any], Undecodable]]:
+        messages = []
+        while True:
+            try:
+                messages.append(self._server.messages.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@dataclass
+class IngestStats:
+    """Outcome of one pump of the ingestion pipeline."""
+    applied: int = 0
+    errors: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+class IngestionPipeline:
+    """Polls every source and applies the messages to a LiveHoldings table."""
+
+    def __init__(self, holdings: LiveHoldings, sources: Iterable[Any]):
+        self.holdings = holdings
+        self.sources = list(sources)
+        self.applied = 0
+
+    @instrumented('live.ingest')
+    def pump(self) -> IngestStats:
+        """Apply everything the sources have received; bad messages are reported, not raised."""
+        start = time.perf_counter()
+        stats = IngestStats()
+        for source in self.sources:
+            for message in source.poll():
+                if isinstance(message, Undecodable):
+                    stats.errors.append(f"{message.error}: {message.line[:200]}")
+                    continue
+                try:
+                    self.holdings.apply(message)
+                    stats.applied += 1
+                except (KeyError, ValueError, TypeError) as e:
+                    stats.errors.append(f"{e}: {json.dumps(message)[:200]}")
+        self.applied += stats.applied
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+
+def simulate_updates(funds: Sequence[str],
+                     positions: Sequence[Any],
+                     num_updates: int = 1_000,
+                     price_share: float = 0.9,
+                     seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Random price ticks and position revaluations standing in for a live feed.
+
+    Args:
+        funds: Fund names ticks are drawn from
+        positions: Position ids revalued by position messages
+        num_updates: Number of messages
+        price_share: Fraction of messages that are fund price ticks
+        seed: Random seed for reproducibility
+
+    Returns:
+        List of messages in the format accepted by LiveHoldings.apply
+    """
+    rng = np.random.default_rng(seed)
+    is_price = rng.random(num_updates) < price_share
+    fund = rng.integers(0, len(funds), num_updates)
+    position = rng.integers(0, len(positions), num_updates)
+    change = rng.normal(0.0, 0.25, num_updates)
+    value = np.round(rng.lognormal(11, 1.2, num_updates), 2)
+    ret = rng.normal(0.2, 1.5, num_updates)
+    return [
+        {'type': 'price', 'fund': funds[fund[i]], 'change': round(float(change[i]), 4)} if is_price[i] else
+        {'type': 'position', 'position': positions[position[i]], 'market_value': float(value[i]),
+         'daily_return': round(float(ret[i]), 4)}
+        for i in range(num_updates)
+    ]
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def write_drop(directory: str, messages: Sequence[Dict[str, Any]]) -> str:
+    """Write messages as one .jsonl file, renamed into place so readers never see it half written."""
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.writelines(json.dumps(message, default=_default) + '\n' for message in messages)
+    path = os.path.join(directory, f'{time.time_ns()}-{os.getpid()}.jsonl')
+    os.replace(tmp_path, path)
+    return path
+
+
+def send_messages(address: Tuple[str, int], messages: Sequence[Dict[str, Any]]) -> None:
+    with socket.create_connection(address) as conn:
+        conn.sendall(''.join(json.dumps(message, default=_default) + '\n' for message in messages).encode('utf-8'))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from utils.generate_data import generate_holdings_data
+
+    parser = argparse.ArgumentParser(description="Feed simulated holdings updates to a drop directory or socket.")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--drop', default=os.environ.get(DROP_ENV), help=f"Drop directory (default: ${DROP_ENV})")
+    target.add_argument('--port', type=int, help="Send to a SocketSource on this localhost port instead")
+    parser.add_argument('--num-positions', type=int, default=50_000,
+                        help="Size of the generated book the updates refer to (as on the heatmap page)")
+    parser.add_argument('--batch', type=int, default=1_000, help="Messages per batch")
+    parser.add_argument('--batches', type=int, default=10, help="Number of batches (0 runs until interrupted)")
+    parser.add_argument('--interval', type=float, default=1.0, help="Seconds between batches")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+    if args.drop is None and args.port is None:
+        parser.error(f"give --drop, --port or set {DROP_ENV}")
+
+    book = generate_holdings_data(args.num_positions, seed=42)
+    funds = book['Fund'].cat.categories.tolist()
+    positions = book['Position'].tolist()
+    rng = np.random.default_rng(args.seed)
+    sent = 0
+    try:
+        while args.batches == 0 or sent < args.batches:
+            messages = simulate_updates(funds, positions, args.batch, seed=int(rng.integers(2 ** 32)))
+            if args.port is not None:
+                send_messages(('127.0.0.1', args.port), messages)
+            else:
+                write_drop(args.drop, messages)
+            sent += 1
+            print(f"batch {sent}: {len(messages)} updates", flush=True)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
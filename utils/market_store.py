@@ -0,0 +1,308 @@
+"""
+Read-only market data shared by every session and process.
+
+Datasets (return matrices, holdings books, simulation results) are published
+as versioned snapshot files and memory-mapped on first use. Every session in
+a process shares one mapping per version through a reference-counted Lease,
+and other processes mapping the same file share its pages through the OS
+page cache, so a dataset costs its size once per machine, not once per
+session. Publishing a new version never disturbs sessions still reading an
+older one; versions beyond ``keep_versions`` are deleted once no session in
+this process holds them (mappings in other processes stay valid after the
+file is unlinked). Every parameter combination is its own dataset, so
+whole datasets are swept, least recently leased first, whenever the store
+outgrows its byte budget (PORTFOLIO_STORE_MAX_BYTES, default 2 GiB).
+
+The store lives in PORTFOLIO_STORE_DIR, else in ``store`` under
+PORTFOLIO_CACHE_DIR, else in a per-user temporary directory.
+"""
+import functools
+import hashlib
+import inspect
+import os
+import re
+import tempfile
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.cache import CACHE_DIR_ENV, estimate_nbytes, make_key
+from utils.snapshot import SUFFIX, load_snapshot, save_snapshot
+
+STORE_DIR_ENV = 'PORTFOLIO_STORE_DIR'
+STORE_MAX_BYTES_ENV = 'PORTFOLIO_STORE_MAX_BYTES'
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+_VERSION_FILE = re.compile(r'^v(\d+)' + re.escape(SUFFIX) + '$')
+
+
+class Lease:
+    """
+    One session's reference to a version of a stored dataset.
+
+    ``value`` is a read-only, memory-mapped view. The reference is returned
+    when ``release`` is called, when the lease is used as a context manager
+    and exits, or when the lease is garbage collected (e.g. with the session
+    state that held it).
+    """
+
+    def __init__(self, store: 'MarketDataStore', name: str, version: int, value: Any):
+        self.name = name
+        self.version = version
+        self.value = value
+        self._finalizer = weakref.finalize(self, store._release, name, version)
+
+    @property
+    def released(self) -> bool:
+        return not self._finalizer.alive
+
+    def release(self) -> None:
+        self._finalizer()
+
+    def __enter__(self) -> 'Lease':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    def __repr__(self) -> str:
+        return f"Lease({self.name!r}, version={self.version}{', released' if self.released else ''})"
+
+
+class MarketDataStore:
+    """Versioned snapshot files plus a process-wide table of reference-counted mappings."""
+
+    def __init__(self, directory: str, keep_versions: int = 2, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.keep_versions = keep_versions
+        self.max_bytes = max_bytes
+        self._mapped: Dict[Tuple[str, int], List[Any]] = {}  # (name, version) -> [value, refs, nbytes]
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _dataset_dir(self, name: str) -> str:
+        if not re.fullmatch(r'[\w.\-]+', name):
+            raise ValueError(f"Invalid dataset name: {name!r}")
+        return os.path.join(self.directory, name)
+
+    def _path(self, name: str, version: int) -> str:
+        return os.path.join(self._dataset_dir(name), f'v{version:06d}{SUFFIX}')
+
+    def versions(self, name: str) -> List[int]:
+        """Published versions of ``name``, oldest first."""
+        directory = self._dataset_dir(name)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(int(match.group(1)) for match in map(_VERSION_FILE.match, os.listdir(directory)) if match)
+
+    def latest(self, name: str) -> Optional[int]:
+        versions = self.versions(name)
+        return versions[-1] if versions else None
+
+    def publish(self, name: str, value: Any) -> int:
+        """
+        Write ``value`` as the next version of ``name``.
+
+        The snapshot is written under a temporary name and hard-linked to
+        the first free version number, which fails instead of overwriting
+        if another process claimed that number first, so readers only ever
+        see complete versions.
+
+        Returns:
+            The new version number
+        """
+        directory = self._dataset_dir(name)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            save_snapshot(tmp_path, value)
+            version = (self.latest(name) or 0) + 1
+            while True:
+                try:
+                    os.link(tmp_path, self._path(name, version))
+                    break
+                except FileExistsError:
+                    version += 1
+        finally:
+            os.unlink(tmp_path)
+        self.prune(name)
+        self.sweep(keep=name)
+        return version
+
+    def acquire(self, name: str, version: Optional[int] = None) -> Lease:
+        """
+        Lease a version of ``name`` (default: the latest), mapping it on first use in this process.
+
+        Raises:
+            KeyError: If the dataset or version has not been published
+        """
+        with self._lock:
+            version = self.latest(name) if version is None else version
+            if version is None:
+                raise KeyError(f"No published versions of {name}")
+            path = self._path(name, version)
+            entry = self._mapped.get((name, version))
+            if entry is None:
+                if not os.path.exists(path):
+                    raise KeyError(f"{name} has no version {version}")
+                value = load_snapshot(path)
+                entry = self._mapped[(name, version)] = [value, 0, estimate_nbytes(value)]
+            entry[1] += 1
+            try:
+                os.utime(path)  # Last use, for sweep
+            except OSError:
+                pass
+            return Lease(self, name, version, entry[0])
+
+    def get_or_publish(self, name: str, factory: Callable[[], Any]) -> Lease:
+        """Lease the latest version of ``name``, publishing ``factory()`` first if there is none."""
+        with self._lock:
+            try:
+                return self.acquire(name)
+            except KeyError:  # Never published, or swept by another process
+                self.publish(name, factory())
+                return self.acquire(name)
+
+    def _release(self, name: str, version: int) -> None:
+        with self._lock:
+            entry = self._mapped.get((name, version))
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1] <= 0:
+                # Nobody in this process reads this version any more; it is mapped again on the next lease
+                del self._mapped[(name, version)]
+                self.prune(name)
+
+    def refs(self, name: str, version: int) -> int:
+        with self._lock:
+            entry = self._mapped.get((name, version))
+            return entry[1] if entry is not None else 0
+
+    def prune(self, name: str) -> List[int]:
+        """
+        Delete versions older than the newest ``keep_versions`` that no session here still leases.
+
+        Returns:
+            Deleted version numbers
+        """
+        with self._lock:
+            deleted = []
+            for version in self.versions(name)[:-self.keep_versions or None]:
+                if self.refs(name, version):
+                    continue
+                try:
+                    os.unlink(self._path(name, version))
+                except OSError:
+                    continue  # e.g. still mapped on a platform that forbids unlinking
+                self._mapped.pop((name, version), None)
+                deleted.append(version)
+            return deleted
+
+    def sweep(self, keep: Optional[str] = None) -> List[str]:
+        """
+        Delete whole datasets, least recently leased first, until the store fits in ``max_bytes``.
+
+        Datasets leased in this process and ``keep`` (e.g. one just
+        published) are never deleted; other processes keep reading any
+        dataset they have already mapped.
+
+        Returns:
+            Names of the deleted datasets
+        """
+        with self._lock:
+            leased = {name for name, _ in self._mapped}
+            datasets, total = [], 0
+            for entry in os.scandir(self.directory):
+                if not entry.is_dir():
+                    continue
+                files = [os.stat(os.path.join(entry.path, f)) for f in os.listdir(entry.path)
+                         if _VERSION_FILE.match(f)]
+                size = sum(f.st_size for f in files)
+                total += size
+                datasets.append((max((f.st_mtime for f in files), default=0.0), entry.name, size))
+            deleted = []
+            for _, name, size in sorted(datasets):
+                if total <= self.max_bytes:
+                    break
+                if name in leased or name == keep:
+                    continue
+                for version in self.versions(name):
+                    try:
+                        os.unlink(self._path(name, version))
+                    except OSError:
+                        pass
+                try:
+                    os.rmdir(self._dataset_dir(name))
+                except OSError:
+                    pass  # e.g. another process is publishing into it
+                total -= size
+                deleted.append(name)
+            return deleted
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """One row per mapped version: dataset, version, references and mapped bytes."""
+        with self._lock:
+            return [{'dataset': name, 'version': version, 'refs': refs, 'bytes': nbytes,
+                     'latest': version == self.latest(name)}
+                    for (name, version), (_, refs, nbytes) in sorted(self._mapped.items())]
+
+
+def _code_digest(func: Callable) -> str:
+    """Hash of a function's source, so datasets from older code are not served."""
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = f'{func.__module__}.{func.__qualname__}'
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]
+
+
+_default_store: Optional[MarketDataStore] = None
+_default_lock = threading.Lock()
+
+
+def default_store_dir() -> str:
+    if os.environ.get(STORE_DIR_ENV):
+        return os.environ[STORE_DIR_ENV]
+    if os.environ.get(CACHE_DIR_ENV):
+        return os.path.join(os.environ[CACHE_DIR_ENV], 'store')
+    user = getattr(os, 'getuid', lambda: 'user')()
+    return os.path.join(tempfile.gettempdir(), f'portfolio-store-{user}')
+
+
+def get_store() -> MarketDataStore:
+    """Return the process-wide store shared by all sessions."""
+    global _default_store
+    directory = default_store_dir()
+    with _default_lock:
+        if _default_store is None or _default_store.directory != directory:
+            _default_store = MarketDataStore(directory,
+                                             max_bytes=int(os.environ.get(STORE_MAX_BYTES_ENV, DEFAULT_MAX_BYTES)))
+        return _default_store
+
+
+def shared(func: Optional[Callable] = None, *, store: Optional[MarketDataStore] = None) -> Callable:
+    """
+    Publish a data-generating function's result to the store and lease it.
+
+    Like utils.cache.cached, but the result is a Lease on a memory-mapped
+    snapshot shared with every other session and process, and the dataset
+    name also covers the function's source code. Results must be arrays,
+    tuples/dicts of arrays or DataFrames.
+
+    Returns:
+        Wrapped function returning a Lease whose ``value`` is the result
+    """
+    def decorator(target: Callable) -> Callable:
+        qualname = f'{target.__module__}.{target.__qualname__}'
+        digest = _code_digest(target)
+
+        @functools.wraps(target)
+        def wrapper(*args, **kwargs) -> Lease:
+            name = f'{target.__name__}-{digest}-{make_key(qualname, args, kwargs)[:16]}'
+            return (store or get_store()).get_or_publish(name, lambda: target(*args, **kwargs))
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,317 @@
+import importlib.util
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.instrument import instrumented
+from utils.startup import lazy_import
+
+# scipy.linalg costs more to import than the rest of the app; load it on the first solve
+HAS_SCIPY = importlib.util.find_spec('scipy') is not None
+scipy_linalg = lazy_import('scipy.linalg')
+
+
+@dataclass
+class CholeskyFactor:
+    """Lower Cholesky factor of a positive definite matrix, reusable across solves."""
+    lower: np.ndarray
+    inverse: Optional[np.ndarray] = None
+
+    @classmethod
+    def factorize(cls, matrix: np.ndarray) -> 'CholeskyFactor':
+        lower = np.linalg.cholesky(matrix)
+        # Without scipy there is no triangular solver, so invert the factor once instead
+        inverse = None if HAS_SCIPY else np.linalg.inv(lower)
+        return cls(lower, inverse)
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        """Solve (L L^T) x = rhs for one or many right-hand sides."""
+        if self.inverse is not None:
+            return self.inverse.T @ (self.inverse @ rhs)
+        y = scipy_linalg.solve_triangular(self.lower, rhs, lower=True, check_finite=False)
+        return scipy_linalg.solve_triangular(self.lower, y, lower=True, trans='T', check_finite=False)
+
+
+@dataclass
+class FrontierResult:
+    """Efficient frontier points plus the solver state needed to warm start."""
+    targets: np.ndarray
+    weights: np.ndarray
+    returns: np.ndarray
+    risks: np.ndarray
+    stats: Dict[str, float] = field(default_factory=dict)
+    duals: Optional[np.ndarray] = None
+
+
+def _series_levels(series_data: Dict[str, Sequence]) -> np.ndarray:
+    names = sorted((k for k in series_data if k.startswith('series_')),
+                   key=lambda k: int(k.split('_')[1]))
+    return np.column_stack([np.asarray(series_data[name], dtype=float) for name in names])
+
+
+def series_to_returns(series_data: Dict[str, List]) -> np.ndarray:
+    """
+    Convert generate_time_series_data output into a T x N return matrix.
+
+    The generated series are scaled random walks, so their period-to-period
+    increments are interpreted as returns quoted in basis points.
+
+    Args:
+        series_data: Dictionary with 'dates' and 'series_<i>' value lists
+
+    Returns:
+        Array of shape (num_days - 1, num_series)
+    """
+    return np.diff(_series_levels(series_data), axis=0) / 10_000.0
+
+
+def iter_series_returns(batches: Iterable[Dict[str, np.ndarray]]) -> Iterator[np.ndarray]:
+    """
+    Convert streamed generate_data.iter_time_series_batches output into return blocks.
+
+    The last level of each batch is carried over, so the concatenated blocks
+    equal series_to_returns applied to the whole history.
+
+    Args:
+        batches: Record batches with 'series_<i>' arrays
+
+    Yields:
+        Arrays of shape (rows, num_series); the first block has one row fewer
+    """
+    previous = None
+    for batch in batches:
+        levels = _series_levels(batch)
+        if previous is not None:
+            levels = np.vstack([previous, levels])
+        previous = levels[-1:]
+        yield np.diff(levels, axis=0) / 10_000.0
+
+
+def estimate_moments(returns: np.ndarray, ridge: float = 1e-6) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Estimate expected returns and a positive definite covariance matrix.
+
+    Args:
+        returns: T x N matrix of asset returns
+        ridge: Diagonal loading relative to the average variance
+
+    Returns:
+        Tuple of (mu, covariance)
+    """
+    mu = returns.mean(axis=0)
+    cov = np.cov(returns, rowvar=False)
+    cov[np.diag_indices_from(cov)] += ridge * np.trace(cov) / cov.shape[0]
+    return mu, cov
+
+
+def _admm_batch(factor: CholeskyFactor,
+                A: np.ndarray,
+                B: np.ndarray,
+                rho: float,
+                Z: np.ndarray,
+                U: np.ndarray,
+                tol: float,
+                max_iter: int,
+                alpha: float = 1.6) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Solve min 1/2 w'Σw s.t. A w = b, w >= 0 for every column b of B at once.
+
+    Uses the over-relaxed ADMM splitting w = z with z >= 0. The factor of
+    (Σ + ρI) is shared by all columns and iterations, so each iteration
+    costs a pair of triangular solves with K right-hand sides.
+    Converged columns are frozen and dropped from subsequent iterations.
+    """
+    n, k = Z.shape
+    MinvAt = factor.solve(A.T)
+    schur = A @ MinvAt
+    iterations = np.zeros(k, dtype=int)
+    active = np.arange(k)
+
+    for it in range(1, max_iter + 1):
+        z, u, b = Z[:, active], U[:, active], B[:, active]
+        v = factor.solve(rho * (z - u))
+        lam = np.linalg.solve(schur, A @ v - b)
+        w = v - MinvAt @ lam
+
+        w_hat = alpha * w + (1.0 - alpha) * z
+        z_new = np.maximum(w_hat + u, 0.0)
+        u += w_hat - z_new
+
+        primal = np.linalg.norm(w - z_new, axis=0)
+        dual = rho * np.linalg.norm(z_new - z, axis=0)
+        scale = np.maximum(np.linalg.norm(w, axis=0), np.linalg.norm(z_new, axis=0))
+        done = (primal <= tol * (1e-2 + scale)) & (dual <= tol * (1e-2 + rho * np.linalg.norm(u, axis=0)))
+
+        Z[:, active] = z_new
+        U[:, active] = u
+        iterations[active] = it
+        active = active[~done]
+        if active.size == 0:
+            break
+
+    converged = np.ones(k, dtype=bool)
+    converged[active] = False
+    return Z, iterations, converged
+
+
+def _polish(cov: np.ndarray,
+            A: np.ndarray,
+            b: np.ndarray,
+            z: np.ndarray,
+            threshold: float = 1e-4,
+            kkt_tol: float = 1e-9,
+            max_iter: int = 50) -> Optional[np.ndarray]:
+    """
+    Refine an approximate ADMM solution into an exact one with an active-set pass.
+
+    Starting from the support of ``z``, repeatedly solve the KKT system on
+    the support, dropping assets whose weight turns negative and adding
+    excluded assets whose gradient shows they would lower the objective.
+    Returns None if no consistent support is found within ``max_iter``.
+    """
+    m = A.shape[0]
+    support = np.flatnonzero(z > threshold * z.max())
+    for _ in range(max_iter):
+        if support.size < m:
+            return None
+        size = support.size
+        kkt = np.zeros((size + m, size + m))
+        kkt[:size, :size] = cov[np.ix_(support, support)]
+        kkt[:size, size:] = A[:, support].T
+        kkt[size:, :size] = A[:, support]
+        try:
+            solution = np.linalg.solve(kkt, np.concatenate([np.zeros(size), b]))
+        except np.linalg.LinAlgError:
+            return None
+        weights, multipliers = solution[:size], solution[size:]
+
+        negative = weights < -kkt_tol
+        if negative.any():
+            support = support[~negative]
+            continue
+
+        w = np.zeros_like(z)
+        w[support] = weights
+        gradient = cov @ w + A.T @ multipliers
+        gradient[support] = 0.0
+        violators = np.flatnonzero(gradient < -kkt_tol * (np.abs(multipliers).max() + 1.0))
+        if violators.size == 0:
+            return np.maximum(w, 0.0)
+        support = np.union1d(support, violators)
+    return None
+
+
+@instrumented
+def efficient_frontier(mu: np.ndarray,
+                       cov: np.ndarray,
+                       num_points: int = 50,
+                       targets: Optional[Sequence[float]] = None,
+                       long_only: bool = True,
+                       rho: float = 3.0,
+                       tol: float = 3e-2,
+                       max_iter: int = 2000,
+                       polish: bool = True,
+                       warm_start: Optional[FrontierResult] = None) -> FrontierResult:
+    """
+    Compute minimum-variance portfolios for a grid of target returns.
+
+    Without the long-only constraint the whole frontier follows in closed
+    form from one Cholesky factorisation. With it, all targets are solved
+    together by a batched ADMM that reuses a single factor of (Σ + ρI),
+    warm started from the projected closed-form solution or from a previous
+    result (e.g. the prior rebalance date), and each point is then polished
+    to the exact solution on its support.
+
+    Args:
+        mu: Expected returns, shape (N,)
+        cov: Covariance matrix, shape (N, N)
+        num_points: Number of frontier points when targets is not given
+        targets: Explicit target returns
+        long_only: Restrict weights to be non-negative
+        rho: ADMM penalty relative to the average asset variance
+        tol: Relative convergence tolerance
+        max_iter: Maximum ADMM iterations
+        polish: Refine each point by solving the KKT system on its support
+        warm_start: Previous result with the same number of assets and points
+
+    Returns:
+        FrontierResult with weights of shape (K, N) and timing stats
+    """
+    mu = np.asarray(mu, dtype=float)
+    cov = np.asarray(cov, dtype=float)
+    n = mu.size
+    ones = np.ones(n)
+    A = np.vstack([mu, ones])
+    stats: Dict[str, float] = {'num_assets': n}
+
+    start = time.perf_counter()
+    # Work on Σ scaled to unit average variance so rho and tol are scale free
+    scaled = cov / (np.trace(cov) / n)
+    factor = CholeskyFactor.factorize(scaled if not long_only else scaled + rho * np.eye(n))
+    stats['factorize_seconds'] = time.perf_counter() - start
+
+    solve_start = time.perf_counter()
+    if targets is None:
+        if long_only:
+            # Long-only frontier starts at the long-only minimum-variance portfolio
+            budget = ones[None, :]
+            gmv, _, _ = _admm_batch(factor, budget, np.ones((1, 1)), rho,
+                                    np.full((n, 1), 1.0 / n), np.zeros((n, 1)), tol, max_iter)
+            gmv = gmv[:, 0]
+            exact = _polish(scaled, budget, np.ones(1), gmv) if polish else None
+            gmv = exact if exact is not None else gmv
+            low = float(mu @ gmv / gmv.sum())
+        else:
+            inv_ones = factor.solve(ones)
+            low = float(mu @ inv_ones / inv_ones.sum())
+        targets = np.linspace(low, mu.max(), num_points)
+    targets = np.asarray(targets, dtype=float)
+    B = np.vstack([targets, np.ones_like(targets)])
+
+    if not long_only:
+        # Closed form: w = Σ^-1 A' (A Σ^-1 A')^-1 b for every target at once
+        inv_At = factor.solve(A.T)
+        W = inv_At @ np.linalg.solve(A @ inv_At, B)
+        iterations = np.zeros(targets.size, dtype=int)
+        converged = np.ones(targets.size, dtype=bool)
+        U = None
+    else:
+        if warm_start is not None and warm_start.weights.shape == (targets.size, n):
+            Z = warm_start.weights.T.copy()
+            U = warm_start.duals.copy() if warm_start.duals is not None else np.zeros_like(Z)
+        else:
+            inv_At = factor.solve(A.T)
+            Z = np.maximum(inv_At @ np.linalg.solve(A @ inv_At, B), 0.0)
+            U = np.zeros_like(Z)
+        W, iterations, converged = _admm_batch(factor, A, B, rho, Z, U, tol, max_iter)
+        polished = 0
+        if polish:
+            for j in range(targets.size):
+                exact = _polish(scaled, A, B[:, j], W[:, j])
+                if exact is not None:
+                    W[:, j] = exact
+                    converged[j] = True
+                    polished += 1
+        stats['polished_points'] = polished
+        W = W / W.sum(axis=0, keepdims=True)
+
+    stats['solve_seconds'] = time.perf_counter() - solve_start
+    stats['total_seconds'] = stats['factorize_seconds'] + stats['solve_seconds']
+    stats['num_points'] = targets.size
+    stats['seconds_per_point'] = stats['solve_seconds'] / max(targets.size, 1)
+    stats['max_iterations'] = int(iterations.max()) if iterations.size else 0
+    stats['mean_iterations'] = float(iterations.mean()) if iterations.size else 0.0
+    stats['converged_points'] = int(converged.sum())
+
+    weights = W.T
+    risks = np.sqrt(np.maximum(np.sum((weights @ cov) * weights, axis=1), 0.0))
+    return FrontierResult(
+        targets=targets,
+        weights=weights,
+        returns=weights @ mu,
+        risks=risks,
+        stats=stats,
+        duals=U,
+    )
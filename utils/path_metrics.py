@@ -0,0 +1,220 @@
+"""
+Path-dependent risk metrics of simulated wealth paths.
+
+Maximum drawdown, longest drawdown, time under water, the underwater curve
+and expected shortfall need the whole path, not just the percentile bands.
+The per-path kernel is compiled with numba when it is installed and falls
+back to an equivalent vectorised NumPy implementation otherwise.
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+prange = numba.prange if HAS_NUMBA else range
+
+# Per-path outputs of PathMetrics.result
+PATH_METRICS = ('max_drawdown', 'longest_drawdown', 'time_under_water', 'terminal')
+BACKENDS = ('auto', 'numba', 'numpy')
+
+
+def _update_loop(wealth, peak, max_dd, run, max_run, under, drawdown):
+    """
+    Reference kernel: one pass over each path with O(1) state.
+
+    ``wealth`` is (paths, periods) and ``drawdown`` (periods, paths). Compiled
+    with numba (parallel over paths) when it is installed; the same source
+    run as plain Python is the definition the NumPy backend is checked
+    against.
+    """
+    n, t = wealth.shape
+    for i in prange(n):
+        p = peak[i]
+        m = max_dd[i]
+        r = run[i]
+        mr = max_run[i]
+        u = under[i]
+        for j in range(t):
+            w = wealth[i, j]
+            if w > p:
+                p = w
+            d = w / p - 1.0
+            drawdown[j, i] = d
+            if d < 0.0:
+                r += 1
+                u += 1
+                if r > mr:
+                    mr = r
+                if d < m:
+                    m = d
+            else:
+                r = 0
+        peak[i] = p
+        max_dd[i] = m
+        run[i] = r
+        max_run[i] = mr
+        under[i] = u
+
+
+_update_jit = numba.njit(parallel=True, cache=True)(_update_loop) if HAS_NUMBA else None
+
+
+def _update_numpy(wealth, peak, max_dd, run, max_run, under, drawdown):
+    """
+    Vectorised equivalent of _update_loop, stepping over periods with whole-column operations.
+
+    Blocks are short in time and wide in paths, so a Python loop over
+    periods costs little, and each step reads one column, which is
+    contiguous when ``wealth`` is the transpose of a (periods, paths) array.
+    """
+    wet = np.empty(len(peak), dtype=bool)
+    for j in range(wealth.shape[1]):
+        column = wealth[:, j]
+        d = drawdown[j]
+        np.maximum(peak, column, out=peak)
+        np.divide(column, peak, out=d)
+        d -= 1.0
+        np.less(d, 0.0, out=wet)
+        # Extend underwater runs and reset the others to zero
+        run += wet
+        run *= wet
+        np.maximum(max_run, run, out=max_run)
+        under += wet
+    np.minimum(max_dd, drawdown.min(axis=0), out=max_dd)
+
+
+class PathMetrics:
+    """
+    Path-dependent risk of simulated wealth paths, accumulated block by block.
+
+    Each path carries only its running peak, deepest drawdown, current and
+    longest underwater run and periods under water, so wealth can arrive in
+    time blocks (as produced by simulate_percentile_bands) or in row chunks
+    of a larger matrix. Blocks are read, never modified or copied; the only
+    work buffer is one (periods, paths) drawdown block reused between calls.
+    Passing the transpose of a (periods, paths) array, as the simulation
+    does, keeps every column read contiguous. Per-period mean
+    drawdown and the fraction of paths under water form the underwater curve.
+    """
+
+    def __init__(self, num_paths: int, initial_value: float = 1.0, backend: str = 'auto'):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        if backend == 'numba' and not HAS_NUMBA:
+            raise ImportError("numba is required for the numba backend")
+        self.backend = 'numba' if backend == 'auto' and HAS_NUMBA else ('numpy' if backend == 'auto' else backend)
+        self.peak = np.full(num_paths, float(initial_value))
+        self.max_drawdown = np.zeros(num_paths)
+        self.run = np.zeros(num_paths, dtype=np.int64)
+        self.longest = np.zeros(num_paths, dtype=np.int64)
+        self.under = np.zeros(num_paths, dtype=np.int64)
+        self.terminal = np.full(num_paths, float(initial_value))
+        self.periods = 0
+        self._scratch: Optional[np.ndarray] = None
+        self._curve_mean = []
+        self._curve_fraction = []
+
+    def _buffer(self, periods: int, paths: int) -> np.ndarray:
+        if self._scratch is None or self._scratch.shape[0] < periods or self._scratch.shape[1] < paths:
+            self._scratch = np.empty((periods, paths))
+        return self._scratch[:periods, :paths]
+
+    def update(self, wealth: np.ndarray) -> 'PathMetrics':
+        """Consume the next time block of wealth, shape (num_paths, periods)."""
+        wealth = np.asarray(wealth)
+        drawdown = self._buffer(wealth.shape[1], wealth.shape[0])
+        kernel = _update_jit if self.backend == 'numba' else _update_numpy
+        kernel(wealth, self.peak, self.max_drawdown, self.run, self.longest, self.under, drawdown)
+        self._curve_mean.append(drawdown.mean(axis=1))
+        self._curve_fraction.append((drawdown < 0.0).mean(axis=1))
+        self.terminal[:] = wealth[:, -1]
+        self.periods += wealth.shape[1]
+        return self
+
+    def result(self) -> Dict[str, np.ndarray]:
+        """Per-path metrics in PATH_METRICS plus the underwater curve."""
+        empty = np.empty(0)
+        return {
+            'max_drawdown': self.max_drawdown.copy(),
+            'longest_drawdown': self.longest.copy(),
+            'time_under_water': self.under / max(self.periods, 1),
+            'terminal': self.terminal.copy(),
+            'underwater_mean': np.concatenate(self._curve_mean) if self._curve_mean else empty,
+            'underwater_fraction': np.concatenate(self._curve_fraction) if self._curve_fraction else empty,
+        }
+
+
+def path_metrics(wealth: np.ndarray,
+                 initial_value: float = 1.0,
+                 chunk_rows: int = 10_000,
+                 backend: str = 'auto') -> Dict[str, np.ndarray]:
+    """
+    Path-dependent metrics of a full (num_paths, num_periods) wealth matrix.
+
+    Rows are processed in chunks of ``chunk_rows`` through views of the
+    matrix, so the work buffer stays at num_periods x chunk_rows whatever
+    the number of paths.
+
+    Args:
+        wealth: Wealth paths, one row per scenario
+        initial_value: Wealth before the first period (the first peak)
+        chunk_rows: Paths per chunk
+        backend: 'auto', 'numba' or 'numpy'
+
+    Returns:
+        Dictionary with the PATH_METRICS arrays and the underwater curve
+    """
+    wealth = np.asarray(wealth)
+    num_paths, num_periods = wealth.shape
+    results = []
+    for start in range(0, num_paths, chunk_rows):
+        chunk = wealth[start:start + chunk_rows]
+        results.append((len(chunk), PathMetrics(len(chunk), initial_value, backend).update(chunk).result()))
+    combined = {name: np.concatenate([r[name] for _, r in results]) for name in PATH_METRICS}
+    weights = np.array([n for n, _ in results], dtype=float) / num_paths
+    for name in ('underwater_mean', 'underwater_fraction'):
+        combined[name] = sum(w * r[name] for w, (_, r) in zip(weights, results))
+    return combined
+
+
+def expected_shortfall(returns: np.ndarray, alpha: float = 0.05) -> Tuple[float, float]:
+    """
+    Value at risk and conditional value at risk (expected shortfall) of returns.
+
+    Uses a partial sort, O(n), instead of sorting every scenario.
+
+    Returns:
+        (VaR, CVaR) as positive loss fractions at the ``alpha`` tail
+    """
+    returns = np.asarray(returns, dtype=float).ravel()
+    k = max(int(np.ceil(alpha * len(returns))), 1)
+    tail = np.partition(returns, k - 1)[:k]
+    return float(-tail.max()), float(-tail.mean())
+
+
+def summarize_path_metrics(metrics: Dict[str, np.ndarray],
+                           initial_value: float = 1.0,
+                           alpha: float = 0.05) -> Dict[str, float]:
+    """
+    Scalar summary of per-path metrics for display.
+
+    Returns:
+        Median and tail max drawdown, median longest drawdown in periods,
+        mean time under water and VaR/CVaR of the terminal return
+    """
+    drawdown = -metrics['max_drawdown']
+    var, cvar = expected_shortfall(metrics['terminal'] / initial_value - 1.0, alpha)
+    return {
+        'median_max_drawdown': float(np.median(drawdown)),
+        'tail_max_drawdown': float(np.quantile(drawdown, 1.0 - alpha)),
+        'cvar_max_drawdown': float(-expected_shortfall(-drawdown, alpha)[1]),
+        'median_longest_drawdown': float(np.median(metrics['longest_drawdown'])),
+        'mean_time_under_water': float(np.mean(metrics['time_under_water'])),
+        'var': var,
+        'cvar': cvar,
+    }
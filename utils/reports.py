@@ -0,0 +1,378 @@
+import importlib.util
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from utils.cache import DiskCache, LRUCache, get_disk_cache, get_memory_cache, make_key
+from utils.instrument import instrumented
+from utils.startup import lazy_import
+
+# Finished jobs remembered for status polling before the oldest are forgotten
+MAX_TRACKED_JOBS = 256
+
+# pdfkit is only imported when the first PDF is rendered, keeping it off the page cold start
+HAS_PDFKIT = importlib.util.find_spec('pdfkit') is not None
+pdfkit = lazy_import('pdfkit')
+
+REPORT_TEMPLATE = """
+<html>
+    <head>
+        <title>Portfolio Allocation Report</title>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 40px; }}
+            h1 {{ color: #2e4053; }}
+            .date {{ color: #7f8c8d; margin-bottom: 30px; }}
+        </style>
+    </head>
+    <body>
+        <h1>Portfolio Allocation Report</h1>
+        <div class="date">Generated on: {generated_at}</div>
+        <h2>Portfolio Settings</h2>
+        <ul>
+            <li>Risk Level: {risk_level}/10</li>
+            <li>Investment Period: {investment_period}</li>
+        </ul>
+        <h2>Understanding the Growth Comparison</h2>
+        <h3>Conservative Portfolio</h3>
+        <ul>
+            <li>Lower volatility</li>
+            <li>More stable growth</li>
+            <li>Typically higher allocation to bonds and stable assets</li>
+        </ul>
+        <h3>Aggressive Portfolio</h3>
+        <ul>
+            <li>Higher volatility</li>
+            <li>Potential for higher returns</li>
+            <li>Typically higher allocation to stocks and growth assets</li>
+        </ul>
+    </body>
+</html>
+"""
+
+
+@dataclass
+class ReportJob:
+    """State of one report request, shared by every caller asking for the same inputs."""
+    job_id: str
+    status: str
+    submitted: float
+    finished: Optional[float] = None
+    pdf: Optional[bytes] = None
+    error: Optional[str] = None
+    cache_hit: bool = False
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def seconds(self) -> Optional[float]:
+        return None if self.finished is None else self.finished - self.submitted
+
+
+@instrumented('report.render_html')
+def render_report_html(inputs: Dict[str, Any]) -> str:
+    """
+    Fill the allocation report template.
+
+    Args:
+        inputs: Template fields (risk_level, investment_period, optional generated_at)
+
+    Returns:
+        HTML document as a string
+    """
+    fields = {'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), **inputs}
+    return REPORT_TEMPLATE.format(**fields)
+
+
+CLIENT_REPORT_TEMPLATE = """
+<html>
+    <head>
+        <title>Portfolio Allocation Report - {client_id}</title>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 40px; }}
+            h1 {{ color: #2e4053; }}
+            .date {{ color: #7f8c8d; margin-bottom: 30px; }}
+            td, th {{ padding: 4px 12px; text-align: right; }}
+        </style>
+    </head>
+    <body>
+        <h1>Portfolio Allocation Report</h1>
+        <div class="date">Client {client_id} - generated on: {generated_at}</div>
+        <h2>Portfolio Settings</h2>
+        <ul>
+            <li>Risk Level: {risk_level}/10</li>
+            <li>Investment Period: {investment_period}</li>
+            <li>Starting Value: ${initial_value:,.0f}</li>
+        </ul>
+        <h2>Projected Growth</h2>
+        {chart}
+        <table>
+            <tr><th>Percentile</th><th>Final Value</th></tr>
+            {rows}
+        </table>
+    </body>
+</html>
+"""
+
+# Monthly (mean, volatility) at the lowest and highest risk level, as in the Allocation Demo
+RISK_RANGE = ((0.004, 0.02), (0.007, 0.04))
+
+
+def risk_profile(risk_level: int):
+    """Monthly (mean, volatility) for a 1-10 risk level, interpolating RISK_RANGE."""
+    (low_mean, low_vol), (high_mean, high_vol) = RISK_RANGE
+    fraction = (min(max(risk_level, 1), 10) - 1) / 9
+    return low_mean + fraction * (high_mean - low_mean), low_vol + fraction * (high_vol - low_vol)
+
+
+def fan_chart_svg(bands: np.ndarray, width: int = 640, height: int = 300) -> str:
+    """
+    Draw percentile bands (5/25/50/75/95 rows) as an inline SVG fan chart.
+
+    Needs no plotting backend, so workers can build charts cheaply and
+    wkhtmltopdf renders them natively.
+    """
+    bands = np.asarray(bands, dtype=float)
+    low, high = bands.min(), bands.max()
+    x = np.linspace(0, width, bands.shape[1])
+    y = height - (bands - low) / max(high - low, 1e-12) * height
+
+    def points(row):
+        return ' '.join(f'{a:.1f},{b:.1f}' for a, b in zip(x, row))
+
+    def band(lower, upper, opacity):
+        outline = points(y[upper]) + ' ' + ' '.join(f'{a:.1f},{b:.1f}' for a, b in zip(x[::-1], y[lower][::-1]))
+        return f'<polygon points="{outline}" fill="rgb(31,119,180)" fill-opacity="{opacity}" stroke="none"/>'
+
+    middle = len(bands) // 2
+    shapes = [band(0, len(bands) - 1, 0.15)]
+    if len(bands) >= 5:
+        shapes.append(band(1, len(bands) - 2, 0.3))
+    shapes.append(f'<polyline points="{points(y[middle])}" fill="none" stroke="rgb(31,119,180)" stroke-width="2"/>')
+    return f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}">{"".join(shapes)}</svg>'
+
+
+@instrumented('report.render_client_html')
+def render_client_report_html(client: Dict[str, Any],
+                              percentiles: np.ndarray,
+                              bands: np.ndarray,
+                              chart: str) -> str:
+    """
+    Fill the per-client report template.
+
+    Args:
+        client: client_id, risk_level, investment_period and initial_value
+        percentiles: Percentile levels of the bands
+        bands: Simulated portfolio value bands, shape (P, num_periods)
+        chart: Inline chart markup, e.g. from fan_chart_svg
+
+    Returns:
+        HTML document as a string
+    """
+    rows = ''.join(f'<tr><td>{p:g}%</td><td>${v:,.0f}</td></tr>' for p, v in zip(percentiles, bands[:, -1]))
+    fields = {'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), **client}
+    return CLIENT_REPORT_TEMPLATE.format(chart=chart, rows=rows, **fields)
+
+
+@instrumented('report.html_to_pdf')
+def html_to_pdf(html: str, configuration: Optional[Any] = None) -> bytes:
+    """Render HTML to PDF bytes with wkhtmltopdf, without temporary files."""
+    if not HAS_PDFKIT:
+        raise ImportError("pdfkit is required to render PDF reports")
+    return pdfkit.from_string(html, False, configuration=configuration)
+
+
+def make_renderer(fmt: str = 'pdf') -> Callable[[str], bytes]:
+    """
+    Build a reusable HTML -> bytes renderer.
+
+    For PDF the wkhtmltopdf configuration (binary lookup) is resolved once
+    here rather than on every call.
+
+    Args:
+        fmt: 'pdf' or 'html' (HTML is written as-is and needs no wkhtmltopdf)
+
+    Returns:
+        Callable turning an HTML string into output bytes
+    """
+    if fmt == 'html':
+        return lambda html: html.encode('utf-8')
+    if fmt != 'pdf':
+        raise ValueError(f"Unknown report format: {fmt}")
+    if not HAS_PDFKIT:
+        raise ImportError("pdfkit is required to render PDF reports")
+    configuration = pdfkit.configuration()
+    return lambda html: html_to_pdf(html, configuration)
+
+
+class ReportService:
+    """
+    Background PDF rendering with a bounded worker pool and a content-hash cache.
+
+    ``submit`` returns immediately with a job id derived from the report
+    inputs. Identical requests share one job while it runs, and finished
+    PDFs are stored in the memory (and optional disk) cache under the same
+    key, so repeat downloads never re-render. Callers poll ``status`` and
+    fetch the bytes once the job is done.
+    """
+
+    def __init__(self,
+                 max_workers: int = 2,
+                 max_pending: int = 32,
+                 renderer: Callable[[str], bytes] = html_to_pdf,
+                 memory: Optional[LRUCache] = None,
+                 disk: Optional[DiskCache] = None):
+        self.max_pending = max_pending
+        self._renderer = renderer
+        self._memory = memory if memory is not None else get_memory_cache()
+        self._disk = disk
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='report')
+        self._jobs: Dict[str, ReportJob] = {}
+        self._lock = threading.Lock()
+        self._counts = {'submitted': 0, 'cache_hits': 0, 'rendered': 0, 'failed': 0}
+        self._render_seconds = 0.0
+
+    def _cached(self, key: str) -> Optional[bytes]:
+        pdf = self._memory.get(key)
+        if pdf is None and self._disk is not None:
+            pdf = self._disk.get(key)
+            if pdf is not None:
+                self._memory.put(key, pdf)
+        return pdf
+
+    def _render(self, job: ReportJob, inputs: Dict[str, Any]) -> None:
+        job.status = 'running'
+        start = time.perf_counter()
+        try:
+            pdf = self._renderer(render_report_html(inputs))
+        except Exception as e:
+            job.error, job.status = str(e), 'failed'
+            with self._lock:
+                self._counts['failed'] += 1
+        else:
+            self._memory.put(job.job_id, pdf)
+            if self._disk is not None:
+                self._disk.put(job.job_id, pdf)
+            job.pdf, job.status = pdf, 'done'
+            with self._lock:
+                self._counts['rendered'] += 1
+                self._render_seconds += time.perf_counter() - start
+        job.finished = time.perf_counter()
+
+    def submit(self, inputs: Dict[str, Any]) -> str:
+        """
+        Queue a report for rendering unless an identical one is cached or in flight.
+
+        The generation date is stamped into the inputs (unless given), so
+        the cache key covers it: a cached report is reused on the day it was
+        rendered and never served with a stale date.
+
+        Args:
+            inputs: Report inputs; with the generation date they determine the cache key
+
+        Returns:
+            Job id to pass to status and result
+        """
+        inputs = {'generated_at': datetime.now().strftime('%Y-%m-%d'), **inputs}
+        key = make_key('report', (), inputs)
+        now = time.perf_counter()
+        with self._lock:
+            self._counts['submitted'] += 1
+            job = self._jobs.get(key)
+            if job is not None and job.status in ('queued', 'running'):
+                return key
+            pdf = self._cached(key)
+            if pdf is not None:
+                self._counts['cache_hits'] += 1
+                self._jobs[key] = ReportJob(key, 'done', now, now, pdf, cache_hit=True)
+                return key
+            pending = sum(job.status in ('queued', 'running') for job in self._jobs.values())
+            if pending >= self.max_pending:
+                raise RuntimeError(f"Report queue is full ({pending} jobs pending)")
+            job = ReportJob(key, 'queued', now)
+            self._jobs[key] = job
+            self._prune()
+            job.future = self._executor.submit(self._render, job, inputs)
+        return key
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs; their PDFs stay in the cache tiers."""
+        finished = [key for key, job in self._jobs.items() if job.status in ('done', 'failed')]
+        for key in finished[:max(0, len(self._jobs) - MAX_TRACKED_JOBS)]:
+            del self._jobs[key]
+
+    def status(self, job_id: str) -> str:
+        """One of 'queued', 'running', 'done', 'failed' or 'unknown'."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return 'done' if self._cached(job_id) is not None else 'unknown'
+        return job.status
+
+    def job(self, job_id: str) -> Optional[ReportJob]:
+        return self._jobs.get(job_id)
+
+    def result(self, job_id: str, timeout: Optional[float] = None) -> Optional[bytes]:
+        """PDF bytes of a job, waiting up to ``timeout`` seconds (None returns immediately)."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return self._cached(job_id)
+        if timeout is not None and job.future is not None:
+            job.future.result(timeout)
+        return job.pdf
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            rendered = self._counts['rendered']
+            return {**self._counts,
+                    'pending': sum(job.status in ('queued', 'running') for job in self._jobs.values()),
+                    'mean_render_seconds': self._render_seconds / rendered if rendered else 0.0}
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+_default_service: Optional[ReportService] = None
+_default_lock = threading.Lock()
+
+
+def get_report_service() -> ReportService:
+    """Return the process-wide report service shared by all sessions."""
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            _default_service = ReportService(disk=get_disk_cache())
+        return _default_service
+
+
+def measure_throughput(service: ReportService,
+                       requests: List[Dict[str, Any]],
+                       timeout: float = 300.0) -> Dict[str, float]:
+    """
+    Submit a burst of report requests at once and time their completion.
+
+    Args:
+        service: Report service to exercise
+        requests: Report inputs; repeated inputs measure cache and de-duplication hits
+        timeout: Maximum seconds to wait for each job
+
+    Returns:
+        Dictionary with wall time, reports per second and latency percentiles
+    """
+    start = time.perf_counter()
+    job_ids = [service.submit(inputs) for inputs in requests]
+    latencies = []
+    for job_id in job_ids:
+        service.result(job_id, timeout=timeout)
+        latencies.append(time.perf_counter() - start)
+    wall = time.perf_counter() - start
+    return {
+        'requests': len(requests),
+        'unique': len(set(job_ids)),
+        'wall_seconds': wall,
+        'requests_per_second': len(requests) / wall if wall > 0 else float('inf'),
+        'p50_latency': float(np.percentile(latencies, 50)) if latencies else 0.0,
+        'p95_latency': float(np.percentile(latencies, 95)) if latencies else 0.0,
+    }
@@ -0,0 +1,227 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.covariance import LedoitWolfCovariance
+
+
+@dataclass
+class RiskParityResult:
+    """Equal-risk-contribution weights together with the solver report."""
+    weights: np.ndarray
+    risk_contributions: np.ndarray
+    iterations: int
+    converged: bool
+    max_error: float
+    seconds: float
+    method: str
+
+
+def risk_contributions(weights: np.ndarray, cov: np.ndarray) -> np.ndarray:
+    """
+    Fraction of total portfolio variance contributed by each asset.
+
+    Args:
+        weights: Portfolio weights, shape (N,)
+        cov: Covariance matrix, shape (N, N)
+
+    Returns:
+        Array of shape (N,) summing to one
+    """
+    marginal = cov @ weights
+    contributions = weights * marginal
+    return contributions / contributions.sum()
+
+
+def _relative_error(y: np.ndarray, sigma_y: np.ndarray, budgets: np.ndarray) -> float:
+    # Optimality: y_i (Σy)_i = b_i for every asset
+    return float(np.max(np.abs(y * sigma_y - budgets) / budgets))
+
+
+def _ccd(cov: np.ndarray, budgets: np.ndarray, y: np.ndarray,
+         tol: float, max_iter: int) -> Tuple[np.ndarray, int, bool]:
+    """
+    Cyclical coordinate descent on min 1/2 y'Σy - b'log(y).
+
+    Each coordinate has a closed-form positive root, and Σy is updated with a
+    single row of Σ after every step, so a sweep costs O(N^2) and never
+    copies the covariance matrix.
+    """
+    diag = np.diag(cov).copy()
+    sigma_y = cov @ y
+    if _relative_error(y, sigma_y, budgets) <= tol:
+        return y, 0, True
+    for sweep in range(1, max_iter + 1):
+        for i in range(y.size):
+            c = sigma_y[i] - diag[i] * y[i]
+            updated = (-c + np.sqrt(c * c + 4.0 * diag[i] * budgets[i])) / (2.0 * diag[i])
+            delta = updated - y[i]
+            if delta != 0.0:
+                sigma_y += delta * cov[i]
+                y[i] = updated
+        if _relative_error(y, sigma_y, budgets) <= tol:
+            return y, sweep, True
+    return y, max_iter, False
+
+
+def _conjugate_gradient(cov: np.ndarray, curvature: np.ndarray, rhs: np.ndarray,
+                        rtol: float, max_iter: int) -> Tuple[np.ndarray, int]:
+    """Jacobi-preconditioned CG for (Σ + diag(curvature)) x = rhs using only Σ-vector products."""
+    preconditioner = 1.0 / (np.diag(cov) + curvature)
+    x = np.zeros_like(rhs)
+    residual = rhs.copy()
+    z = preconditioner * residual
+    direction = z.copy()
+    rz = residual @ z
+    target = rtol * np.linalg.norm(rhs)
+    for iteration in range(1, max_iter + 1):
+        product = cov @ direction + curvature * direction
+        step = rz / (direction @ product)
+        x += step * direction
+        residual -= step * product
+        if np.linalg.norm(residual) <= target:
+            return x, iteration
+        z = preconditioner * residual
+        rz_next = residual @ z
+        direction = z + (rz_next / rz) * direction
+        rz = rz_next
+    return x, max_iter
+
+
+def _newton(cov: np.ndarray, budgets: np.ndarray, y: np.ndarray,
+            tol: float, max_iter: int) -> Tuple[np.ndarray, int, bool]:
+    """
+    Truncated Newton-CG on min 1/2 y'Σy - b'log(y).
+
+    The Hessian Σ + diag(b/y^2) is never formed: each CG step needs one
+    product with Σ, so memory stays at the covariance matrix itself.
+    """
+    def objective(v, sigma_v):
+        return 0.5 * v @ sigma_v - budgets @ np.log(v)
+
+    sigma_y = cov @ y
+    for iteration in range(1, max_iter + 1):
+        if _relative_error(y, sigma_y, budgets) <= tol:
+            return y, iteration - 1, True
+        gradient = sigma_y - budgets / y
+        forcing = min(0.5, np.sqrt(np.linalg.norm(gradient)))
+        step, _ = _conjugate_gradient(cov, budgets / (y * y), -gradient, forcing, 4 * y.size)
+
+        # Backtrack to stay in the positive orthant and decrease the objective
+        t = 1.0
+        negative = step < 0
+        if negative.any():
+            t = min(1.0, 0.99 * np.min(-y[negative] / step[negative]))
+        sigma_step = cov @ step
+        current = objective(y, sigma_y)
+        while t > 1e-12:
+            candidate = y + t * step
+            sigma_candidate = sigma_y + t * sigma_step
+            if objective(candidate, sigma_candidate) <= current + 1e-4 * t * (gradient @ step):
+                break
+            t *= 0.5
+        else:
+            # No acceptable step: stop at the last accepted point and report non-convergence
+            return y, iteration, False
+        y, sigma_y = candidate, sigma_candidate
+    return y, max_iter, _relative_error(y, sigma_y, budgets) <= tol
+
+
+def risk_parity_weights(cov: np.ndarray,
+                        budgets: Optional[np.ndarray] = None,
+                        x0: Optional[np.ndarray] = None,
+                        method: str = 'newton',
+                        tol: float = 1e-6,
+                        max_iter: int = 500) -> RiskParityResult:
+    """
+    Solve for long-only weights whose risk contributions match the budgets.
+
+    Args:
+        cov: Covariance matrix, shape (N, N); it is read but never modified
+        budgets: Target risk contribution per asset (defaults to equal)
+        x0: Warm-start weights, e.g. the previous rebalance's solution
+        method: 'newton' (matrix-free Newton-CG) or 'ccd' (cyclical coordinate descent)
+        tol: Maximum relative deviation of any risk contribution from its budget
+        max_iter: Maximum sweeps (ccd) or iterations (newton)
+
+    Returns:
+        RiskParityResult with weights summing to one and a convergence report
+    """
+    start = time.perf_counter()
+    n = cov.shape[0]
+    budgets = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=float) / np.sum(budgets)
+
+    # The log-barrier solution satisfies y'Σy = sum(b) = 1, so rescale the start to match
+    y = np.asarray(x0, dtype=float).copy() if x0 is not None else 1.0 / np.sqrt(np.diag(cov))
+    y = np.maximum(y, 1e-12)
+    y /= np.sqrt(y @ cov @ y)
+
+    if method == 'ccd':
+        y, iterations, converged = _ccd(cov, budgets, y, tol, max_iter)
+    elif method == 'newton':
+        y, iterations, converged = _newton(cov, budgets, y, tol, max_iter)
+    else:
+        raise ValueError(f"Unknown risk parity method: {method}")
+
+    weights = y / y.sum()
+    contributions = risk_contributions(weights, cov)
+    return RiskParityResult(
+        weights=weights,
+        risk_contributions=contributions,
+        iterations=iterations,
+        converged=converged,
+        max_error=float(np.max(np.abs(contributions - budgets))),
+        seconds=time.perf_counter() - start,
+        method=method,
+    )
+
+
+def rolling_risk_parity(returns: np.ndarray,
+                        window: int = 252,
+                        rebalance_every: int = 21,
+                        warm_start: bool = True,
+                        method: str = 'newton',
+                        tol: float = 1e-6,
+                        shrink: bool = False) -> Tuple[np.ndarray, List[Dict[str, float]]]:
+    """
+    Re-solve risk parity weights on a rolling covariance window.
+
+    The window covariance is updated incrementally between rebalance dates
+    (observations entering and leaving the window) instead of being
+    recomputed from the full window each time.
+
+    Args:
+        returns: T x N matrix of asset returns
+        window: Number of observations in each covariance estimate
+        rebalance_every: Periods between rebalance dates (21 ~ monthly)
+        warm_start: Start each solve from the previous rebalance's weights
+        method: Solver passed to risk_parity_weights
+        tol: Solver tolerance
+        shrink: Use the Ledoit-Wolf shrunk covariance instead of the sample covariance
+
+    Returns:
+        Tuple of (weights of shape (R, N), per-rebalance report entries)
+    """
+    weights = []
+    report = []
+    previous = None
+    estimator = LedoitWolfCovariance(returns.shape[1]).update(returns[:window])
+    last_end = window
+    for end in range(window, returns.shape[0] + 1, rebalance_every):
+        if end > last_end:
+            estimator.update(returns[last_end:end]).remove(returns[last_end - window:end - window])
+            last_end = end
+        cov = estimator.covariance() if shrink else estimator.sample_covariance()
+        result = risk_parity_weights(cov, x0=previous if warm_start else None, method=method, tol=tol)
+        weights.append(result.weights)
+        report.append({
+            'index': end - 1,
+            'iterations': result.iterations,
+            'seconds': result.seconds,
+            'max_error': result.max_error,
+            'converged': result.converged,
+        })
+        previous = result.weights
+    return np.array(weights), report
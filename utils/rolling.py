@@ -0,0 +1,142 @@
+from typing import Dict, Union
+
+import numpy as np
+
+from utils.instrument import instrumented
+
+WINDOWS = (36, 60, 120)
+METRICS = ('tracking_error', 'beta', 'alpha', 'information_ratio', 'sharpe',
+           'correlation', 'drawdown', 'max_drawdown')
+
+
+class RollingRiskEngine:
+    """
+    Rolling fund-versus-index risk statistics updated in O(1) per observation.
+
+    The engine keeps running sums of fund and index returns, their squares and
+    their cross product over a ring buffer of the last ``window`` observations.
+    Appending a period adds the new values and subtracts the ones leaving the
+    window, so no history is rescanned; every fund is updated at once. The
+    sums are rebuilt from the buffer every ``window`` updates, which bounds
+    floating point drift at amortised O(1) cost. Drawdowns compound from the
+    first observation, so max drawdown is the worst since inception.
+    """
+
+    def __init__(self,
+                 num_funds: int,
+                 window: int = 36,
+                 periods_per_year: int = 12,
+                 risk_free: float = 0.0):
+        if window < 2:
+            raise ValueError("Window must hold at least two observations")
+        self.window = window
+        self.periods_per_year = periods_per_year
+        self.risk_free = risk_free
+        self.count = 0
+        self._funds = np.zeros((window, num_funds))
+        self._index = np.zeros((window, num_funds))
+        self._sums = np.zeros((5, num_funds))
+        self._wealth = np.ones(num_funds)
+        self._peak = np.ones(num_funds)
+        self._max_drawdown = np.zeros(num_funds)
+
+    @staticmethod
+    def _terms(funds: np.ndarray, index: np.ndarray) -> np.ndarray:
+        """Per-observation terms whose window sums define every metric."""
+        return np.stack([funds, index, funds * funds, index * index, funds * index])
+
+    def update(self,
+               fund_returns: np.ndarray,
+               index_return: Union[float, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Append one period of returns and return the refreshed metrics.
+
+        Args:
+            fund_returns: Return of every fund for the period, shape (F,)
+            index_return: Benchmark return, scalar or one per fund
+
+        Returns:
+            Dictionary of metric arrays of shape (F,), NaN until the window is full
+        """
+        funds = np.asarray(fund_returns, dtype=float)
+        index = np.broadcast_to(np.asarray(index_return, dtype=float), funds.shape)
+        slot = self.count % self.window
+        rebuild = slot == self.window - 1
+        if self.count >= self.window and not rebuild:
+            self._sums -= self._terms(self._funds[slot], self._index[slot])
+        self._funds[slot] = funds
+        self._index[slot] = index
+        self.count += 1
+        if rebuild:
+            self._sums = self._terms(self._funds, self._index).sum(axis=1)
+        else:
+            self._sums += self._terms(funds, index)
+
+        self._wealth *= 1.0 + funds
+        np.maximum(self._peak, self._wealth, out=self._peak)
+        np.minimum(self._max_drawdown, self._wealth / self._peak - 1.0, out=self._max_drawdown)
+        return self.metrics()
+
+    def metrics(self) -> Dict[str, np.ndarray]:
+        """Current value of every metric in METRICS."""
+        drawdown = self._wealth / self._peak - 1.0
+        if self.count < self.window:
+            nan = np.full(self._wealth.shape, np.nan)
+            return {**{name: nan.copy() for name in METRICS[:-2]},
+                    'drawdown': drawdown, 'max_drawdown': self._max_drawdown.copy()}
+
+        n = self.window
+        sum_f, sum_i, sum_ff, sum_ii, sum_fi = self._sums
+        mean_f, mean_i = sum_f / n, sum_i / n
+        var_f = np.maximum(sum_ff - n * mean_f ** 2, 0.0) / (n - 1)
+        var_i = np.maximum(sum_ii - n * mean_i ** 2, 0.0) / (n - 1)
+        cov_fi = (sum_fi - n * mean_f * mean_i) / (n - 1)
+        var_active = np.maximum(var_f + var_i - 2.0 * cov_fi, 0.0)
+
+        ppy = self.periods_per_year
+        with np.errstate(divide='ignore', invalid='ignore'):
+            beta = cov_fi / var_i
+            tracking_error = np.sqrt(var_active * ppy)
+            return {
+                'tracking_error': tracking_error,
+                'beta': beta,
+                'alpha': (mean_f - self.risk_free - beta * (mean_i - self.risk_free)) * ppy,
+                'information_ratio': (mean_f - mean_i) * ppy / tracking_error,
+                'sharpe': (mean_f - self.risk_free) * ppy / np.sqrt(var_f * ppy),
+                'correlation': cov_fi / np.sqrt(var_f * var_i),
+                'drawdown': drawdown,
+                'max_drawdown': self._max_drawdown.copy(),
+            }
+
+
+@instrumented
+def rolling_risk_metrics(fund_returns: np.ndarray,
+                         index_returns: np.ndarray,
+                         window: int = 36,
+                         periods_per_year: int = 12,
+                         risk_free: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Replay a return history through RollingRiskEngine.
+
+    Args:
+        fund_returns: T x F matrix of fund returns (or a length-T vector for one fund)
+        index_returns: Benchmark returns, shape (T,) or T x F
+        window: Number of periods in each rolling window
+        periods_per_year: Periods per year used for annualisation
+        risk_free: Risk-free return per period
+
+    Returns:
+        Dictionary of metric histories with the shape of fund_returns
+    """
+    funds = np.asarray(fund_returns, dtype=float)
+    single = funds.ndim == 1
+    funds = funds.reshape(len(funds), -1)
+    index = np.asarray(index_returns, dtype=float)
+    index = index[:, None] if index.ndim == 1 else index
+
+    engine = RollingRiskEngine(funds.shape[1], window, periods_per_year, risk_free)
+    history = {name: np.empty(funds.shape) for name in METRICS}
+    for t in range(len(funds)):
+        for name, values in engine.update(funds[t], index[t]).items():
+            history[name][t] = values
+    return {name: values[:, 0] for name, values in history.items()} if single else history
@@ -0,0 +1,436 @@
+"""
+Tactical allocation signals over whole T x N return matrices.
+
+Every signal is built from window sums, and every window sum is the
+difference of two rows of one cumulative sum along the time axis, so a
+signal costs a handful of passes over the matrix whatever its lookback and
+however many assets there are; nothing loops per asset or per window.
+Signals are NaN until their window is full, and a value at period t only
+uses returns up to and including t.
+
+Signals become target weights at rebalance dates (signal_weights) and a
+forward-filled schedule of those weights, with the uninvested remainder in
+cash, is replayed through utils.backtest.run_backtest (tactical_backtest).
+
+Usage:
+    python -m utils.signals --num-assets 3000 --years 20
+    python -m utils.signals --input returns.csv --signal ma_crossover --trend-window 200
+"""
+import argparse
+import sys
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.backtest import BacktestResult, run_backtest, summarize_backtest
+from utils.instrument import instrumented
+
+TRADING_DAYS = 252
+
+
+def _cumulative(values: np.ndarray) -> np.ndarray:
+    """Cumulative sum along time with a leading zero row, shape (T + 1, N)."""
+    values = np.asarray(values, dtype=float)
+    total = np.empty((values.shape[0] + 1,) + values.shape[1:])
+    total[0] = 0.0
+    np.cumsum(values, axis=0, out=total[1:])
+    return total
+
+
+def _window_from_cumulative(total: np.ndarray, window: int, lag: int = 0) -> np.ndarray:
+    """Window sums read off a _cumulative array (see window_sum)."""
+    if window < 1 or lag < 0:
+        raise ValueError("Window must be at least one period and lag non-negative")
+    num_periods = total.shape[0] - 1
+    out = np.full((num_periods,) + total.shape[1:], np.nan)
+    first = window + lag - 1
+    if first < num_periods:
+        np.subtract(total[window:num_periods - lag + 1], total[:num_periods - lag - window + 1], out=out[first:])
+    return out
+
+
+def window_sum(values: np.ndarray, window: int, lag: int = 0) -> np.ndarray:
+    """
+    Trailing window sums along the time axis.
+
+    Row t holds the sum of rows ``t - lag - window + 1`` to ``t - lag``,
+    computed as the difference of two rows of one cumulative sum.
+
+    Args:
+        values: Array of shape (T,) or (T, N)
+        window: Number of periods in each sum
+        lag: Periods skipped at the end of the window
+
+    Returns:
+        Array of the same shape, NaN in the first ``window + lag - 1`` rows
+    """
+    return _window_from_cumulative(_cumulative(values), window, lag)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over ``window`` periods, NaN until the window is full."""
+    return window_sum(values, window) / window
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing sample standard deviation over ``window`` periods.
+
+    Uses window sums of the values and of their squares; the cumulative
+    sums are taken of the values minus the mean of the first window, which
+    keeps the cancellation error of the variance formula small without
+    letting later values affect earlier results.
+    """
+    if window < 2:
+        raise ValueError("Window must hold at least two observations")
+    values = np.asarray(values, dtype=float)
+    centred = values - values[:window].mean(axis=0)
+    sums = window_sum(centred, window)
+    np.square(centred, out=centred)
+    variance = window_sum(centred, window)
+    np.square(sums, out=sums)
+    sums /= window
+    variance -= sums
+    variance /= window - 1
+    return np.sqrt(np.maximum(variance, 0.0, out=variance), out=variance)
+
+
+def check_returns(returns: np.ndarray) -> np.ndarray:
+    """
+    Return matrix as floats, rejecting values the cumulative sums cannot carry.
+
+    A NaN or infinite return would poison every later window, since all of
+    them are differences of one cumulative sum, and simple returns at or
+    below -100% break log1p and the price index.
+    """
+    returns = np.asarray(returns, dtype=float)
+    finite = np.isfinite(returns)
+    if not finite.all():
+        first = tuple(int(i) for i in np.argwhere(~finite)[0])
+        raise ValueError(f"Returns must be finite; found {returns[first]} at index {list(first)} "
+                         "(fill or drop missing periods first)")
+    if (returns <= -1.0).any():
+        raise ValueError("Simple returns must be greater than -1 (a total loss)")
+    return returns
+
+
+def price_index(returns: np.ndarray) -> np.ndarray:
+    """Compounded value of one unit invested at the start, one row per period."""
+    return np.cumprod(1.0 + np.asarray(returns, dtype=float), axis=0)
+
+
+@instrumented('signals.momentum')
+def momentum(returns: np.ndarray, lookback: int = 252, skip: int = 21) -> np.ndarray:
+    """
+    Trailing total return, skipping the most recent periods (12-1 month momentum by default).
+
+    Args:
+        returns: T x N matrix of simple returns
+        lookback: Periods from the start of the window to the signal date
+        skip: Most recent periods left out, avoiding short-term reversal
+
+    Returns:
+        T x N total return over periods ``t - lookback + 1`` to ``t - skip``
+    """
+    if skip >= lookback:
+        raise ValueError("Skip must be shorter than the lookback")
+    score = window_sum(np.log1p(np.asarray(returns, dtype=float)), lookback - skip, lag=skip)
+    return np.expm1(score, out=score)
+
+
+@instrumented('signals.ma_crossover')
+def ma_crossover(returns: np.ndarray, fast: int = 50, slow: int = 200) -> np.ndarray:
+    """
+    Relative gap between a fast and a slow moving average of each asset's price.
+
+    Both averages come from one cumulative sum of the price index.
+
+    Args:
+        returns: T x N matrix of simple returns
+        fast: Periods in the fast moving average
+        slow: Periods in the slow moving average
+
+    Returns:
+        T x N ``fast_ma / slow_ma - 1``; positive while the fast average is above the slow one
+    """
+    if fast >= slow:
+        raise ValueError("The fast moving average must be shorter than the slow one")
+    total = _cumulative(price_index(returns))
+    gap = _window_from_cumulative(total, fast)
+    gap *= slow / fast
+    gap /= _window_from_cumulative(total, slow)
+    gap -= 1.0
+    return gap
+
+
+@instrumented('signals.trend_filter')
+def trend_filter(returns: np.ndarray, window: int = 200) -> np.ndarray:
+    """
+    Whether each asset's price is above its moving average.
+
+    Args:
+        returns: T x N matrix of simple returns
+        window: Periods in the moving average
+
+    Returns:
+        T x N array of 1.0 (uptrend) and 0.0 (downtrend), NaN until the window is full
+    """
+    prices = price_index(returns)
+    above = window_sum(prices, window)
+    np.less(above, prices * window, out=above, where=~np.isnan(above))
+    return above
+
+
+@instrumented('signals.volatility_target')
+def volatility_target(returns: np.ndarray,
+                      window: int = 63,
+                      target: float = 0.10,
+                      periods_per_year: int = TRADING_DAYS,
+                      max_leverage: float = 1.0) -> np.ndarray:
+    """
+    Exposure that scales each asset to a target annualised volatility.
+
+    Args:
+        returns: T x N matrix of simple returns
+        window: Periods in the realised volatility estimate
+        target: Annualised volatility each position is scaled to
+        periods_per_year: Return periods in a year
+        max_leverage: Cap on the exposure of any asset
+
+    Returns:
+        T x N multiplier ``min(target / realised_vol, max_leverage)``, NaN until the window is full
+    """
+    vol = rolling_std(returns, window)
+    vol *= np.sqrt(periods_per_year)
+    with np.errstate(divide='ignore'):
+        scale = np.divide(target, vol, out=vol)
+    return np.minimum(scale, max_leverage, out=scale)
+
+
+SIGNALS: Dict[str, Callable[..., np.ndarray]] = {
+    'momentum': momentum,
+    'ma_crossover': ma_crossover,
+    'trend_filter': trend_filter,
+    'volatility_target': volatility_target,
+}
+
+# Signals that rank assets; volatility_target only sizes them
+SCORES = ('momentum', 'ma_crossover', 'trend_filter')
+
+
+def compute_signal(name: str, returns: np.ndarray, **params) -> np.ndarray:
+    """Compute the signal registered under ``name`` in SIGNALS."""
+    if name not in SIGNALS:
+        raise ValueError(f"Unknown signal: {name}")
+    return SIGNALS[name](check_returns(returns), **params)
+
+
+def rebalance_indices(num_periods: int, every: int = 21) -> np.ndarray:
+    """Periods at whose close the portfolio is rebalanced, matching run_backtest's calendar."""
+    if every < 1:
+        raise ValueError("Rebalance interval must be at least one period")
+    return np.arange(every - 1, num_periods, every)
+
+
+def signal_weights(scores: np.ndarray,
+                   top_fraction: float = 0.2,
+                   absolute: bool = True,
+                   mask: Optional[np.ndarray] = None,
+                   scale: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Target weights from signal scores on rebalance dates.
+
+    The ``k = top_fraction * N`` assets with the highest scores each get a
+    1/k slot. Slots left unfilled, because too few assets have a valid (and
+    with ``absolute``, positive) score or pass ``mask``, stay in cash, so
+    the portfolio de-risks when few assets qualify. ``scale`` multiplies
+    each slot, e.g. by volatility_target, and the remainder is also cash.
+
+    Args:
+        scores: R x N signal values on the rebalance dates; NaN is never held
+        top_fraction: Fraction of the universe held
+        absolute: Only hold assets with a positive score
+        mask: Optional R x N filter; assets where it is not positive are not held
+        scale: Optional R x N exposure multiplier per held asset
+
+    Returns:
+        R x N risky-asset weights; one minus each row's sum is the cash weight
+    """
+    scores = np.atleast_2d(np.asarray(scores, dtype=float))
+    num_assets = scores.shape[1]
+    k = min(max(int(round(top_fraction * num_assets)), 1), num_assets)
+    eligible = ~np.isnan(scores)
+    if absolute:
+        eligible &= scores > 0.0
+    if mask is not None:
+        eligible &= np.nan_to_num(np.asarray(mask, dtype=float)) > 0.0
+
+    ranked = np.where(eligible, scores, -np.inf)
+    weights = np.zeros_like(scores)
+    if k == num_assets:
+        weights[eligible] = 1.0 / k
+    else:
+        top = np.argpartition(ranked, num_assets - k, axis=1)[:, num_assets - k:]
+        rows = np.arange(len(scores))[:, None]
+        weights[rows, top] = np.where(eligible[rows, top], 1.0 / k, 0.0)
+    if scale is not None:
+        weights *= np.nan_to_num(np.asarray(scale, dtype=float))
+    return weights
+
+
+def tactical_weights(returns: np.ndarray,
+                     signal: str = 'momentum',
+                     every: int = 21,
+                     top_fraction: float = 0.2,
+                     absolute: bool = True,
+                     trend_window: Optional[int] = None,
+                     vol_target: Optional[float] = None,
+                     vol_window: int = 63,
+                     max_leverage: float = 1.0,
+                     periods_per_year: int = TRADING_DAYS,
+                     **signal_params) -> Tuple[np.ndarray, np.ndarray, Dict[str, float]]:
+    """
+    Decide risky-asset weights on every rebalance date from one ranking signal and optional overlays.
+
+    Signals are computed over the whole history in one pass and then read
+    on the rebalance dates only.
+
+    Args:
+        returns: T x N matrix of simple returns
+        signal: Ranking signal in SCORES
+        every: Periods between rebalance dates
+        top_fraction: Fraction of the universe held (see signal_weights)
+        absolute: Only hold assets whose score is positive
+        trend_window: Only hold assets above their moving average over this many periods
+        vol_target: Scale each position to this annualised volatility
+        vol_window: Periods in the realised volatility estimate
+        max_leverage: Cap on the volatility-target multiplier
+        periods_per_year: Return periods in a year
+        **signal_params: Parameters of the ranking signal, e.g. lookback or fast/slow
+
+    Returns:
+        Tuple of (rebalance indices (R,), weights (R, N), seconds spent per signal)
+    """
+    if signal not in SCORES:
+        raise ValueError(f"Unknown ranking signal: {signal}")
+    returns = check_returns(returns)
+    indices = rebalance_indices(len(returns), every)
+    timings = {}
+
+    def timed(name, **params):
+        start = time.perf_counter()
+        values = SIGNALS[name](returns, **params)[indices]
+        timings[name] = time.perf_counter() - start
+        return values
+
+    scores = timed(signal, **signal_params)
+    mask = timed('trend_filter', window=trend_window) if trend_window and signal != 'trend_filter' else None
+    scale = None
+    if vol_target:
+        scale = timed('volatility_target', window=vol_window, target=vol_target,
+                      periods_per_year=periods_per_year, max_leverage=max_leverage)
+    return indices, signal_weights(scores, top_fraction, absolute, mask, scale), timings
+
+
+def weight_schedule(indices: Sequence[int], weights: np.ndarray, num_periods: int) -> np.ndarray:
+    """
+    Per-period targets with a trailing cash column, for run_backtest.
+
+    Weights decided at the close of period ``indices[k]`` are the target
+    from that close on, when run_backtest's calendar rebalances into them;
+    before the first decision everything is in cash.
+
+    Returns:
+        Array of shape (T, 1, N + 1)
+    """
+    weights = np.asarray(weights, dtype=float)
+    with_cash = np.zeros((len(weights) + 1, weights.shape[1] + 1))
+    with_cash[0, -1] = 1.0
+    with_cash[1:, :-1] = weights
+    with_cash[1:, -1] = 1.0 - weights.sum(axis=1)
+    position = np.searchsorted(np.asarray(indices), np.arange(num_periods), side='right')
+    return with_cash[position][:, None, :]
+
+
+@instrumented('signals.backtest')
+def tactical_backtest(returns: np.ndarray,
+                      signal: str = 'momentum',
+                      every: int = 21,
+                      cost_bps: float = 0.0,
+                      cash_return: float = 0.0,
+                      **params) -> Tuple[BacktestResult, np.ndarray]:
+    """
+    Backtest a tactical strategy, rebalancing into signal weights every ``every`` periods.
+
+    Args:
+        returns: T x N matrix of simple returns
+        signal: Ranking signal in SCORES
+        every: Periods between rebalance dates
+        cost_bps: Transaction cost in basis points of traded value
+        cash_return: Per-period return of the cash balance
+        **params: Further arguments of tactical_weights
+
+    Returns:
+        Tuple of (BacktestResult of one variant, R x N weights decided on the rebalance dates)
+    """
+    returns = np.asarray(returns, dtype=float)
+    indices, weights, _ = tactical_weights(returns, signal, every, **params)
+    with_cash = np.hstack([returns, np.full((len(returns), 1), cash_return)])
+    result = run_backtest(with_cash, weight_schedule(indices, weights, len(returns)),
+                          rebalance_every=every, cost_bps=cost_bps)
+    return result, weights
+
+
+def _load_returns(path: str) -> np.ndarray:
+    """Return matrix from a .npy file or a CSV of one column per asset (first column as the index)."""
+    if path.endswith('.npy'):
+        return check_returns(np.load(path))
+    return check_returns(pd.read_csv(path, index_col=0).to_numpy(dtype=float))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from utils.market_model import generate_market_returns
+
+    parser = argparse.ArgumentParser(description="Time tactical signals and backtest a signal strategy.")
+    parser.add_argument('--input', help="Returns as .npy or CSV (rows are periods, columns assets); "
+                                        "default: generated factor-model returns")
+    parser.add_argument('--num-assets', type=int, default=3_000)
+    parser.add_argument('--years', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--signal', choices=SCORES, default='momentum')
+    parser.add_argument('--every', type=int, default=21, help="Periods between rebalances")
+    parser.add_argument('--top-fraction', type=float, default=0.2)
+    parser.add_argument('--trend-window', type=int, help="Only hold assets above this moving average")
+    parser.add_argument('--vol-target', type=float, help="Annualised volatility target per position")
+    parser.add_argument('--cost-bps', type=float, default=10.0)
+    parser.add_argument('--output', help="Write the decided weights to this CSV")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        try:
+            returns = _load_returns(args.input)
+        except ValueError as e:
+            parser.error(f"{args.input}: {e}")
+    else:
+        returns = generate_market_returns(args.years * TRADING_DAYS, args.num_assets, seed=args.seed)['returns']
+    print(f"{returns.shape[0]:,} periods x {returns.shape[1]:,} assets")
+
+    for name, func in SIGNALS.items():
+        start = time.perf_counter()
+        func(returns)
+        print(f"{name:<20}{(time.perf_counter() - start) * 1e3:>10.0f} ms")
+
+    params: Dict[str, Any] = {'top_fraction': args.top_fraction, 'trend_window': args.trend_window,
+                              'vol_target': args.vol_target}
+    result, weights = tactical_backtest(returns, args.signal, args.every, args.cost_bps, **params)
+    print(f"\nbacktest {result.seconds * 1e3:.0f} ms")
+    print(summarize_backtest(result).to_string(index=False, float_format=lambda x: f'{x:.4g}'))
+    if args.output:
+        pd.DataFrame(weights, index=rebalance_indices(len(returns), args.every)).to_csv(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from utils.instrument import instrumented
+from utils.path_metrics import PathMetrics
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def spawn_generators(seed: Optional[int], count: int) -> List[np.random.Generator]:
+    """
+    Create independent random generators derived from a single seed.
+
+    Args:
+        seed: Root seed (None for fresh OS entropy)
+        count: Number of generators to create
+
+    Returns:
+        List of np.random.Generator, one per lane/worker
+    """
+    children = np.random.SeedSequence(seed).spawn(count)
+    return [np.random.default_rng(child) for child in children]
+
+
+def _lane_bounds(num_scenarios: int, chunk_size: int) -> List[slice]:
+    return [slice(start, min(start + chunk_size, num_scenarios))
+            for start in range(0, num_scenarios, chunk_size)]
+
+
+def _sorted_percentiles(values: np.ndarray, percentiles: Sequence[float]) -> np.ndarray:
+    """Linear-interpolated percentiles of each row of ``values``, sorting it in place."""
+    values.sort(axis=1)
+    positions = np.asarray(percentiles, dtype=float) / 100.0 * (values.shape[1] - 1)
+    lower = np.floor(positions).astype(int)
+    upper = np.minimum(lower + 1, values.shape[1] - 1)
+    fraction = positions - lower
+    return (values[:, lower] * (1.0 - fraction) + values[:, upper] * fraction).T
+
+
+def _compound_lane(rng: np.random.Generator,
+                   out: np.ndarray,
+                   mean: float,
+                   vol: float,
+                   start: Optional[np.ndarray] = None,
+                   target: Optional[np.ndarray] = None) -> None:
+    """
+    Compound the lane's next gross returns into ``target`` (default ``out``), from wealth ``start``.
+
+    ``out`` (periods x lane scenarios) must be contiguous and receives the
+    returns; ``target`` may be a strided view, e.g. the lane's columns of a
+    block, so the running product is written there without another pass.
+
+    Draws are period-major, so a lane's stream is the same however its
+    periods are split into blocks, and every API sees the same paths. The
+    second half of the lane mirrors the first (antithetic variates), which
+    halves the normal draws, the dominant cost, and reduces the variance
+    of the mean path.
+    """
+    half = (out.shape[1] + 1) // 2
+    shocks = rng.standard_normal((out.shape[0], half), dtype=out.dtype)
+    np.multiply(shocks, vol, out=out[:, :half])
+    np.multiply(shocks[:, :out.shape[1] - half], -vol, out=out[:, half:])
+    out += 1.0 + mean
+    if start is not None:
+        out[0] *= start
+    np.cumprod(out, axis=0, out=out if target is None else target)
+
+
+def iter_path_chunks(mean: float,
+                     vol: float,
+                     num_scenarios: int = 100_000,
+                     num_periods: int = 360,
+                     seed: Optional[int] = None,
+                     chunk_size: int = 10_000,
+                     initial_value: float = 1.0,
+                     dtype=np.float64) -> Iterator[np.ndarray]:
+    """
+    Yield simulated wealth paths in bounded-size scenario chunks.
+
+    Each chunk is one lane of simulate_percentile_bands with its own
+    generator spawned from ``seed``, so for the same seed and chunk_size
+    the paths are exactly those summarised there, and the concatenated
+    output does not depend on how the chunks are consumed.
+
+    Args:
+        mean: Expected return per period
+        vol: Standard deviation of returns per period
+        num_scenarios: Total number of simulated paths
+        num_periods: Number of periods per path
+        seed: Random seed for reproducibility
+        chunk_size: Maximum number of scenarios per yielded chunk
+        initial_value: Starting portfolio value
+        dtype: Floating point dtype of the paths
+
+    Yields:
+        Arrays of shape (chunk, num_periods) holding compounded wealth
+        (transposed views of period-major arrays)
+    """
+    lanes = _lane_bounds(num_scenarios, chunk_size)
+    for lane, rng in zip(lanes, spawn_generators(seed, len(lanes))):
+        paths = np.empty((num_periods, lane.stop - lane.start), dtype=dtype)
+        _compound_lane(rng, paths, mean, vol)
+        if initial_value != 1.0:
+            paths *= initial_value
+        yield paths.T
+
+
+@instrumented
+def simulate_percentile_bands(mean: float,
+                              vol: float,
+                              num_scenarios: int = 100_000,
+                              num_periods: int = 360,
+                              percentiles: Sequence[float] = PERCENTILES,
+                              seed: Optional[int] = None,
+                              chunk_size: int = 10_000,
+                              max_block_elements: int = 4_000_000,
+                              num_workers: int = 1,
+                              initial_value: float = 1.0,
+                              dtype=np.float64,
+                              path_metrics: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Simulate compounded portfolio growth and summarise it as percentile bands.
+
+    Scenarios are split into lanes of ``chunk_size`` paths, each driven by
+    its own generator. Time is processed in blocks so that at most
+    ``max_block_elements`` returns are held in memory at once; only the
+    current wealth of each scenario is carried between blocks. Blocks are
+    period-major, so each period's scenarios are sorted in place for the
+    percentiles without a transposed copy. Results are identical for any
+    ``num_workers`` and block size, and match iter_path_chunks.
+
+    Args:
+        mean: Expected return per period
+        vol: Standard deviation of returns per period
+        num_scenarios: Number of simulated paths
+        num_periods: Number of periods per path
+        percentiles: Percentiles to report for every period
+        seed: Random seed for reproducibility
+        chunk_size: Number of scenarios per generator lane
+        max_block_elements: Upper bound on the scenario x period buffer size
+        num_workers: Threads used to fill lanes in parallel
+        initial_value: Starting portfolio value
+        dtype: Floating point dtype of the working buffer
+        path_metrics: Also accumulate drawdown metrics of every path from
+            each block (see utils.path_metrics.PathMetrics)
+
+    Returns:
+        Dictionary with 'percentiles' (P,), 'bands' (P, num_periods) and
+        'mean' (num_periods,) of portfolio value, plus the PathMetrics
+        result arrays when ``path_metrics`` is set
+    """
+    lanes = _lane_bounds(num_scenarios, chunk_size)
+    generators = spawn_generators(seed, len(lanes))
+    block = int(max(1, min(num_periods, max_block_elements // max(num_scenarios, 1))))
+
+    buffer = np.empty((block, num_scenarios), dtype=dtype)
+    wealth = np.full(num_scenarios, initial_value, dtype=dtype)
+    bands = np.empty((len(percentiles), num_periods))
+    means = np.empty(num_periods)
+    metrics = PathMetrics(num_scenarios, initial_value) if path_metrics else None
+
+    def fill_lane(index: int, view: np.ndarray) -> None:
+        lane = lanes[index]
+        target = view[:, lane]
+        # A lane spanning every scenario is contiguous; otherwise its returns are drawn into scratch
+        # and compounded straight into its columns of the block
+        out = target if target.flags.c_contiguous else np.empty(target.shape, dtype=dtype)
+        _compound_lane(generators[index], out, mean, vol, start=wealth[lane], target=target)
+
+    executor = ThreadPoolExecutor(num_workers) if num_workers > 1 else None
+    try:
+        for start in range(0, num_periods, block):
+            width = min(block, num_periods - start)
+            view = buffer[:width]
+            if executor is None:
+                for index in range(len(lanes)):
+                    fill_lane(index, view)
+            else:
+                list(executor.map(fill_lane, range(len(lanes)), [view] * len(lanes)))
+
+            means[start:start + width] = view.mean(axis=1)
+            wealth[:] = view[-1]
+            if metrics is not None:
+                # Metrics read the block before its periods are sorted
+                metrics.update(view.T)
+            bands[:, start:start + width] = _sorted_percentiles(view, percentiles)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    result = {
+        'percentiles': np.asarray(percentiles, dtype=float),
+        'bands': bands,
+        'mean': means,
+    }
+    if metrics is not None:
+        result.update(metrics.result())
+    return result
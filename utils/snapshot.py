@@ -0,0 +1,167 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b'PFSNAP01'
+ALIGNMENT = 64
+SUFFIX = '.snap'
+_HEADER_LENGTH = struct.Struct('<Q')
+
+
+def _to_array(value: Any) -> np.ndarray:
+    array = np.asarray(value)
+    if array.dtype == object and all(isinstance(v, str) for v in array.flat):
+        # Lists of strings (e.g. formatted dates) become fixed-width unicode columns
+        array = array.astype(str)
+    if array.dtype.hasobject:
+        raise TypeError("Snapshots hold plain numeric, datetime or string arrays only")
+    return array
+
+
+def _flatten(value: Any) -> Tuple[str, List[Tuple[str, np.ndarray]], Dict[str, Any]]:
+    """Split a value into its kind, named column arrays and extra metadata."""
+    if isinstance(value, pd.DataFrame):
+        columns, categorical = [], []
+        for name in value.columns:
+            series = value[name]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                categorical.append(str(name))
+                columns.append((f'{name}.codes', series.cat.codes.to_numpy()))
+                columns.append((f'{name}.categories', _to_array(series.cat.categories.to_numpy())))
+            else:
+                columns.append((str(name), _to_array(series.to_numpy())))
+        meta = {'columns': [str(name) for name in value.columns], 'categorical': categorical}
+        if not isinstance(value.index, pd.RangeIndex) or value.index.start != 0 or value.index.step != 1:
+            columns.append(('__index__', _to_array(value.index.to_numpy())))
+        return 'frame', columns, meta
+    if isinstance(value, dict):
+        return 'dict', [(str(k), _to_array(v)) for k, v in value.items()], {}
+    if isinstance(value, tuple):
+        return 'tuple', [(f'item_{i}', _to_array(v)) for i, v in enumerate(value)], {}
+    return 'array', [('value', _to_array(value))], {}
+
+
+def _rebuild(kind: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> Any:
+    if kind == 'array':
+        return arrays['value']
+    if kind == 'tuple':
+        return tuple(arrays[f'item_{i}'] for i in range(len(arrays)))
+    if kind == 'dict':
+        return arrays
+    data = {}
+    for name in meta['columns']:
+        if name in meta['categorical']:
+            data[name] = pd.Categorical.from_codes(arrays[f'{name}.codes'], arrays[f'{name}.categories'])
+        else:
+            data[name] = arrays[name]
+    index = arrays.get('__index__')
+    return pd.DataFrame(data, index=index, copy=False)
+
+
+def save_snapshot(path: str, value: Any, compress: bool = False, level: int = 6) -> int:
+    """
+    Write an array, tuple/dict of arrays or DataFrame as a binary snapshot.
+
+    The file is a short JSON header followed by each column's raw buffer,
+    aligned to 64 bytes so uncompressed columns can be memory-mapped
+    in place. With ``compress`` each column is zlib-compressed instead,
+    trading zero-copy loading for a smaller file. The file is written under
+    a temporary name and renamed, so readers never see a partial snapshot.
+
+    Args:
+        path: Destination file
+        value: Data to store; lists (e.g. time series values) become arrays
+        compress: Compress every column with zlib
+        level: zlib compression level
+
+    Returns:
+        Size of the written file in bytes
+    """
+    kind, columns, meta = _flatten(value)
+    entries, buffers, offset = [], [], 0
+    for name, array in columns:
+        raw = np.ascontiguousarray(array)
+        # Byte view, since memoryviews cannot describe datetime dtypes
+        data = raw.reshape(-1).view(np.uint8).data
+        data = zlib.compress(data, level) if compress else data
+        entries.append({'name': name, 'dtype': raw.dtype.str, 'shape': list(raw.shape),
+                        'offset': offset, 'nbytes': len(data) if compress else raw.nbytes,
+                        'codec': 'zlib' if compress else None})
+        buffers.append(data)
+        offset += -(-entries[-1]['nbytes'] // ALIGNMENT) * ALIGNMENT
+
+    header = json.dumps({'kind': kind, 'meta': meta, 'columns': entries}).encode('utf-8')
+    start = -(-(len(MAGIC) + _HEADER_LENGTH.size + len(header)) // ALIGNMENT) * ALIGNMENT
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC + _HEADER_LENGTH.pack(len(header)) + header)
+            for entry, data in zip(entries, buffers):
+                f.seek(start + entry['offset'])
+                f.write(data)
+            f.truncate(start + offset)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return start + offset
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    """Column names, dtypes, shapes and codecs of a snapshot without reading any data."""
+    with open(path, 'rb') as f:
+        return _read_header(f)[0]
+
+
+def _read_header(f) -> Tuple[Dict[str, Any], int]:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a snapshot file")
+    (length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+    header = json.loads(f.read(length).decode('utf-8'))
+    start = -(-(len(MAGIC) + _HEADER_LENGTH.size + length) // ALIGNMENT) * ALIGNMENT
+    return header, start
+
+
+def load_snapshot(path: str, mmap_mode: bool = True) -> Any:
+    """
+    Read a snapshot written by save_snapshot.
+
+    Uncompressed columns are returned as read-only views of a memory map of
+    the file, so loading is O(1) and pages are only read when touched.
+    Compressed columns, or every column when ``mmap_mode`` is False, are read
+    into memory.
+
+    Args:
+        path: Snapshot file
+        mmap_mode: Map uncompressed columns instead of reading them
+
+    Returns:
+        The stored value with the same structure it was saved with
+    """
+    with open(path, 'rb') as f:
+        header, start = _read_header(f)
+        buffer = None
+        if mmap_mode and os.fstat(f.fileno()).st_size > start:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        arrays = {}
+        for entry in header['columns']:
+            dtype = np.dtype(entry['dtype'])
+            count = int(np.prod(entry['shape'], dtype=np.int64))
+            if entry['codec'] is None and buffer is not None:
+                array = np.frombuffer(buffer, dtype, count, start + entry['offset'])
+            else:
+                f.seek(start + entry['offset'])
+                data = f.read(entry['nbytes'])
+                if entry['codec'] == 'zlib':
+                    data = zlib.decompress(data)
+                array = np.frombuffer(data, dtype, count)
+            arrays[entry['name']] = array.reshape(entry['shape'])
+    return _rebuild(header['kind'], arrays, header['meta'])
@@ -0,0 +1,212 @@
+"""
+Deferred imports and cold-start profiling for the Streamlit pages.
+
+Setting PORTFOLIO_PROFILE_STARTUP to a file path makes every page append one
+JSON line per run with its time to first render, total run time and the
+modules it imported lazily. ``python -m utils.startup`` runs each page in a
+fresh interpreter and reports the import cost per module and the time to
+first render, so cold-start cost can be tracked on every deploy.
+"""
+import argparse
+import glob
+import importlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+from typing import Any, Dict, List, Optional, Sequence
+
+from utils.instrument import serve_metrics_from_env
+
+PROFILE_ENV = 'PORTFOLIO_PROFILE_STARTUP'
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds spent importing each lazily loaded module in this process
+IMPORT_TIMES: Dict[str, float] = {}
+_seen_pages = set()
+_lock = threading.Lock()
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that performs the real import on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            with _lock:
+                IMPORT_TIMES.setdefault(self.__name__, time.perf_counter() - start)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Return the module if it is already loaded, otherwise a LazyModule for it."""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+class PageTimer:
+    """
+    Wall-clock checkpoints of one page run.
+
+    Pages create the timer at the top of the script, call ``first_render``
+    once their title and controls are on screen and ``finish`` at the end.
+    Outside profiling mode the checkpoints are only kept in memory.
+    """
+
+    def __init__(self, page: str):
+        self.page = page
+        self.start = time.perf_counter()
+        self.imports_before = set(IMPORT_TIMES)
+        self.marks: Dict[str, float] = {}
+        with _lock:
+            self.cold = page not in _seen_pages
+            _seen_pages.add(page)
+
+    def mark(self, label: str) -> float:
+        """Record seconds since the run started; repeated labels keep the first value."""
+        return self.marks.setdefault(label, time.perf_counter() - self.start)
+
+    def first_render(self) -> float:
+        return self.mark('first_render')
+
+    def finish(self) -> Dict[str, Any]:
+        """Close the run and, in profiling mode, append it to the profile log."""
+        self.mark('complete')
+        record = {
+            'page': self.page,
+            'cold': self.cold,
+            'timestamp': time.time(),
+            **self.marks,
+            'imports': {name: seconds for name, seconds in IMPORT_TIMES.items()
+                        if name not in self.imports_before},
+        }
+        path = os.environ.get(PROFILE_ENV)
+        if path:
+            with _lock, open(path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        return record
+
+
+def start_page_timer(page: str) -> PageTimer:
+    serve_metrics_from_env()
+    return PageTimer(os.path.basename(page))
+
+
+_IMPORT_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """
+    Parse ``python -X importtime`` output.
+
+    Returns:
+        One dictionary per module with self and cumulative seconds and the
+        nesting depth (0 for modules imported directly by the program)
+    """
+    rows = []
+    for match in _IMPORT_LINE.finditer(output):
+        self_us, cumulative_us, indent, module = match.groups()
+        rows.append({'module': module, 'self': int(self_us) / 1e6,
+                     'cumulative': int(cumulative_us) / 1e6, 'depth': (len(indent) - 1) // 2})
+    return rows
+
+
+def page_paths(root: str = ROOT) -> List[str]:
+    return [os.path.join(root, 'Home.py')] + sorted(glob.glob(os.path.join(root, 'pages', '*.py')))
+
+
+_PROFILE_SCRIPT = """
+import json, sys, time
+import streamlit
+from streamlit.testing.v1 import AppTest
+sys.stderr.write('--- page ---\\n')
+sys.stderr.flush()
+start = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2])).run()
+print(json.dumps({'run': time.perf_counter() - start, 'exception': bool(at.exception)}))
+"""
+
+
+def profile_page(path: str, timeout: float = 300.0) -> Dict[str, Any]:
+    """
+    Cold-run one page in a fresh interpreter that has only imported Streamlit.
+
+    Args:
+        path: Page script
+        timeout: Seconds allowed for the page run
+
+    Returns:
+        Dictionary with the run time, the PageTimer record (if the page has
+        one) and the modules imported by the page, costliest first
+    """
+    fd, log_path = tempfile.mkstemp(suffix='.jsonl')
+    os.close(fd)
+    env = {**os.environ, PROFILE_ENV: log_path,
+           'PYTHONPATH': os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')]))}
+    try:
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', _PROFILE_SCRIPT, path, str(timeout)],
+                              capture_output=True, text=True, env=env, cwd=ROOT, timeout=timeout + 60)
+        with open(log_path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    finally:
+        os.unlink(log_path)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Profiling {path} failed:\n{proc.stderr[-2000:]}")
+
+    # Only imports triggered by the page itself, i.e. after the marker line
+    page_output = proc.stderr.split('--- page ---', 1)[-1]
+    imports = sorted((row for row in parse_importtime(page_output) if row['depth'] == 0),
+                     key=lambda row: -row['cumulative'])
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {'page': os.path.basename(path), **result,
+            'timer': records[0] if records else None, 'imports': imports}
+
+
+def format_profile(profile: Dict[str, Any], top: int = 8) -> str:
+    timer = profile['timer'] or {}
+    first = timer.get('first_render')
+    lines = [f"{profile['page']}: run {profile['run'] * 1e3:.0f} ms, first render "
+             + (f"{first * 1e3:.0f} ms" if first is not None else "n/a")
+             + (" (raised an exception)" if profile['exception'] else '')]
+    total = sum(row['cumulative'] for row in profile['imports'])
+    lines.append(f"  imports {total * 1e3:.0f} ms")
+    for row in profile['imports'][:top]:
+        lines.append(f"    {row['module']:<40}{row['cumulative'] * 1e3:>9.1f} ms")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile cold start of each Streamlit page.")
+    parser.add_argument('pages', nargs='*', help="Page scripts (default: Home.py and pages/*.py)")
+    parser.add_argument('--top', type=int, default=8, help="Modules listed per page")
+    parser.add_argument('--json', help="Append the profiles as one JSON line to this file")
+    args = parser.parse_args(argv)
+
+    profiles = [profile_page(os.path.abspath(path)) for path in args.pages or page_paths()]
+    for profile in profiles:
+        print(format_profile(profile, args.top))
+    if args.json:
+        with open(args.json, 'a') as f:
+            f.write(json.dumps({'timestamp': time.time(), 'profiles': profiles}) + '\n')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
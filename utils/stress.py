@@ -0,0 +1,273 @@
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Instantaneous shocks per asset class together with the volatility regime that follows
+STANDARD_SCENARIOS = {
+    'Rate Shock +200bp': ({'Bonds': -0.08, 'Long-Term Bonds': -0.30, 'Intermediate Bonds': -0.10,
+                           'US Stocks': -0.05, 'International Stocks': -0.05}, 1.5),
+    'Equity Drawdown -30%': ({'US Stocks': -0.30, 'International Stocks': -0.35,
+                              'Commodities': -0.10, 'Bonds': 0.02, 'Long-Term Bonds': 0.05}, 2.0),
+    'Volatility Spike': ({}, 3.0),
+}
+
+# Matrices smaller than this are pickled to workers; larger ones go through shared memory
+SHARED_MIN_BYTES = 1 << 20
+
+
+@dataclass
+class StressScenario:
+    """Instantaneous per-asset shock followed by a simulated horizon under a stressed regime."""
+    name: str
+    shock: np.ndarray
+    vol_multiplier: float = 1.0
+    drift_shift: float = 0.0
+
+
+@dataclass
+class StressResult:
+    """Loss statistics for every scenario and portfolio."""
+    expected_pnl: np.ndarray
+    var: np.ndarray
+    cvar: np.ndarray
+    worst: np.ndarray
+    scenarios: List[str]
+    seconds: float
+    stats: Dict[str, float]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long-format table with one row per scenario and portfolio."""
+        num_scenarios, num_portfolios = self.var.shape
+        return pd.DataFrame({
+            'scenario': np.repeat(self.scenarios, num_portfolios),
+            'portfolio': np.tile(np.arange(num_portfolios), num_scenarios),
+            'expected_pnl': self.expected_pnl.ravel(),
+            'var': self.var.ravel(),
+            'cvar': self.cvar.ravel(),
+            'worst': self.worst.ravel(),
+        })
+
+
+def standard_scenarios(assets: Sequence[str]) -> List[StressScenario]:
+    """
+    Align the STANDARD_SCENARIOS shocks to the columns of a return model.
+
+    Args:
+        assets: Asset names in column order; unlisted assets are not shocked
+
+    Returns:
+        List of StressScenario
+    """
+    return [
+        StressScenario(name, np.array([shocks.get(asset, 0.0) for asset in assets]), vol_multiplier)
+        for name, (shocks, vol_multiplier) in STANDARD_SCENARIOS.items()
+    ]
+
+
+class SharedArray:
+    """Copy of an array in a named shared memory block, released on exit."""
+
+    def __init__(self, array: np.ndarray):
+        array = np.ascontiguousarray(array)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.array = np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf)
+        self.array[...] = array
+        self.spec = ('shm', self._shm.name, array.shape, array.dtype.str)
+
+    def __enter__(self) -> 'SharedArray':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        del self.array
+        self._shm.close()
+        self._shm.unlink()
+
+
+# Input specs of this process, set once by the pool initializer
+_WORKER_SPECS: Dict[str, Tuple] = {}
+
+
+def _open_shared(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to an existing block without registering it with the resource tracker.
+
+    Workers share the creating process's tracker, which holds one entry per
+    block name, so unregistering a worker's attach would drop the creator's
+    entry too. The attach is therefore never registered: Python 3.13 has
+    ``track=False`` for this, older versions register every attach unless
+    registration is switched off around it.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+@contextmanager
+def _attached(specs: Dict[str, Tuple]) -> Iterator[Dict[str, np.ndarray]]:
+    """Arrays described by ``specs``, with any shared memory handles closed on exit."""
+    handles: List[shared_memory.SharedMemory] = []
+    arrays: Dict[str, np.ndarray] = {}
+    try:
+        for key, spec in specs.items():
+            if spec[0] == 'shm':
+                _, name, shape, dtype = spec
+                handles.append(_open_shared(name))
+                arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=handles[-1].buf)
+            else:
+                arrays[key] = spec[1]
+        yield arrays
+    finally:
+        # Views must go before their buffers can be closed
+        arrays.clear()
+        for shm in handles:
+            shm.close()
+
+
+def _init_worker(specs: Dict[str, Tuple]) -> None:
+    _WORKER_SPECS.clear()
+    _WORKER_SPECS.update(specs)
+
+
+def _scenario_task(scenario: StressScenario,
+                   seed_seq: np.random.SeedSequence,
+                   block: slice,
+                   num_paths: int,
+                   horizon: int,
+                   path_chunk: int,
+                   confidence: float) -> np.ndarray:
+    """Attach to this process's inputs for one task (see _simulate_block)."""
+    with _attached(_WORKER_SPECS) as inputs:
+        return _simulate_block(inputs, scenario, seed_seq, block, num_paths, horizon, path_chunk, confidence)
+
+
+def _simulate_block(inputs: Dict[str, np.ndarray],
+                    scenario: StressScenario,
+                    seed_seq: np.random.SeedSequence,
+                    block: slice,
+                    num_paths: int,
+                    horizon: int,
+                    path_chunk: int,
+                    confidence: float) -> np.ndarray:
+    """
+    Simulate one scenario for a block of portfolios and summarise the P&L.
+
+    Paths are generated in chunks whose generators are spawned from the
+    scenario's seed sequence, so every portfolio block sees the same market
+    paths regardless of how tasks are scheduled.
+    """
+    weights = inputs['weights'][block]
+    mean = inputs['mean'] + scenario.drift_shift
+    factor = inputs['chol'] * scenario.vol_multiplier
+    num_chunks = -(-num_paths // path_chunk)
+    pnl = np.empty((weights.shape[0], num_paths))
+    # Spawn from a fresh copy so repeated tasks of one scenario get the same children
+    fresh = np.random.SeedSequence(seed_seq.entropy, spawn_key=seed_seq.spawn_key)
+    for index, child in enumerate(fresh.spawn(num_chunks)):
+        paths = slice(index * path_chunk, min((index + 1) * path_chunk, num_paths))
+        rng = np.random.default_rng(child)
+        draws = rng.standard_normal((paths.stop - paths.start, horizon, factor.shape[0]))
+        log_growth = np.log1p(draws @ factor.T + mean).sum(axis=1)
+        asset_returns = (1.0 + scenario.shock) * np.exp(log_growth) - 1.0
+        pnl[:, paths] = weights @ asset_returns.T
+
+    tail = max(1, int(np.ceil(num_paths * (1.0 - confidence))))
+    worst_first = np.partition(pnl, tail - 1, axis=1)[:, :tail]
+    var = -worst_first.max(axis=1)
+    return np.column_stack([pnl.mean(axis=1), var, -worst_first.mean(axis=1), -pnl.min(axis=1)])
+
+
+def run_stress_tests(weights: np.ndarray,
+                     mean: np.ndarray,
+                     cov: np.ndarray,
+                     scenarios: Sequence[StressScenario],
+                     num_paths: int = 10_000,
+                     horizon: int = 21,
+                     confidence: float = 0.99,
+                     seed: Optional[int] = None,
+                     num_workers: int = 1,
+                     portfolios_per_task: int = 256,
+                     path_chunk: int = 1_000) -> StressResult:
+    """
+    Run stress scenarios against many portfolios on a process pool.
+
+    Work is split into (scenario, portfolio block) tasks. Each scenario gets a
+    child of ``np.random.SeedSequence(seed)`` and all draws derive from it, so
+    results are identical for any ``num_workers``. Large inputs (the weight
+    matrix and the covariance factor) are placed in shared memory once and
+    attached by each worker instead of being pickled with every task.
+
+    Args:
+        weights: Portfolio weights, shape (P, N)
+        mean: Expected return per asset and period, shape (N,)
+        cov: Covariance of per-period returns, shape (N, N)
+        scenarios: Stress scenarios to evaluate
+        num_paths: Simulated paths per scenario
+        horizon: Periods simulated after the instantaneous shock
+        confidence: VaR/CVaR confidence level
+        seed: Random seed for reproducibility
+        num_workers: Worker processes (1 runs in-process)
+        portfolios_per_task: Portfolios evaluated per task
+        path_chunk: Paths simulated at once inside a task
+
+    Returns:
+        StressResult with arrays of shape (num_scenarios, P); losses are positive numbers
+    """
+    start = time.perf_counter()
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    inputs = {
+        'weights': weights,
+        'mean': np.asarray(mean, dtype=float),
+        'chol': np.linalg.cholesky(np.asarray(cov, dtype=float)),
+    }
+    for scenario in scenarios:
+        if np.shape(scenario.shock) != (weights.shape[1],):
+            raise ValueError(f"Scenario {scenario.name} shocks {np.size(scenario.shock)} assets, "
+                             f"portfolios hold {weights.shape[1]}")
+
+    blocks = [slice(i, min(i + portfolios_per_task, weights.shape[0]))
+              for i in range(0, weights.shape[0], portfolios_per_task)]
+    seeds = np.random.SeedSequence(seed).spawn(len(scenarios))
+    tasks = [(scenario, seeds[s], block, num_paths, horizon, path_chunk, confidence)
+             for s, scenario in enumerate(scenarios) for block in blocks]
+
+    with ExitStack() as stack:
+        specs = {}
+        for key, value in inputs.items():
+            if num_workers > 1 and value.nbytes >= SHARED_MIN_BYTES:
+                specs[key] = stack.enter_context(SharedArray(value)).spec
+            else:
+                specs[key] = ('array', value)
+        shared_bytes = sum(inputs[key].nbytes for key, spec in specs.items() if spec[0] == 'shm')
+
+        if num_workers <= 1:
+            _init_worker(specs)
+            try:
+                outputs = [_scenario_task(*task) for task in tasks]
+            finally:
+                _WORKER_SPECS.clear()
+        else:
+            with ProcessPoolExecutor(num_workers, initializer=_init_worker, initargs=(specs,)) as executor:
+                outputs = list(executor.map(_scenario_task, *zip(*tasks)))
+
+    summary = np.concatenate(outputs).reshape(len(scenarios), weights.shape[0], 4)
+    return StressResult(
+        expected_pnl=summary[..., 0],
+        var=summary[..., 1],
+        cvar=summary[..., 2],
+        worst=summary[..., 3],
+        scenarios=[scenario.name for scenario in scenarios],
+        seconds=time.perf_counter() - start,
+        stats={'tasks': len(tasks), 'workers': num_workers, 'shared_bytes': shared_bytes},
+    )
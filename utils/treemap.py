@@ -0,0 +1,108 @@
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.instrument import instrumented
+
+LEVELS = ('Sector', 'Sub_Industry', 'Fund')
+OTHER_LABEL = 'Other'
+
+
+def _node_frame(sums: pd.DataFrame, levels: Sequence[str], depth: int) -> pd.DataFrame:
+    """Turn grouped sums for the first ``depth`` levels into treemap node rows."""
+    keys = sums.reset_index()
+    path = keys[levels[0]].astype(str)
+    parent = pd.Series('', index=keys.index)
+    for level in levels[1:depth]:
+        parent = path
+        path = path + '/' + keys[level].astype(str)
+    return pd.DataFrame({
+        'id': path.to_numpy(),
+        'label': keys[levels[depth - 1]].astype(str).to_numpy(),
+        'parent': parent.to_numpy(),
+        'value': keys['value'].to_numpy(),
+        'weighted': keys['weighted'].to_numpy(),
+        'count': keys['count'].to_numpy(),
+        'depth': depth,
+    })
+
+
+def _leaves_within_budget(leaf_parent: np.ndarray, leaf_values: np.ndarray, budget: int) -> np.ndarray:
+    """
+    Choose which leaves to keep so that kept leaves plus "Other" buckets fit the budget.
+
+    Leaves are kept largest first. Keeping the k largest leaves needs one
+    "Other" bucket for every parent that still has unkept leaves, so the
+    node count for each k is computed in one pass over the sorted order.
+    """
+    order = np.argsort(-leaf_values, kind='stable')
+    num_parents = int(leaf_parent.max()) + 1 if leaf_parent.size else 0
+    # A parent stops needing an "Other" bucket once its smallest leaf is kept
+    last_position = np.zeros(num_parents, dtype=np.int64)
+    np.maximum.at(last_position, leaf_parent[order], np.arange(order.size))
+    completed = np.cumsum(np.bincount(last_position + 1, minlength=order.size + 1))
+    kept = np.arange(order.size + 1)
+    nodes = kept + (num_parents - completed)
+    fits = np.flatnonzero(nodes <= budget)
+    k = int(fits.max()) if fits.size else 0
+    keep = np.zeros(order.size, dtype=bool)
+    keep[order[:k]] = True
+    return keep
+
+
+@instrumented
+def build_treemap(positions: pd.DataFrame,
+                  levels: Sequence[str] = LEVELS,
+                  value: str = 'Market_Value',
+                  color: str = 'Daily_Return',
+                  max_nodes: int = 2_000,
+                  min_value: float = 0.0) -> pd.DataFrame:
+    """
+    Aggregate positions into a size-bounded treemap hierarchy.
+
+    Positions below ``min_value`` are dropped, the rest are summed per node
+    with one vectorised groupby per level, and colors are value-weighted
+    averages of ``color``. When there are more leaves than ``max_nodes``
+    allows, the smallest leaves are folded into one "Other" bucket per parent
+    so the browser only ever receives a bounded number of nodes.
+
+    Args:
+        positions: One row per position with the level, value and color columns
+        levels: Hierarchy columns from the root down to the leaves
+        value: Column sized by the treemap
+        color: Column averaged (value-weighted) for node colors
+        max_nodes: Maximum number of nodes passed to the figure
+        min_value: Minimum position value to include
+
+    Returns:
+        DataFrame with id, label, parent, value, color, count and depth per node,
+        parents listed before their children
+    """
+    levels = list(levels)
+    values = positions[value].to_numpy(dtype=float)
+    mask = values >= min_value
+    frame = positions.loc[mask, levels].copy()
+    frame['value'] = values[mask]
+    frame['weighted'] = values[mask] * positions[color].to_numpy(dtype=float)[mask]
+    frame['count'] = 1
+
+    # Leaves first, so "Other" folding can change the frame before parents are summed
+    leaves = frame.groupby(levels, observed=True, sort=False)[['value', 'weighted', 'count']].sum()
+    leaves = leaves[leaves['value'] > 0]
+    internal = sum(len(leaves.groupby(level=levels[:depth], observed=True)) for depth in range(1, len(levels)))
+    if len(leaves) + internal > max_nodes and len(levels) > 1:
+        parent_codes = leaves.index.droplevel(-1).factorize()[0]
+        keep = _leaves_within_budget(parent_codes, leaves['value'].to_numpy(), max_nodes - internal)
+        folded = leaves[~keep].groupby(level=levels[:-1], observed=True).sum()
+        folded[levels[-1]] = OTHER_LABEL
+        folded = folded.reset_index().set_index(levels)
+        leaves = pd.concat([leaves[keep], folded])
+
+    nodes = [_node_frame(leaves.groupby(level=levels[:depth], observed=True).sum(), levels, depth)
+             for depth in range(1, len(levels))]
+    nodes.append(_node_frame(leaves, levels, len(levels)))
+    tree = pd.concat(nodes, ignore_index=True)
+    tree['color'] = np.divide(tree['weighted'], tree['value'],
+                              out=np.zeros(len(tree)), where=tree['value'].to_numpy() > 0)
+    return tree.drop(columns='weighted')